@@ -0,0 +1,144 @@
+"""Batch operations on a ListTab: import, set priority, complete, delete, move.
+
+Imports a 100k-line text file into an empty list, then applies each batch
+action to 10k entries, moves 10k entries to a second list and imports
+FILTERED_LINES lines into a third, empty list shown with a priority filter.
+For every step this prints the time taken, the model signals the view
+received and the persistence writes it caused, for a JSON list, a journaled
+JSON list and a SQLite list. A batch must cost one write per list touched,
+the filtered import one model reset and one insert for the first page
+rather than a signal per row, and the files must match the lists in memory
+afterwards. Entries added in one batch with mixed priorities, then given
+one priority, must keep the order they were added in. The script exits
+non-zero otherwise.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_bulk.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets
+
+from src import settings
+from src.persistence import stats
+from src.priority_index import PriorityIndex
+from src.storage import engine_for
+
+IMPORT_LINES = 100000
+BATCH = 10000
+FILTERED_LINES = 20000
+SIGNALS = ("modelReset", "rowsInserted", "rowsRemoved", "rowsMoved", "dataChanged")
+
+
+class SignalCounter:
+    def __init__(self, model):
+        self.counts = dict.fromkeys(SIGNALS, 0)
+        for name in SIGNALS:
+            getattr(model, name).connect(lambda *args, name=name: self._count(name))
+
+    def _count(self, name):
+        self.counts[name] += 1
+
+    def take(self):
+        counts = {name: n for name, n in self.counts.items() if n}
+        self.counts = dict.fromkeys(SIGNALS, 0)
+        return counts
+
+
+def writes(tabs):
+    """Writes performed so far by the tabs' writers and edit logs."""
+    total = stats.snapshot()["writes_performed"]
+    for tab in tabs:
+        total += getattr(tab.journal, "records_appended", 0) + getattr(tab.journal, "commits", 0)
+    return total
+
+
+def run(tmp, suffix, journal_mode):
+    from main import ListTab
+    settings.JOURNAL_MODE = journal_mode
+    label = f"{suffix[1:]}{' + journal' if journal_mode else ''}"
+    paths = [os.path.join(tmp, f"{name}_{label.replace(' + ', '_')}{suffix}")
+             for name in ("source", "target", "filtered")]
+    for path in paths:
+        engine_for(path).write(path, {})
+    source, target, filtered = tabs = [ListTab(path) for path in paths]
+    counter = SignalCounter(source.model)
+    filtered_counter = SignalCounter(filtered.model)
+    text_path = os.path.join(tmp, "import.txt")
+    with open(text_path, 'w') as f:
+        f.writelines(f"Imported line {i}\n" for i in range(IMPORT_LINES))
+
+    failures = 0
+    print(label)
+
+    def step(name, action, lists=1, max_signals=None, counter=counter):
+        nonlocal failures
+        before = writes(tabs)
+        start = time.perf_counter()
+        result = action()
+        elapsed = time.perf_counter() - start
+        for tab in tabs:
+            tab.flush()
+        performed = writes(tabs) - before
+        signals = counter.take()
+        ok = performed == lists and (max_signals is None or sum(signals.values()) <= max_signals)
+        failures += not ok
+        print(f"  {name:<24} {result:>7} entries {elapsed * 1000:8.1f} ms  writes {performed}"
+              f"{'' if ok else ' FAILED'}  signals {signals}")
+
+    step("import text file", lambda: source.import_text_file(text_path, priority=3))
+    keys = [source.model.key_for_row(row) for row in range(0, source.model.rowCount(), IMPORT_LINES // BATCH)]
+    step("set priority", lambda: source.set_priority(keys, 9))
+    step("mark completed", lambda: source.set_completed(keys))
+    step("mark not completed", lambda: source.set_completed(keys[:BATCH // 2], False))
+    step("delete", lambda: source.delete_entries(keys))
+    few = [source.model.key_for_row(row) for row in range(10)]
+    step("set priority (10 rows)", lambda: source.set_priority(few, 10))
+    moving = [source.model.key_for_row(row) for row in range(BATCH)]
+    step("move to another list", lambda: source.move_entries(moving, target), lists=2)
+    with open(text_path, 'w') as f:
+        f.writelines(f"Filtered line {i}\n" for i in range(FILTERED_LINES))
+    filtered.min_priority_box.setValue(2)
+    filtered_counter.take()
+    step("import, filtered view", lambda: filtered.import_text_file(text_path, priority=3), max_signals=2,
+         counter=filtered_counter)
+
+    # Rows of a level, and an entry moved to another, follow the order of addition.
+    mixed = target.add_entries([(None, {"text": f"Mixed {i}", "priority": i % 3 + 1, "completed": False})
+                                for i in range(30)])
+    target.set_priority(mixed, 7)
+    target.flush()
+    ordered = [key for key in target.model.order if key in set(mixed)] == mixed
+    ordered = ordered and list(target.model.order) == list(PriorityIndex(target.list_data))
+    failures += not ordered
+    print(f"  batch of mixed priorities, then one priority: {'in order of addition' if ordered else 'OUT OF ORDER'}")
+
+    for tab in tabs:
+        on_disk = engine_for(tab.json_file_path).read(tab.json_file_path)
+        if journal_mode:
+            from src.journal import replay
+            replay(on_disk, tab.json_file_path)
+        if on_disk != tab.list_data.to_dict():
+            print(f"  {os.path.basename(tab.json_file_path)} does not match the list in memory FAILED")
+            failures += 1
+        tab.teardown()
+    return failures
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix, journal_mode in ((".json", False), (".json", True), (".sqlite", False)):
+            failures += run(tmp, suffix, journal_mode)
+            app.processEvents()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Idle CPU and edit-sync latency for ListTab.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_change_tracking.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets, QtCore
+
+from main import ListTab
+
+
+def write_list(path, count):
+    data = {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": i % 7 == 0}
+        for i in range(count)
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def idle_cpu(app, seconds):
+    deadline = time.perf_counter() + seconds
+    cpu_start = time.process_time()
+    while time.perf_counter() < deadline:
+        app.processEvents(QtCore.QEventLoop.AllEvents, 50)
+        time.sleep(0.01)
+    return (time.process_time() - cpu_start) / seconds
+
+
+def edit_latency(tab, edits):
+    # Persistence is measured elsewhere; only the sync path is timed here.
+    tab.update_json = lambda: None
+    rows = tab.model.rowCount()
+    timings = []
+    for i in range(edits):
+        row = (i * 7919) % rows
+        start = time.perf_counter()
+        tab.model.setData(tab.model.index(row, 0), f"edited {i}")
+        timings.append(time.perf_counter() - start)
+        assert tab.list_data[tab.model.key_for_row(row)]['text'] == f"edited {i}"
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (100, 1000, 10000, 20000):
+            path = os.path.join(tmp, f"bench_{count}.json")
+            write_list(path, count)
+            tab = ListTab(path)
+            # Let construction-time events (polish, layout) drain first.
+            idle_cpu(app, 1.0)
+            cpu = idle_cpu(app, 2.0)
+            latency = edit_latency(tab, 200)
+            tab.reorder_timer.stop()
+            print(f"{count:>6} entries: idle cpu {cpu * 100:5.1f}%  median edit sync {latency * 1e6:8.1f} us")
+            tab.deleteLater()
+            app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
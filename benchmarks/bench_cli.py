@@ -0,0 +1,146 @@
+"""zen-lists command-line tool: wall time per command, in a fresh process each.
+
+Runs every command RUNS times against a data folder of LISTS lists of
+ENTRIES entries, reports the median, and checks that:
+
+  - importing the core and the CLI pulls in no Qt module;
+  - each command on one list finishes within LIMIT_MS (query reads the
+    search cache of every list in the folder, so its time is only reported);
+  - an entry added and completed from the command line reads back as such
+    through ListDocument, and is found by query;
+  - list, export and query leave files alone: a file that is not a list is
+    not taken for one, and an unreadable list is reported, not replaced;
+  - edits to a read_only ListDocument (what those commands open) never
+    reach the disk, with or without journal mode.
+
+Exits non-zero if a check fails.
+
+Run with:
+    python benchmarks/bench_cli.py
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import settings
+from src.list_document import ListDocument
+from src.persistence import write_json_atomic
+
+LISTS = 20
+ENTRIES = 1000
+RUNS = 15
+LIMIT_MS = 100
+CLI = [sys.executable, os.path.join(ROOT, "zen-lists")]
+
+
+def write_list(path, count):
+    write_json_atomic(path, {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": i % 7 == 0}
+        for i in range(count)
+    })
+
+
+def run(data_dir, *args):
+    return subprocess.run(CLI + ["--data", data_dir] + list(args), capture_output=True, text=True, check=True).stdout
+
+
+def median_ms(data_dir, args):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        run(data_dir, *args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    failures = 0
+    imported = subprocess.run([sys.executable, "-c", "import sys; sys.path.insert(0, sys.argv[1]); "
+                               "import src.cli, src.list_document, src.search_index; "
+                               "print(','.join(m for m in sys.modules if m.startswith(('PyQt', 'sip'))))", ROOT],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    failures += bool(imported)
+    print(f"Qt modules imported by the core: {imported or 'none'}")
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    print(f"bare interpreter: {(time.perf_counter() - start) * 1000:5.1f} ms")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        for n in range(LISTS):
+            write_list(os.path.join(data_dir, f"list_{n:02d}.json"), ENTRIES)
+        run(data_dir, "query", "entry")  # builds the search cache once, as the app would have
+        commands = [
+            ("list",),
+            ("list", "list_00", "--open", "--min-priority", "5"),
+            ("add", "list_00", "bench entry", "-p", "7"),
+            ("complete", "list_00", "1700000001"),
+            ("query", "entry", "99"),
+            ("export", "list_00", "--format", "csv"),
+        ]
+        for args in commands:
+            elapsed = median_ms(data_dir, args)
+            if args[0] == "query":
+                print(f"  zen-lists {' '.join(args):<42} {elapsed:6.1f} ms for {LISTS * ENTRIES} entries")
+                continue
+            ok = elapsed < LIMIT_MS
+            failures += not ok
+            print(f"  zen-lists {' '.join(args):<42} {elapsed:6.1f} ms {'ok' if ok else 'SLOW'}")
+
+        key = run(data_dir, "add", "list_01", "zymurgy supplies", "-p", "9").strip()
+        run(data_dir, "complete", "list_01", key)
+        document = ListDocument(os.path.join(data_dir, "list_01.json"))
+        entry = document.list_data.get(key)
+        document.close()
+        found = f"list_01: {key}" in run(data_dir, "query", "zymurgy")
+        ok = entry is not None and entry["completed"] and entry["priority"] == 9 and found
+        failures += not ok
+        print(f"  round trip: added {key}, read back {'completed' if entry and entry['completed'] else entry},"
+              f" {'found' if found else 'NOT FOUND'} by query {'ok' if ok else 'FAILED'}")
+
+        notes = os.path.join(data_dir, "notes.txt")
+        broken = os.path.join(data_dir, "broken.json")
+        contents = {notes: "not a list\n", broken: "{not json"}
+        for path, text in contents.items():
+            with open(path, "w") as f:
+                f.write(text)
+        refused = 0
+        for args in (("list", notes), ("export", notes), ("list", "broken"), ("export", "broken"),
+                     ("query", "entry")):
+            refused += subprocess.run(CLI + ["--data", data_dir] + list(args), capture_output=True).returncode != 0
+        untouched = all(open(path).read() == text for path, text in contents.items())
+        ok = untouched and refused == 4 and not os.path.exists(broken + ".corrupt")
+        failures += not ok
+        print(f"  read-only commands on a non-list and a broken list: {refused} of 4 refused,"
+              f" files {'untouched' if untouched else 'CHANGED'} {'ok' if ok else 'FAILED'}")
+
+        path = os.path.join(data_dir, "list_02.json")
+        for journal_mode in (False, True):
+            settings.JOURNAL_MODE = journal_mode
+            with open(path, "rb") as f:
+                before = f.read()
+            document = ListDocument(path, read_only=True)
+            key = document.add_entry("never written", 3)
+            document.set_completed(list(document.list_data)[:10])
+            document.delete_entries(list(document.list_data)[10:20])
+            document.close()
+            with open(path, "rb") as f:
+                untouched = f.read() == before
+            leftovers = [name for name in os.listdir(data_dir) if name.startswith("list_02.json.")]
+            ok = untouched and not leftovers and key not in ListDocument(path, read_only=True).list_data
+            failures += not ok
+            print(f"  edits to a read-only document{', journal mode' if journal_mode else '':<14}"
+                  f" file {'untouched' if untouched else 'CHANGED'}, {leftovers or 'no journal'}"
+                  f" {'ok' if ok else 'FAILED'}")
+        settings.JOURNAL_MODE = False
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Bytes per entry: dict of entry dicts vs. EntryStore.
+
+Also checks that priorities outside the range the store packs them in
+(hand-edited files have them) load, are added, set and read back as given.
+Exits non-zero if that fails.
+
+Pure Python, no Qt needed:
+    python benchmarks/bench_entry_store.py
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.entry_store import EntryStore
+
+
+def entries(count):
+    for i in range(count):
+        yield str(1700000000000 + i), {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": i % 4 == 0}
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return data, used
+
+
+def check_wide_priorities():
+    priorities = [1, 127, 200, -300, 40000, 2 ** 40]
+    plain = {str(i): {"text": f"Entry {i}", "priority": p, "completed": False} for i, p in enumerate(priorities)}
+    loaded = EntryStore.from_dict(plain)
+    added = EntryStore.from_dict({"0": plain["0"]})
+    added.append_batch(list(plain.items())[1:])
+    one_by_one = EntryStore()
+    for key, entry in plain.items():
+        one_by_one[key] = {**entry, "priority": 1}
+        one_by_one[key]["priority"] = entry["priority"]
+    ok = all(store.to_dict() == plain for store in (loaded, added, one_by_one))
+    print(f"priorities {priorities[2:]} loaded, added and set: {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    ok = check_wide_priorities()
+    print(f"{'entries':>9} {'dict of dicts':>15} {'EntryStore':>12} {'saving':>8}")
+    for count in (10000, 100000, 1000000):
+        plain, plain_bytes = measure(lambda: dict(entries(count)))
+        store, store_bytes = measure(lambda: EntryStore.from_dict(plain))
+        # The store shares the key and text strings with plain; count them once.
+        shared = sum(sys.getsizeof(k) + sys.getsizeof(e["text"]) for k, e in plain.items())
+        store_bytes += shared
+        assert store.to_dict() == plain
+        print(f"{count:>9} {plain_bytes / count:>12.1f} B {store_bytes / count:>9.1f} B "
+              f"{1 - store_bytes / plain_bytes:>7.0%}")
+        del plain, store
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
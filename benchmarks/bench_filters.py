@@ -0,0 +1,80 @@
+"""Cost of toggling view filters on a 200k-entry list.
+
+Most entries are completed, as in a long-lived list. For each filter change
+this prints the time until control returns to the event loop, the time until
+the first page is filled, and the rows the model then holds.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_filters.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets
+
+from main import ListTab
+from src.list_model import ListFilter
+
+FILTERS = [
+    ("hide completed", ListFilter(hide_completed=True)),
+    ("show all", ListFilter()),
+    ("priority >= 8", ListFilter(min_priority=8)),
+    ("priority >= 8, open", ListFilter(hide_completed=True, min_priority=8)),
+    ("text 'entry 1999'", ListFilter(text="entry 1999")),
+    ("regex '7$', open", ListFilter(hide_completed=True, text="7$", regex=True)),
+    ("rare regex '^Entry 19999.$'", ListFilter(text="^Entry 19999.$", regex=True)),
+    ("show all", ListFilter()),
+]
+
+
+def write_history_list(path, count):
+    # Four out of five entries are completed history.
+    data = {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": (i * 2654435761) % 1000 >= 200}
+        for i in range(count)
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    count = 200000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.json")
+        write_history_list(path, count)
+        tab = ListTab(path)
+        tab.resize(800, 600)
+        tab.show()
+        app.processEvents()
+        model = tab.model
+
+        for name, list_filter in FILTERS:
+            start = time.perf_counter()
+            model.set_filter(list_filter)
+            app.processEvents()
+            toggled = time.perf_counter() - start
+            while model.fetching:
+                app.processEvents()
+            settled = time.perf_counter() - start
+            print(f"{name:>30}: {toggled * 1000:7.2f} ms, first page {settled * 1000:7.2f} ms"
+                  f"  rows held {model.rowCount():>6}  scanned {model._scanned:>6}")
+
+        # Scrolling a filtered view to the end fetches the remaining pages.
+        model.set_filter(ListFilter(hide_completed=True))
+        start = time.perf_counter()
+        model.fetch_all()
+        app.processEvents()
+        print(f"{'hide completed, fetch all':>30}: {(time.perf_counter() - start) * 1000:8.2f} ms"
+              f"  rows held {model.rowCount():>6}")
+        tab.teardown(discard=True)
+        app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Instrumentation: what it records, and what it costs when off.
+
+  off        the @timed wrapper around a no-op, per call, against the bare
+             no-op; and a burst of ListTab edits with instruments off.
+  on         the same burst with instruments on, then every hot path the
+             panel lists must have calls and every counter a value.
+  stall      a GUI callback that sleeps STALL_MS must show up as a stall
+             whose stack names it.
+  export     the trace file must load as Trace Event JSON.
+
+Exits non-zero if a check fails.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_instrumentation.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore, QtWidgets
+
+from src import settings
+from src.instrumentation import Instruments, instruments
+from src.persistence import write_json_atomic
+
+CALLS = 1000000
+EDITS = 2000
+ENTRIES = 5000
+STALL_MS = 300
+HOT_PATHS = ["ListDocument.load_json", "ListDocument.update_json", "ListDocument.check_disk", "ListTab.check_disk",
+             "ListTab.reorder_entries", "ListTab.render_entries", "ListWriter.write_now"]
+COUNTERS = ["file writes", "bytes written", "rows rendered"]
+
+
+def pump(app, seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.002)
+
+
+def wrapper_cost():
+    off = Instruments(enabled=False)
+
+    def bare():
+        pass
+
+    wrapped = off.timed("noop")(bare)
+    timings = []
+    for function in (bare, wrapped):
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            function()
+        timings.append((time.perf_counter() - start) / CALLS)
+    return timings[1] - timings[0]
+
+
+def edit_burst(app, tab):
+    keys = [tab.model.key_for_row(row) for row in range(EDITS)]
+    start = time.perf_counter()
+    for i, key in enumerate(keys):
+        tab.set_priority([key], i % 10 + 1)
+    tab.reorder_entries()
+    tab.render_entries()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    from main import MainWindow
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    settings.WRITE_DELAY_MS = 50
+    failures = 0
+
+    cost = wrapper_cost()
+    ok = cost < 1e-6
+    failures += not ok
+    print(f"off: @timed adds {cost * 1e9:5.0f} ns per call {'ok' if ok else 'TOO SLOW'}")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        path = os.path.join(data_dir, "instrumented.json")
+        write_json_atomic(path, {str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1,
+                                                       "completed": False} for i in range(ENTRIES)})
+        instruments.enable(False)
+        window = MainWindow(data_dir)
+        window.show()
+        pump(app, 0.5)
+        tab = window.visible_tabs[0][1]
+        off = edit_burst(app, tab)
+
+        instruments.reset()
+        instruments.enable()
+        window.stall_watch.start()
+        on = edit_burst(app, tab)
+        print(f"{EDITS} edits: {off * 1000:6.1f} ms off, {on * 1000:6.1f} ms on")
+
+        # A load, a watcher reload and a few paints, so every path has calls.
+        window.load_all_lists()
+        pump(app, 0.5)
+        tab = window.visible_tabs[0][1]
+        data = json.load(open(path))
+        data["external"] = {"text": "external", "priority": 10, "completed": False}
+        write_json_atomic(path, data)
+        pump(app, 0.5)
+        tab.table.viewport().repaint()
+        pump(app, 0.2)
+
+        # A callback that holds the event loop.
+        def hold_the_loop():
+            time.sleep(STALL_MS / 1000)
+        QtCore.QTimer.singleShot(0, hold_the_loop)
+        pump(app, 0.5)
+
+        snapshot = instruments.snapshot()
+        for name in HOT_PATHS:
+            summary = snapshot["histograms"].get(name)
+            ok = summary is not None and summary["count"] > 0
+            failures += not ok
+            if summary is None:
+                print(f"  {name:<28} NO CALLS")
+                continue
+            print(f"  {name:<28} {summary['count']:>6} calls  p50 {summary['p50_ms']:8.3f} ms"
+                  f"  p99 {summary['p99_ms']:8.3f} ms  max {summary['max_ms']:8.3f} ms")
+        update = snapshot["histograms"].get("ListDocument.update_json")
+        if update:
+            print(f"  off, the wrapper is {cost * 1000 / update['mean_ms'] * 100:4.1f}% of an update_json call")
+        for name in COUNTERS:
+            value = snapshot["counters"].get(name, 0)
+            failures += not value
+            print(f"  {name:<28} {value:>10,}")
+        stalls = [s for s in snapshot["stalls"] if "hold_the_loop" in s["stack"]]
+        ok = len(stalls) == 1 and stalls[0]["ms"] >= STALL_MS * 0.9
+        failures += not ok
+        print(f"stall: {len(snapshot['stalls'])} recorded, {stalls[0]['ms'] if stalls else 0:.0f} ms in hold_the_loop"
+              f" {'ok' if ok else 'FAILED'}")
+
+        trace_path = os.path.join(data_dir, "trace.json")
+        written = instruments.export(trace_path)
+        with open(trace_path) as f:
+            trace = json.load(f)
+        events = trace["traceEvents"]
+        complete = [e for e in events if e["ph"] == "X"]
+        ok = (len(events) >= written and all({"name", "ph", "pid"} <= e.keys() for e in events)
+              and all("ts" in e and "dur" in e and "tid" in e for e in complete)
+              and {e["name"] for e in complete} >= set(HOT_PATHS))
+        failures += not ok
+        print(f"export: {written:,} events, {len(complete):,} complete, {os.path.getsize(trace_path):,} bytes"
+              f" {'ok' if ok else 'FAILED'}")
+
+        window.stall_watch.stop()
+        instruments.enable(False)
+        window.close()
+        app.processEvents()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Per-edit write cost: full JSON rewrite vs. journal append.
+
+Then two documents share one list in journal mode, as two instances of the
+app would, with compactions in between their edits: each must end up with
+the other's entries and nothing may be lost. Exits non-zero if anything is.
+
+Pure Python, no Qt needed:
+    python benchmarks/bench_journal.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import journal, settings
+from src.list_document import ListDocument
+from src.persistence import write_json_atomic
+
+
+def make_list(count):
+    return {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": False}
+        for i in range(count)
+    }
+
+
+def bench_append():
+    random.seed(0)
+    edits = 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (1000, 10000, 50000):
+            path = os.path.join(tmp, f"bench_{count}.json")
+            list_data = make_list(count)
+            write_json_atomic(path, list_data)
+            keys = list(list_data)
+
+            start = time.perf_counter()
+            for _ in range(20):
+                key = random.choice(keys)
+                list_data[key]['completed'] = not list_data[key]['completed']
+                write_json_atomic(path, list_data)
+            rewrite = (time.perf_counter() - start) / 20
+
+            log = journal.ListJournal(path, compact_bytes=64 * 1024)
+            start = time.perf_counter()
+            for i in range(edits):
+                key = random.choice(keys)
+                if i % 3 == 0:
+                    list_data[key]['completed'] = not list_data[key]['completed']
+                    log.set_field(key, 'completed', list_data[key]['completed'])
+                else:
+                    list_data[key]['text'] = f"edit {i}"
+                    log.set_field(key, 'text', list_data[key]['text'])
+            append = (time.perf_counter() - start) / edits
+            log.close()
+
+            # Snapshot plus journal must reproduce the live list exactly.
+            with open(path) as f:
+                reloaded = json.load(f)
+            journal.replay(reloaded, path)
+            assert reloaded == list_data
+
+            print(f"{count:>6} entries: full rewrite {rewrite * 1000:8.2f} ms/edit  "
+                  f"journal append {append * 1e6:7.1f} us/edit  "
+                  f"({log.compactions} compactions)")
+
+
+def bench_shared():
+    """Two documents on one file, each compacting while the other appends."""
+    settings.JOURNAL_MODE = True
+    settings.JOURNAL_COMPACT_BYTES = 2000
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "shared.json")
+            write_json_atomic(path, {})
+            first, second = ListDocument(path), ListDocument(path)
+            expected = set(first.list_data)
+            for burst in range(5):
+                expected.update(second.add_entry(f"second {burst}.{i}") for i in range(5))
+                expected.update(first.add_entry(f"first {burst}.{i}") for i in range(40))
+                first.journal.compact(wait=True)
+                expected.update(second.add_entry(f"second {burst}.{i}") for i in range(5, 8))
+                second.journal.compact(wait=True)
+            first.flush()
+            second.flush()
+            seen_first, seen_second = first.check_disk(), second.check_disk()
+            failures = 0
+            for label, keys in (("first document", set(first.list_data)),
+                                ("second document", set(second.list_data)),
+                                ("reopened", set(ListDocument(path, read_only=True).list_data))):
+                lost = len(expected - keys)
+                failures += lost > 0
+                print(f"  shared list, {label:<16} {len(keys):>4} entries, {lost} lost")
+            if seen_first is None or seen_second is None:
+                print("  a document did not notice the other's edits")
+                failures += 1
+            first.close()
+            second.close()
+            return failures
+    finally:
+        settings.JOURNAL_MODE = False
+        settings.JOURNAL_COMPACT_BYTES = 256 * 1024
+
+
+def main():
+    bench_append()
+    print("Two documents sharing a list in journal mode:")
+    sys.exit(1 if bench_shared() else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Entry keys and entry creation at scale.
+
+Generates a million keys one at a time and in bulk, and checks that none
+collide and that each is larger than the one before. Two generators on one
+clock stand in for two instances adding to the same list, and a process
+forked mid-run (multiprocessing's default on Linux) must not repeat its
+parent's keys. Then inserts a
+million entries one at a time, first through EntryStore and PriorityIndex
+alone and then through ListTab.add_entry, reporting the cost of each
+100k-entry stretch: constant cost means creation does not depend on the list
+size. Through the tab the cost still grows with the row count, all of it
+inside QTableView's handling of rowsInserted (the same model with no view
+attached stays flat); a burst of entries should go through add_entries,
+which signals the view once. Exits non-zero on any collision or ordering error.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_keys.py
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import entry_keys
+from src.entry_keys import KeyGenerator
+from src.entry_store import EntryStore
+from src.priority_index import PriorityIndex
+
+COUNT = 1000000
+STRETCH = 100000
+FORKED = 20000
+
+
+def check_keys(label, keys):
+    unique = len(set(keys)) == len(keys)
+    ordered = all(a < b for a, b in zip(keys, keys[1:])) and all(int(a) < int(b) for a, b in zip(keys, keys[1:]))
+    print(f"  {label:<34} {len(keys):>8} keys  {'unique' if unique else 'COLLISIONS'},"
+          f" {'increasing' if ordered else 'OUT OF ORDER'}")
+    return int(not unique) + int(not ordered)
+
+
+def bench_keys():
+    failures = 0
+    generator = KeyGenerator()
+    start = time.perf_counter()
+    keys = [generator.new_key() for _ in range(COUNT)]
+    elapsed = time.perf_counter() - start
+    print(f"new_key: {elapsed / COUNT * 1e9:6.0f} ns/key, {COUNT / elapsed / 1e6:4.2f}M keys/s")
+    failures += check_keys("one at a time", keys)
+    start = time.perf_counter()
+    bulk = generator.new_keys(COUNT)
+    elapsed = time.perf_counter() - start
+    print(f"new_keys: {elapsed / COUNT * 1e9:5.0f} ns/key in one call")
+    failures += check_keys("in bulk, after the above", keys + bulk)
+
+    # Two instances on a frozen clock: every key falls in the same millisecond.
+    now = time.time_ns()
+    first, second = KeyGenerator(node=1, clock=lambda: now), KeyGenerator(node=2, clock=lambda: now)
+    both = []
+    for _ in range(STRETCH):
+        both.append(first.new_key())
+        both.append(second.new_key())
+    collisions = len(both) - len(set(both))
+    failures += collisions > 0
+    print(f"  {'two generators, one millisecond':<34} {len(both):>8} keys  "
+          f"{'unique' if not collisions else f'{collisions} COLLISIONS'}")
+
+    # A forked child inherits the module's generator; its keys must be its own.
+    entry_keys.new_key()
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=forked_keys, args=(results,))
+    child.start()
+    parent = [entry_keys.new_key() for _ in range(FORKED)] + entry_keys.new_keys(FORKED)
+    theirs = results.get()
+    child.join()
+    collisions = len(set(parent) & set(theirs))
+    failures += collisions > 0
+    print(f"  {'parent and forked child':<34} {len(parent) + len(theirs):>8} keys  "
+          f"{'unique' if not collisions else f'{collisions} COLLISIONS'}")
+
+    # Existing keys are left alone and never handed out again.
+    taken = {"example_entry", "1700000000", generator.new_key()}
+    fresh = generator.new_keys(10, taken)
+    failures += bool(taken & set(fresh))
+    return failures
+
+
+def forked_keys(results):
+    results.put([entry_keys.new_key() for _ in range(FORKED)] + entry_keys.new_keys(FORKED))
+
+
+def bench_store():
+    generator = KeyGenerator()
+    store = EntryStore({"example_entry": {"text": "Example Entry", "priority": 5, "completed": False}})
+    order = PriorityIndex(store)
+    print("EntryStore + PriorityIndex, one entry at a time:")
+    for stretch in range(COUNT // STRETCH):
+        start = time.perf_counter()
+        for i in range(stretch * STRETCH, (stretch + 1) * STRETCH):
+            key = generator.new_key(store)
+            priority = i % 10 + 1
+            store[key] = {"text": f"Entry {i}", "priority": priority, "completed": False}
+            order.add(key, priority)
+        elapsed = time.perf_counter() - start
+        if stretch in (0, COUNT // STRETCH - 1):
+            print(f"  entries {stretch * STRETCH:>7}-{(stretch + 1) * STRETCH:>7}: {elapsed / STRETCH * 1e6:5.2f} us/entry")
+    return int(len(store) != COUNT + 1 or len(order) != COUNT + 1)
+
+
+def bench_tab():
+    from PyQt5 import QtWidgets
+    from src import settings
+    from main import ListTab
+    from src.storage import engine_for
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    settings.WRITE_DELAY_MS = 60000  # one write at the end, as a burst would get
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "keys.json")
+        engine_for(path).write(path, {})
+        tab = ListTab(path)
+        tab.resize(800, 600)
+        tab.show()
+        app.processEvents()
+        print("ListTab.add_entry, one entry at a time:")
+        for stretch in range(COUNT // STRETCH):
+            start = time.perf_counter()
+            for i in range(stretch * STRETCH, (stretch + 1) * STRETCH):
+                tab.add_entry(f"Entry {i}", i % 10 + 1)
+            app.processEvents()
+            elapsed = time.perf_counter() - start
+            if stretch in (0, COUNT // STRETCH - 1):
+                print(f"  entries {stretch * STRETCH:>7}-{(stretch + 1) * STRETCH:>7}:"
+                      f" {elapsed / STRETCH * 1e6:5.1f} us/entry")
+        failures = int(len(tab.list_data) != COUNT + 1 or tab.model.rowCount() != COUNT + 1)
+        start = time.perf_counter()
+        tab.flush()
+        print(f"  {len(tab.list_data)} entries, {tab.model.rowCount()} rows, written in"
+              f" {time.perf_counter() - start:4.2f} s")
+        tab.teardown(discard=True)
+        app.processEvents()
+    return failures
+
+
+def main():
+    failures = bench_keys() + bench_store() + bench_tab()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Open and scroll cost of large lists on the model/view table.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_model_view.py
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets
+
+from main import ListTab
+
+
+def write_list(path, count):
+    data = {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": i % 7 == 0}
+        for i in range(count)
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (5000, 100000):
+            path = os.path.join(tmp, f"bench_{count}.json")
+            write_list(path, count)
+
+            start = time.perf_counter()
+            tab = ListTab(path)
+            tab.resize(1000, 700)
+            tab.show()
+            app.processEvents()
+            opened = time.perf_counter() - start
+
+            # Page through the list; each step only paints the rows in view.
+            scrollbar = tab.table.verticalScrollBar()
+            steps = 200
+            start = time.perf_counter()
+            for step in range(steps):
+                scrollbar.setValue(scrollbar.maximum() * step // steps)
+                tab.table.viewport().repaint()
+            per_step = (time.perf_counter() - start) / steps
+
+            print(f"{count:>6} entries: open {opened * 1000:8.1f} ms  "
+                  f"scroll step {per_step * 1000:6.2f} ms  max rss {max_rss_mb():7.1f} MB")
+            tab.reorder_timer.stop()
+            tab.close()
+            tab.deleteLater()
+            app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
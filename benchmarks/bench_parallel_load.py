@@ -0,0 +1,105 @@
+"""Serial vs. pooled parsing of a data directory of large list files.
+
+Also checks that a list that cannot be read reaches the loader's callback
+(as a result with error set, from threads and processes alike) and opens
+as an empty, unwritable document, leaving the file where it was; exits
+non-zero if not.
+
+Pure Python, no Qt needed:
+    python benchmarks/bench_parallel_load.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import settings, storage
+from src.list_document import ListDocument
+from src.list_loader import ListLoader, parse_list
+
+LISTS = 40
+ENTRIES_PER_LIST = 20000
+
+
+def make_data_dir(path):
+    os.makedirs(path)
+    for n in range(LISTS):
+        data = {
+            str(1700000000 + i): {"text": f"List {n} entry {i}", "priority": i % 10 + 1, "completed": i % 5 == 0}
+            for i in range(ENTRIES_PER_LIST)
+        }
+        with open(os.path.join(path, f"list_{n:04d}.json"), 'w') as f:
+            json.dump(data, f, indent=4)
+
+
+def use_backend(name):
+    settings.JSON_BACKEND = name
+    storage._loads = None
+    storage.json_loads()
+
+
+def timed(label, load):
+    start = time.perf_counter()
+    results = load()
+    elapsed = time.perf_counter() - start
+    assert len(results) == LISTS and all(len(r.data) == ENTRIES_PER_LIST for r in results)
+    print(f"  {label:<34} {elapsed * 1000:8.1f} ms")
+
+
+def check_unreadable(tmp):
+    """A list the loader cannot read must still be reported to its callback."""
+    # A directory named like a list stands in for a file we may not read;
+    # root reads files whatever their permissions.
+    path = os.path.join(tmp, "unreadable.json")
+    os.mkdir(path)
+    ok = True
+    for label, loader in (("threads", ListLoader(workers=2)), ("processes", ListLoader(workers=2, process_min_bytes=0))):
+        results = []
+        loader.submit(path, results.append).exception(30)
+        end = time.perf_counter() + 5
+        while not results and time.perf_counter() < end:
+            time.sleep(0.01)
+        loader.shutdown()
+        reported = bool(results) and results[0].error is not None
+        document = ListDocument(path, results[0]) if reported else None
+        kept = document is not None and not document.writable and not document.list_data and os.path.isdir(path)
+        passed = reported and kept
+        ok = ok and passed
+        print(f"  unreadable list through {label:<9} reported {reported}, opened empty and left alone {kept}"
+              f" {'ok' if passed else 'FAILED'}")
+    return ok
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        make_data_dir(data_dir)
+        paths = sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir))
+        size = sum(os.path.getsize(p) for p in paths) / 1e6
+        print(f"{LISTS} lists x {ENTRIES_PER_LIST} entries ({size:.0f} MB)")
+
+        backends = ["json"]
+        try:
+            import orjson  # noqa: F401
+            backends.append("orjson")
+        except ImportError:
+            pass
+        for backend in backends:
+            use_backend(backend)
+            timed(f"serial ({backend})", lambda: [parse_list(p) for p in paths])
+            for workers in (2, 4, 8):
+                loader = ListLoader(workers=workers)
+                timed(f"{workers} threads ({backend})", lambda: list(loader.load_all(paths)))
+                loader.shutdown()
+            loader = ListLoader(workers=4, process_min_bytes=0)
+            timed(f"4 processes ({backend})", lambda: list(loader.load_all(paths)))
+            loader.shutdown()
+        ok = check_unreadable(tmp)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Write-behind persistence: GUI-thread cost and writes avoided while typing.
+
+Also checks that a failed write (a full disk, once) is neither lost nor
+silent: it is reported, stays pending, is retried on its own and is written
+by a flush. And that an atomic write, JSON or SQLite, keeps the permissions
+the file had (a new file gets the umask's); exits non-zero if not.
+
+Pure Python, no Qt needed:
+    python benchmarks/bench_persistence.py
+"""
+import errno
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import persistence, settings
+from src.persistence import ListWriter, write_json_atomic
+from src.sqlite_store import write_entries
+
+
+def make_list(count):
+    return {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": False}
+        for i in range(count)
+    }
+
+
+def type_burst(list_data, on_edit, keystrokes, interval):
+    key = next(iter(list_data))
+    spent = 0.0
+    for i in range(keystrokes):
+        list_data[key]['text'] = "x" * (i + 1)
+        start = time.perf_counter()
+        on_edit()
+        spent += time.perf_counter() - start
+        time.sleep(interval)
+    return spent
+
+
+def check_failed_write(tmp):
+    """One write hits a full disk: the edit must still reach the file."""
+    path = os.path.join(tmp, "full_disk.json")
+    list_data = make_list(100)
+    failures = []
+    errors = []
+
+    def write(path, data, fsync):
+        if not failures:
+            failures.append(path)
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return write_json_atomic(path, data, fsync)
+
+    ok = True
+    settings.WRITE_RETRY_MS = 200
+    for how in ("flush", "retry"):
+        failures.clear()
+        errors.clear()
+        writer = ListWriter(path, lambda: list_data, delay_ms=0, write=write, on_error=errors.append)
+        writer.schedule()
+        end = time.perf_counter() + 5
+        # on_error is called once the failed write is queued again.
+        while not errors and time.perf_counter() < end:
+            time.sleep(0.01)
+        reported = bool(errors) and errors[-1] is writer.last_error is not None and writer.pending()
+        if how == "flush":
+            writer.flush()
+        else:
+            while writer.pending() and time.perf_counter() < end:
+                time.sleep(0.01)
+        with open(path) as f:
+            written = json.load(f) == list_data
+        passed = reported and written and writer.last_error is None and errors[-1:] == [None]
+        ok = ok and passed
+        print(f"failed write, then {how}: reported {reported}, on disk {written} {'ok' if passed else 'FAILED'}")
+        os.remove(path)
+    return ok
+
+
+def check_file_mode(tmp):
+    """Replacing a file must not leave it readable by its owner alone."""
+    umask = os.umask(0o022)
+    os.umask(umask)
+    ok = True
+    for name, write in (("mode.json", write_json_atomic), ("mode.sqlite", write_entries)):
+        path = os.path.join(tmp, name)
+        write(path, make_list(10))
+        created = os.stat(path).st_mode & 0o777
+        os.chmod(path, 0o640)
+        write(path, make_list(20))
+        kept = os.stat(path).st_mode & 0o777
+        passed = created == 0o666 & ~umask and kept == 0o640
+        ok = ok and passed
+        print(f"file mode, {write.__name__}: new {created:o}, rewritten {kept:o} {'ok' if passed else 'FAILED'}")
+    return ok
+
+
+def main():
+    keystrokes, interval = 100, 0.02  # ~50 characters per second
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (1000, 10000, 50000):
+            path = os.path.join(tmp, f"bench_{count}.json")
+            list_data = make_list(count)
+
+            def synchronous():
+                with open(path, 'w') as f:
+                    json.dump(list_data, f, indent=4)
+
+            sync_spent = type_burst(list_data, synchronous, keystrokes, interval)
+
+            before = persistence.stats.snapshot()
+            writer = ListWriter(path, lambda: list_data)
+            behind_spent = type_burst(list_data, writer.schedule, keystrokes, interval)
+            writer.flush()
+            after = persistence.stats.snapshot()
+            with open(path) as f:
+                assert json.load(f) == list_data
+
+            writes = after["writes_performed"] - before["writes_performed"]
+            avoided = after["writes_avoided"] - before["writes_avoided"]
+            writing = after["seconds_writing"] - before["seconds_writing"]
+            print(f"{count:>6} entries, {keystrokes} edits: "
+                  f"sync GUI time {sync_spent * 1000:8.1f} ms | "
+                  f"write-behind GUI time {behind_spent * 1000:6.2f} ms, "
+                  f"{writes} writes, {avoided} avoided, {writing * 1000:7.1f} ms writing")
+
+        ok = check_failed_write(tmp)
+        ok = check_file_mode(tmp) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Row <-> key mapping: re-sorting list_data per lookup vs PriorityIndex.
+
+Pure Python, no Qt needed:
+    python benchmarks/bench_priority_index.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.priority_index import PriorityIndex
+
+
+def make_list(count):
+    random.seed(count)
+    return {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": random.randint(1, 10), "completed": False}
+        for i in range(count)
+    }
+
+
+def sorted_keys(list_data):
+    return sorted(list_data.keys(), key=lambda k: list_data[k]['priority'], reverse=True)
+
+
+def per_call(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number
+
+
+def main():
+    print(f"{'entries':>8} {'op':<16} {'re-sort':>12} {'index':>12} {'speedup':>10}")
+    for count in (1000, 10000, 100000):
+        list_data = make_list(count)
+        index = PriorityIndex(list_data)
+        keys = list(list_data)
+        rows = [random.randrange(count) for _ in range(1000)]
+        sample_keys = [random.choice(keys) for _ in range(1000)]
+        slow_number = max(1, 20000 // count)
+
+        results = {}
+        results['row -> key'] = (
+            per_call(lambda: sorted_keys(list_data)[rows[0]], slow_number),
+            per_call(lambda: [index.key_at(r) for r in rows], 20) / len(rows),
+        )
+        results['key -> row'] = (
+            per_call(lambda: sorted_keys(list_data).index(sample_keys[0]), slow_number),
+            per_call(lambda: [index.row_of(k) for k in sample_keys], 20) / len(sample_keys),
+        )
+
+        def change_priority_sorted():
+            key = random.choice(keys)
+            list_data[key]['priority'] = random.randint(1, 10)
+            sorted_keys(list_data)
+
+        def change_priority_index():
+            for key in sample_keys:
+                priority = random.randint(1, 10)
+                list_data[key]['priority'] = priority
+                index.move_target(key, priority)
+                index.move(key, priority)
+
+        results['priority change'] = (
+            per_call(change_priority_sorted, slow_number),
+            per_call(change_priority_index, 5) / len(sample_keys),
+        )
+
+        for op, (slow, fast) in results.items():
+            print(f"{count:>8} {op:<16} {slow * 1e6:>10.1f}us {fast * 1e6:>10.2f}us {slow / fast:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
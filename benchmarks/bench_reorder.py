@@ -0,0 +1,67 @@
+"""Cost of reorder_entries: idle ticks versus a few edited priorities.
+
+Counts the row moves and dataChanged/layout signals the view receives, to
+show that an unchanged list does no work and an edit touches only its rows.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_reorder.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets
+
+from main import ListTab
+from benchmarks.bench_model_view import write_list
+
+
+class SignalCounter:
+    def __init__(self, model):
+        self.counts = {"dataChanged": 0, "rowsMoved": 0, "layoutChanged": 0, "modelReset": 0}
+        for name in self.counts:
+            getattr(model, name).connect(lambda *args, name=name: self.bump(name))
+
+    def bump(self, name):
+        self.counts[name] += 1
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (10000, 100000):
+            path = os.path.join(tmp, f"bench_{count}.json")
+            write_list(path, count)
+            tab = ListTab(path)
+            model = tab.model
+            signals = SignalCounter(model)
+
+            # An idle list: nothing is pending, so the timer is not even armed.
+            start = time.perf_counter()
+            for _ in range(1000):
+                tab.reorder_entries()
+            idle = (time.perf_counter() - start) / 1000
+            print(f"{count:>7} entries: idle tick {idle * 1e6:7.2f} us  timer armed {tab.reorder_timer.isActive()}")
+
+            for edits in (1, 10, 100):
+                for i in range(edits):
+                    row = (i * 7919) % count
+                    priority = tab.list_data[model.key_for_row(row)]["priority"] % 10 + 1
+                    model.setData(model.index(row, 1), priority)
+                start = time.perf_counter()
+                moved = tab.reorder_entries()
+                elapsed = time.perf_counter() - start
+                print(f"         {edits:>4} edits: reorder {elapsed * 1000:7.2f} ms  rows moved {moved:>4}"
+                      f"  signals {signals.counts}")
+                for name in signals.counts:
+                    signals.counts[name] = 0
+            print(f"         passes {model.reorder_passes}  rows moved total {model.rows_moved_total}")
+            tab.teardown(discard=True)
+            app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Cross-list search: index build (cold and from cache), queries and edits.
+
+Builds lists with one million entries in total, indexes them once from the
+files and once from the cache file, then times typical queries. Also checks
+that entries whose text is not a string (a hand-edited file can hold a
+number or null) are indexed and found, not an error. Exits non-zero if not.
+
+Run with:
+    python benchmarks/bench_search.py
+"""
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.entry_store import EntryStore
+from src.search_index import CACHE_NAME, SearchIndex
+
+WORDS = ["buy", "call", "fix", "read", "write", "clean", "book", "pay", "send", "plan",
+         "groceries", "dentist", "invoice", "report", "garden", "car", "kitchen", "taxes",
+         "birthday", "meeting", "review", "backup", "passport", "library", "gym", "train"]
+
+
+def make_lists(directory, lists, per_list, seed=7):
+    rng = random.Random(seed)
+    # A long tail of rarer words on top of the common ones.
+    vocabulary = WORDS + [f"{rng.choice(WORDS)}{i}" for i in range(20000)]
+    paths = []
+    for n in range(lists):
+        data = {}
+        for i in range(per_list):
+            words = [rng.choice(WORDS)] + rng.sample(vocabulary, 3)
+            data[f"{1700000000000 + i}_{n}"] = {"text": " ".join(words), "priority": i % 10 + 1,
+                                                "completed": False}
+        path = os.path.join(directory, f"list_{n:02}.json")
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        paths.append(path)
+    return paths
+
+
+def build(directory, paths):
+    index = SearchIndex(os.path.join(directory, CACHE_NAME))
+    start = time.perf_counter()
+    index.refresh(paths)
+    index.wait()
+    return index, time.perf_counter() - start
+
+
+def time_query(index, query, repeat=50):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = index.search(query)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], len(hits)
+
+
+def check_non_string_texts(directory):
+    data = {"1": {"text": 12345, "priority": 1, "completed": False},
+            "2": {"text": None, "priority": 1, "completed": False},
+            "3": {"text": "plain words", "priority": 1, "completed": False}}
+    index = SearchIndex(os.path.join(directory, "odd-" + CACHE_NAME))
+    try:
+        index.track(os.path.join(directory, "odd_store.json"), EntryStore.from_dict(data))
+        index.index_list(os.path.join(directory, "odd_dict.json"), data)
+        index.update_entry(os.path.join(directory, "odd_dict.json"), "4", 67890)
+        index.update_entries(os.path.join(directory, "odd_store.json"), [("5", 2.5)])
+        found = [len(index.search(query)) for query in ("12345", "67890", "2.5", "plain")]
+    except Exception as e:
+        found = repr(e)
+    ok = found == [2, 1, 1, 2]
+    print(f"non-string texts indexed: hits {found} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    lists, per_list = 20, 50000
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = check_non_string_texts(tmp)
+        paths = make_lists(tmp, lists, per_list)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        index, cold = build(tmp, paths)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{len(index)} entries in {lists} lists")
+        cache_dir = os.path.join(tmp, CACHE_NAME)
+        cache_mb = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)) / 1e6
+        print(f"cold build {index.build_seconds:6.2f} s, {cold:6.2f} s with cache files written"
+              f"  (max rss +{rss_after - rss_before:.0f} MB, cache {cache_mb:.1f} MB)")
+        warm_index, warm = build(tmp, paths)
+        print(f"warm build {warm:6.2f} s  ({warm_index.lists_from_cache} of {lists} lists from the cache)")
+        del warm_index
+
+        for query in ("groceries", "gro", "g", "dentist invoice", "taxes1234", "nothinglikethis", "pay b"):
+            median, hits = time_query(index, query)
+            print(f"  query {query!r:>20}: {median * 1000:7.3f} ms  {hits} hits")
+
+        timings = []
+        for i in range(1000):
+            start = time.perf_counter()
+            index.update_entry(paths[i % lists], f"{1700000000000 + i}_{i % lists}", f"renamed entry {i}")
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"incremental edit median {timings[len(timings) // 2] * 1e6:.1f} us")
+        median, hits = time_query(index, "renamed 99")
+        print(f"  query {'renamed 99':>20}: {median * 1000:7.3f} ms  {hits} hits")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
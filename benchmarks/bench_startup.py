@@ -0,0 +1,93 @@
+"""MainWindow startup time and memory across data directories of 10/100/1000 lists.
+
+Also checks that the startup profile stops recording once startup is
+complete, so lists opened later do not grow it all session. Exits
+non-zero if it does not.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_startup.py
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtWidgets
+
+from main import ListTab, MainWindow
+from src.startup_profile import profile
+
+ENTRIES_PER_LIST = 200
+
+
+def make_data_dir(path, lists):
+    os.makedirs(path)
+    for n in range(lists):
+        data = {
+            str(1700000000 + i): {"text": f"List {n} entry {i}", "priority": i % 10 + 1, "completed": i % 5 == 0}
+            for i in range(ENTRIES_PER_LIST)
+        }
+        with open(os.path.join(path, f"list_{n:04d}.json"), 'w') as f:
+            json.dump(data, f, indent=4)
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def check_profile_bounded(app, data_dir):
+    window = MainWindow(data_dir)
+    window.show()
+    deadline = time.perf_counter() + 30
+    while not profile.complete and time.perf_counter() < deadline:
+        app.processEvents()
+    recorded = len(profile.phases)
+    tabs = [ListTab(d.path) for d in window.hidden_lists[:50]]
+    ok = profile.complete and len(profile.phases) == recorded
+    print(f"startup profile: {recorded} phases at startup, {len(profile.phases)} after opening"
+          f" {len(tabs)} more lists {'ok' if ok else 'FAILED'}")
+    for tab in tabs:
+        tab.teardown(discard=True)
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return ok
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for lists in (10, 100, 1000):
+            data_dir = os.path.join(tmp, f"data_{lists}")
+            make_data_dir(data_dir, lists)
+
+            start = time.perf_counter()
+            window = MainWindow(data_dir)
+            app.processEvents()
+            lazy = time.perf_counter() - start
+            built = len(window.visible_tabs) + len(window.tab_cache)
+            rss = max_rss_mb()
+
+            # What building every list up front (the old behaviour) would cost.
+            start = time.perf_counter()
+            eager_tabs = [ListTab(d.path) for d in window.hidden_lists]
+            eager = lazy + time.perf_counter() - start
+
+            print(f"{lists:>5} lists: startup {lazy * 1000:8.1f} ms with {built} tabs built "
+                  f"(eager would be {eager * 1000:9.1f} ms)  max rss {rss:7.1f} MB")
+            for tab in eager_tabs:
+                tab.teardown(discard=True)
+            window.close()
+            window.deleteLater()
+            app.processEvents()
+        ok = check_profile_bounded(app, os.path.join(tmp, "data_100"))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Load and save cost of the JSON and SQLite storage engines.
+
+For lists of 10k and 100k entries this prints, per engine: file size, a full
+load through parse_list, a full save, what a single edit costs to persist
+(a whole-file write for JSON, one committed row update for SQLite), a burst
+of 100 edits, and reading the top 50 rows by priority.
+
+Run with:
+    python benchmarks/bench_storage.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import sqlite_store
+from src.list_loader import parse_list
+from src.persistence import snapshot
+from src.storage import ENGINES
+from src.entry_store import EntryStore
+
+
+def make_data(count):
+    return {
+        str(1700000000 + i): {"text": f"Entry {i}", "priority": i % 10 + 1, "completed": i % 7 == 0}
+        for i in range(count)
+    }
+
+
+def best_of(repeat, action):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def persist_edits(engine, path, store, edits):
+    """Apply edits to store and persist them the way ListTab would."""
+    log = engine.edit_log(path, lambda: store)
+    keys = list(store)
+    start = time.perf_counter()
+    for i in range(edits):
+        key = keys[(i * 7919) % len(keys)]
+        store[key]['priority'] = store[key]['priority'] % 10 + 1
+        if log is not None:
+            log.set_field(key, 'priority', store[key]['priority'])
+    if log is None:
+        engine.write(path, snapshot(store))
+    else:
+        log.close()
+    return time.perf_counter() - start
+
+
+def top_by_priority(engine, path, limit=50):
+    if engine.name == "sqlite":
+        return sqlite_store.top_entries(path, limit)
+    data = parse_list(path).data
+    return sorted(data.items(), key=lambda item: -item[1]['priority'])[:limit]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (10000, 100000):
+            data = make_data(count)
+            print(f"{count} entries")
+            for engine in ENGINES.values():
+                path = os.path.join(tmp, f"bench_{count}{engine.suffix}")
+                save = best_of(3, lambda: engine.write(path, data))
+                size_mb = os.path.getsize(path) / 1e6
+                load = best_of(3, lambda: parse_list(path))
+                assert parse_list(path).data == data
+                store = EntryStore.from_dict(data)
+                one = min(persist_edits(engine, path, store, 1) for _ in range(3))
+                burst = persist_edits(engine, path, store, 100)
+                top = best_of(3, lambda: top_by_priority(engine, path))
+                print(f"  {engine.name:>6}: {size_mb:6.2f} MB  load {load * 1000:7.1f} ms  save {save * 1000:7.1f} ms"
+                      f"  1 edit {one * 1000:7.2f} ms  100 edits {burst * 1000:7.2f} ms  top 50 {top * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
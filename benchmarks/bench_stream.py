@@ -0,0 +1,113 @@
+"""Streaming load of very large lists: peak memory and time to first rows.
+
+First compares, under tracemalloc, the peak Python memory of parsing a list
+whole (json, then EntryStore.from_dict) with streaming it from a memory map
+(stream_loader.load_store). The streamed load must stay within a fixed bound
+of the EntryStore it produces, whatever the file size; the script exits
+non-zero if it does not. Then opens a ListTab on the largest file and times
+the first rows and the complete list.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_stream.py
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import settings
+from src.entry_store import EntryStore
+from src.list_loader import json_loads
+from src.stream_loader import load_store
+from benchmarks.bench_model_view import write_list
+
+# Loader overhead allowed above the finished EntryStore: a few decoded chunks
+# (up to 4 bytes per character) plus a batch of entry dicts in flight.
+PEAK_BOUND = 8 * settings.STREAM_CHUNK_BYTES + settings.STREAM_BATCH_ENTRIES * 1024
+
+
+def timed(load):
+    start = time.perf_counter()
+    result = load()
+    return result, time.perf_counter() - start
+
+
+def traced(load):
+    """(result, peak bytes, retained bytes) of calling load under tracemalloc.
+
+    Tracing slows Python-level parsing many times over, so times are taken
+    from separate untraced runs.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, retained
+
+
+def parse_whole(path):
+    with open(path, 'rb') as f:
+        return EntryStore.from_dict(json_loads()(f.read()))
+
+
+def measure_memory(paths):
+    failures = 0
+    for path in paths:
+        size_mb = os.path.getsize(path) / 1e6
+        _, whole_s = timed(lambda: parse_whole(path))
+        _, stream_s = timed(lambda: load_store(path))
+        whole, whole_peak, _ = traced(lambda: parse_whole(path))
+        del whole
+        store, stream_peak, retained = traced(lambda: load_store(path))
+        overhead = stream_peak - retained
+        ok = overhead <= PEAK_BOUND
+        failures += not ok
+        print(f"{len(store):>8} entries ({size_mb:5.1f} MB): whole {whole_s:5.2f} s peak {whole_peak / 1e6:6.1f} MB"
+              f" | streamed {stream_s:5.2f} s peak {stream_peak / 1e6:6.1f} MB, store {retained / 1e6:5.1f} MB,"
+              f" overhead {overhead / 1e6:4.1f} MB (bound {PEAK_BOUND / 1e6:.1f}) {'ok' if ok else 'FAILED'}")
+        del store
+    return failures
+
+
+def measure_tab(path):
+    from PyQt5 import QtWidgets
+    from main import ListTab
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    settings.STREAM_LOAD_MIN_BYTES = 0
+    start = time.perf_counter()
+    tab = ListTab(path)
+    tab.resize(800, 600)
+    tab.show()
+    constructed = time.perf_counter() - start
+    while tab.model.rowCount() == 0:
+        app.processEvents()
+    first = time.perf_counter() - start
+    first_rows = tab.model.rowCount()
+    while tab.loading:
+        app.processEvents()
+    done = time.perf_counter() - start
+    print(f"ListTab: constructed {constructed * 1000:6.1f} ms, first {first_rows} rows"
+          f" {first * 1000:6.1f} ms, all {len(tab.list_data)} entries {done:5.2f} s")
+    tab.teardown(discard=True)
+    app.processEvents()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for count in (100000, 400000):
+            path = os.path.join(tmp, f"stream_{count}.json")
+            write_list(path, count)
+            paths.append(path)
+        failures = measure_memory(paths)
+        measure_tab(paths[-1])
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""Sync daemon under load: many writers at once, and what everyone ends up seeing.
+
+  daemon     WRITERS processes, each with its own SyncClient, make EDITS
+             random edits (adds, priority and completed changes, deletes)
+             across LISTS lists while SUBSCRIBERS follow every list through
+             deltas. Reports throughput and per-edit round trip, then checks
+             that no writer's edit was lost, that every subscriber's replica
+             equals the daemon's snapshot and that the files on disk do too.
+  direct     the same writers without the daemon, each opening, editing and
+             saving the file itself the way a script would (DIRECT_EDITS
+             adds each); reported for comparison, entries lost included.
+  gui        two MainWindows started with sync on: an edit in one, and one
+             made by a script, must show up in both without either window
+             re-reading a file, and must be on disk once the daemon flushes.
+             The echo of a window's own edit must not undo a later one, a
+             row must move only with the reorder timer, a list emptied
+             meanwhile gets one example entry through the daemon, and a
+             list whose file goes away closes in both windows.
+
+Exits non-zero if a check fails.
+
+Run with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_sync.py
+"""
+import multiprocessing
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from src.list_document import ListDocument
+from src.storage import engine_for
+from src.sync_client import ListReplica, SyncClient, daemon_running, socket_path
+from benchmarks.synthetic import DataProfile, generate_data_dir
+
+LISTS = 4
+ENTRIES = 2000
+WRITERS = 16
+EDITS = 300
+SUBSCRIBERS = 2
+DIRECT_EDITS = 20
+
+
+def start_daemon(data_dir):
+    daemon = subprocess.Popen([sys.executable, "-m", "src.sync_server", "--data", data_dir], cwd=ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    end = time.perf_counter() + 10
+    while not daemon_running(socket_path(data_dir)):
+        if daemon.poll() is not None or time.perf_counter() > end:
+            raise RuntimeError(f"sync daemon did not start: {daemon.stderr.read()}")
+        time.sleep(0.02)
+    return daemon
+
+
+def stop_daemon(daemon):
+    daemon.send_signal(signal.SIGINT)
+    daemon.wait(30)
+
+
+def writer(path, seed, names, edits, results):
+    """Random edits to the lists; reports what each of its entries should be."""
+    rng = random.Random(seed)
+    mine = {}  # (list, key) -> entry, or None once deleted
+    latencies = []
+    with SyncClient(path) as client:
+        began = time.perf_counter()
+        for i in range(edits):
+            name = rng.choice(names)
+            live = [key for (n, key), entry in mine.items() if n == name and entry is not None]
+            roll = rng.random()
+            start = time.perf_counter()
+            if roll < 0.4 or not live:
+                entry = {"text": f"writer {seed} edit {i}", "priority": rng.randint(1, 10), "completed": False}
+                key = client.add(name, entry["text"], entry["priority"])
+                mine[(name, key)] = entry
+            elif roll < 0.75:
+                key = rng.choice(live)
+                priority = rng.randint(1, 10)
+                client.set_field(name, [key], "priority", priority)
+                mine[(name, key)]["priority"] = priority
+            elif roll < 0.9:
+                key = rng.choice(live)
+                completed = not mine[(name, key)]["completed"]
+                client.set_field(name, [key], "completed", completed)
+                mine[(name, key)]["completed"] = completed
+            else:
+                key = rng.choice(live)
+                client.delete(name, [key])
+                mine[(name, key)] = None
+            latencies.append(time.perf_counter() - start)
+    results.put((mine, latencies, began, time.perf_counter()))
+
+
+def direct_writer(path, seed, edits, results):
+    keys = []
+    for i in range(edits):
+        document = ListDocument(path)
+        keys.append(document.add_entry(f"direct {seed} edit {i}"))
+        document.save()
+        document.close()
+    results.put(keys)
+
+
+class Subscriber(threading.Thread):
+    """Follows every list through deltas until stopped."""
+
+    def __init__(self, path, names):
+        super().__init__()
+        self.path = path
+        self.names = names
+        self.replicas = {}
+        self.deltas = 0
+        self.ready = threading.Event()
+        self.stop = threading.Event()
+
+    def run(self):
+        with SyncClient(self.path) as client:
+            client.subscribe(self.names)
+            for name in self.names:
+                self.replicas[name] = ListReplica(name, client.snapshot(name))
+            self.ready.set()
+            while not self.stop.is_set() or client.events:
+                event = client.next_event(0.2)
+                if event is not None and event["event"] == "delta":
+                    self.replicas[event["list"]].apply(event)
+                    self.deltas += 1
+
+
+def run_processes(target, args_list):
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=target, args=args + (results,)) for args in args_list]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return collected, time.perf_counter() - start
+
+
+def bench_daemon(data_dir, names):
+    failures = 0
+    path = socket_path(data_dir)
+    daemon = start_daemon(data_dir)
+    try:
+        subscribers = [Subscriber(path, names) for _ in range(SUBSCRIBERS)]
+        for thread in subscribers:
+            thread.start()
+            thread.ready.wait(30)
+
+        collected, _ = run_processes(writer, [(path, seed, names, EDITS) for seed in range(WRITERS)])
+        # From the first writer's first edit to the last one's last, process start-up aside.
+        elapsed = max(end for _, _, _, end in collected) - min(began for _, _, began, _ in collected)
+        edits = WRITERS * EDITS
+        latencies = sorted(latency for _, batch, _, _ in collected for latency in batch)
+        print(f"daemon: {WRITERS} writers x {EDITS} edits in {elapsed:5.2f} s = {edits / elapsed:7.0f} edits/s;"
+              f" round trip p50 {statistics.median(latencies) * 1000:5.2f} ms"
+              f" p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms")
+
+        with SyncClient(path) as client:
+            client.flush()
+            snapshots = {name: client.snapshot(name)["entries"] for name in names}
+        # Subscribers may still be reading the last deltas.
+        time.sleep(0.5)
+        for thread in subscribers:
+            thread.stop.set()
+            thread.join()
+
+        lost = 0
+        for mine, _, _, _ in collected:
+            for (name, key), entry in mine.items():
+                if snapshots[name].get(key) != entry:
+                    lost += 1
+        ok = lost == 0
+        failures += not ok
+        print(f"  every writer's edits in the daemon: {lost} wrong or missing {'ok' if ok else 'FAILED'}")
+
+        for i, thread in enumerate(subscribers):
+            stale = [name for name in names if thread.replicas[name].entries != snapshots[name]]
+            ok = not stale
+            failures += not ok
+            print(f"  subscriber {i}: {thread.deltas} deltas for {edits} edits,"
+                  f" replicas {'match' if ok else 'DIFFER: ' + ', '.join(stale)} {'ok' if ok else 'FAILED'}")
+    finally:
+        stop_daemon(daemon)
+
+    differ = [name for name in names
+              if engine_for(os.path.join(data_dir, name + ".json")).read(os.path.join(data_dir, name + ".json"))
+              != snapshots[name]]
+    ok = not differ
+    failures += not ok
+    print(f"  files on disk after shutdown: {'match' if ok else 'DIFFER: ' + ', '.join(differ)} {'ok' if ok else 'FAILED'}")
+    return failures
+
+
+def bench_direct(data_dir, name):
+    path = os.path.join(data_dir, name + ".json")
+    collected, elapsed = run_processes(direct_writer, [(path, seed, DIRECT_EDITS) for seed in range(WRITERS)])
+    on_disk = engine_for(path).read(path)
+    keys = [key for batch in collected for key in batch]
+    lost = sum(1 for key in keys if key not in on_disk)
+    print(f"direct: {WRITERS} writers x {DIRECT_EDITS} adds in {elapsed:5.2f} s = {len(keys) / elapsed:7.0f} edits/s;"
+          f" {lost} of {len(keys)} entries lost")
+
+
+def pump_until(app, done, timeout=10):
+    end = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > end:
+            return False
+        app.processEvents()
+        time.sleep(0.005)
+    return True
+
+
+def bench_gui(data_dir, names):
+    from PyQt5 import QtWidgets
+    from main import MainWindow
+    failures = 0
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    daemon = start_daemon(data_dir)
+    try:
+        emptied, dropped = names[1], names[2]
+        with SyncClient(socket_path(data_dir)) as client:
+            client.delete(emptied, list(client.snapshot(emptied)["entries"]))
+        windows = [MainWindow(data_dir, sync=True) for _ in range(2)]
+        ok = pump_until(app, lambda: all(not w.pending_lists and w.visible_tabs for w in windows))
+        tabs = [w.visible_tabs[0][1] for w in windows]
+        ok = ok and all(tab.synced for tab in tabs)
+        failures += not ok
+        print(f"gui: two windows loaded {len(windows[0].visible_tabs)} lists from the daemon"
+              f" {'ok' if ok else 'FAILED'}")
+
+        # Both windows found the list empty and put the example entry back.
+        pump_until(app, lambda: False, timeout=0.5)  # sends what the windows queued
+        with SyncClient(socket_path(data_dir)) as client:
+            seeded = client.snapshot(emptied)["entries"]
+        shown = [len(tab.list_data) for window in windows for tab in window.synced_tabs(emptied)]
+        ok = list(seeded) == ["example_entry"] and shown == [1, 1]
+        failures += not ok
+        print(f"  emptied list: {len(seeded)} entries at the daemon, {shown} shown {'ok' if ok else 'FAILED'}")
+
+        name = os.path.splitext(os.path.basename(windows[0].visible_tabs[0][0]))[0]
+        key = tabs[0].model.key_for_row(0)
+        start = time.perf_counter()
+        tabs[0].set_priority([key], 1 if tabs[0].list_data[key]["priority"] != 1 else 2)
+        want = tabs[0].list_data[key]["priority"]
+        ok = pump_until(app, lambda: tabs[1].list_data[key]["priority"] == want)
+        failures += not ok
+        print(f"  edit in window 0 seen by window 1 after {(time.perf_counter() - start) * 1000:6.1f} ms"
+              f" {'ok' if ok else 'FAILED'}")
+        pump_until(app, lambda: not tabs[1].model.pending_moves)
+
+        # Window 0 edits an entry twice; the daemon's delta for the first
+        # edit reaches it only after the second is made.
+        edited = tabs[0].model.key_for_row(tabs[0].model.rowCount() - 1)
+        row = tabs[1].model.row_for_key(edited)
+        tabs[0].set_priority([edited], 10)
+        windows[0].sync.socket.flush()
+        time.sleep(0.2)
+        tabs[0].set_priority([edited], 9)
+        seen = set()
+        ok = pump_until(app, lambda: seen.add(tabs[0].list_data[edited]["priority"])
+                        or tabs[1].list_data[edited]["priority"] == 9)
+        # The row moves with window 1's reorder timer, as an edit made there would.
+        waited = tabs[1].model.row_for_key(edited) == row and edited in tabs[1].model.pending_moves
+        ok = ok and seen == {9} and waited
+        pump_until(app, lambda: not tabs[1].model.pending_moves)
+        ok = ok and tabs[1].model.row_for_key(edited) != row
+        failures += not ok
+        print(f"  two quick edits: window 0 showed priorities {sorted(seen)}, window 1 moved the row"
+              f" {'after its reorder delay' if waited else 'AT ONCE'} {'ok' if ok else 'FAILED'}")
+
+        with SyncClient(socket_path(data_dir)) as client:
+            start = time.perf_counter()
+            added = client.add(name, "added by a script", 9)
+            ok = pump_until(app, lambda: all(added in tab.list_data for tab in tabs))
+            failures += not ok
+            print(f"  script edit seen by both windows after {(time.perf_counter() - start) * 1000:6.1f} ms"
+                  f" {'ok' if ok else 'FAILED'}")
+
+            os.remove(os.path.join(data_dir, dropped + ".json"))
+            ok = pump_until(app, lambda: not any(window.synced_tabs(dropped) for window in windows))
+            failures += not ok
+            print(f"  list file removed: {'closed' if ok else 'STILL SHOWN'} in both windows {'ok' if ok else 'FAILED'}")
+            for window in windows:
+                window.close()
+            app.processEvents()
+            client.flush()
+        ok = all(tab.reloads == 0 for tab in tabs)
+        failures += not ok
+        print(f"  files re-read by the windows: {sum(tab.reloads for tab in tabs)} {'ok' if ok else 'FAILED'}")
+    finally:
+        stop_daemon(daemon)
+    path = os.path.join(data_dir, name + ".json")
+    on_disk = engine_for(path).read(path)
+    ok = on_disk.get(key, {}).get("priority") == want and added in on_disk
+    failures += not ok
+    print(f"  both edits on disk: {'ok' if ok else 'FAILED'}")
+    return failures
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as data_dir:
+        generate_data_dir(data_dir, DataProfile(lists=LISTS, entries=ENTRIES))
+        names = sorted(os.path.splitext(f)[0] for f in os.listdir(data_dir) if f.endswith(".json"))
+        failures += bench_daemon(data_dir, names)
+        bench_direct(data_dir, names[0])
+        failures += bench_gui(data_dir, names)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
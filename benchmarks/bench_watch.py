@@ -0,0 +1,178 @@
+"""External edits to open lists: no lost updates, bounded reload work.
+
+For a JSON list, a journaled JSON list and a SQLite list open in a ListTab:
+
+  storm   another process writes the file WRITES times as fast as it can
+          (read, add an entry, set a shared entry's priority, write; half of
+          the JSON writes rewrite the file in place rather than replacing
+          it). Every one of its entries must end up in the tab, and the tab
+          must reload at most once per watcher delay, not once per write.
+  mixed   ROUNDS times, the tab edits an entry and, before that edit is
+          written, another program writes the file. Both sides' changes
+          must end up on disk: the tab merges instead of overwriting.
+  replace as mixed, but the other program saves a whole new file and swaps
+          it in with os.replace, as this app's own saves do, so the tab's
+          open file (a SQLite connection, say) is no longer the list's.
+
+Prints reloads, watcher events and the CPU time the GUI process spent per
+second of the storm; exits non-zero if a check fails.
+
+Run headless with:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_watch.py
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5 import QtWidgets
+
+from src import settings
+from src.journal import replay
+from src.storage import engine_for
+from benchmarks.bench_storage import make_data
+
+ENTRIES = 2000
+WRITES = 400
+ROUNDS = 30
+
+# The other process: read-modify-write of the list, WRITES times.
+WRITER = r"""
+import json, os, sqlite3, sys
+sys.path.insert(0, sys.argv[1])
+from src import sqlite_store
+from src.persistence import write_json_atomic
+from src.storage import engine_for
+path, writes = sys.argv[2], int(sys.argv[3])
+conn = sqlite3.connect(path, timeout=10) if path.endswith(".sqlite") else None
+for i in range(writes):
+    entry = {"text": f"external {i}", "priority": i % 10 + 1, "completed": False}
+    if conn is not None:
+        with conn:
+            conn.execute(sqlite_store._UPSERT, sqlite_store._row(f"ext_{i}", entry))
+            conn.execute("UPDATE entries SET priority = ? WHERE key = 'shared'", (i % 10 + 1,))
+        continue
+    data = engine_for(path).read(path)
+    data[f"ext_{i}"] = entry
+    data["shared"]["priority"] = i % 10 + 1
+    if i % 2:
+        write_json_atomic(path, data)
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f)
+"""
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def on_disk(path):
+    data = engine_for(path).read(path)
+    replay(data, path)
+    return data
+
+
+def pump(app, seconds=None, until=None):
+    start = time.perf_counter()
+    while True:
+        app.processEvents()
+        if until is not None and until():
+            return True
+        if seconds is not None and time.perf_counter() - start >= seconds:
+            return until is None
+        time.sleep(0.002)
+
+
+def external_write(path, key, entry, replace=False):
+    """One read-modify-write by "another program", done in this process.
+    A SQLite list is updated in place unless replace is set; a JSON list is
+    always saved to a new file and swapped in."""
+    engine = engine_for(path)
+    if engine.name == "sqlite" and not replace:
+        import sqlite3
+        from src import sqlite_store
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute(sqlite_store._UPSERT, sqlite_store._row(key, entry))
+        conn.close()
+        return
+    data = engine.read(path)
+    data[key] = entry
+    engine.write(path, data)
+
+
+def run(app, tmp, suffix, journal_mode):
+    from main import ListTab
+    settings.JOURNAL_MODE = journal_mode
+    label = f"{suffix[1:]}{' + journal' if journal_mode else ''}"
+    path = os.path.join(tmp, f"watch_{label.replace(' + ', '_')}{suffix}")
+    data = make_data(ENTRIES)
+    data["shared"] = {"text": "shared", "priority": 1, "completed": False}
+    engine_for(path).write(path, data)
+    tab = ListTab(path)
+    failures = 0
+
+    # Storm: another process writes as fast as it can.
+    cpu, start = cpu_seconds(), time.perf_counter()
+    writer = subprocess.Popen([sys.executable, "-c", WRITER, ROOT, path, str(WRITES)])
+    pump(app, until=lambda: writer.poll() is not None)
+    storm = time.perf_counter() - start
+    pump(app, seconds=3 * settings.WATCH_DELAY_MS / 1000)
+    cpu = cpu_seconds() - cpu
+    elapsed = time.perf_counter() - start
+    missing = [i for i in range(WRITES) if f"ext_{i}" not in tab.list_data]
+    shared = tab.list_data["shared"]["priority"]
+    bound = elapsed / (settings.WATCH_DELAY_MS / 1000) + 2
+    ok = writer.returncode == 0 and not missing and shared == (WRITES - 1) % 10 + 1 and tab.reloads <= bound
+    failures += not ok
+    print(f"{label}\n  storm  {WRITES} writes in {storm:5.2f} s: {tab.reloads} reloads (bound {bound:.0f}),"
+          f" {tab.watcher.events} watcher events, {len(missing)} entries missing,"
+          f" CPU {cpu / elapsed * 100:4.1f}% of a core {'ok' if ok else 'FAILED'}")
+
+    # Mixed: an edit of ours is pending when the other program writes.
+    keys = [key for key in data if key != "shared"]
+    failures += edit_against(app, tab, path, keys[:ROUNDS], "mixed")
+    failures += edit_against(app, tab, path, keys[ROUNDS:2 * ROUNDS], "replace", replace=True)
+    tab.teardown()
+    app.processEvents()
+    return failures
+
+
+def edit_against(app, tab, path, keys, name, replace=False):
+    reloads, conflicts = tab.reloads, tab.guard.conflicts
+    for i, key in enumerate(keys):
+        tab.set_priority([key], 10 if tab.list_data[key]["priority"] != 10 else 9)
+        external_write(path, f"{name}_{i}", {"text": f"{name} {i}", "priority": 5, "completed": False}, replace)
+        # Until both sides have settled: ours written, theirs merged in.
+        pump(app, seconds=10, until=lambda k=f"{name}_{i}": k in tab.list_data and not tab.writer.pending()
+             and not tab.unsaved_keys() and tab.guard.unchanged())
+    tab.flush()
+    disk = on_disk(path)
+    lost_ours = [key for key in keys if disk[key]["priority"] != tab.list_data[key]["priority"]]
+    lost_theirs = [i for i in range(len(keys)) if f"{name}_{i}" not in disk]
+    ok = not lost_ours and not lost_theirs and disk == tab.list_data.to_dict()
+    print(f"  {name:<7} {len(keys)} rounds: {tab.reloads - reloads} reloads, {tab.guard.conflicts - conflicts}"
+          f" writes held back, lost {len(lost_ours)} of ours and {len(lost_theirs)} of theirs"
+          f" {'ok' if ok else 'FAILED'}")
+    return not ok
+
+
+def main():
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    settings.WRITE_DELAY_MS = 100
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix, journal_mode in ((".json", False), (".json", True), (".sqlite", False)):
+            failures += run(app, tmp, suffix, journal_mode)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""The benchmark suite: the GUI's everyday costs on a synthetic data folder,
+as machine-readable results that can be checked against a baseline.
+
+A data folder is generated from a DataProfile (see synthetic.py; --preset
+picks one, and the profile options override it), then each of --processes
+fresh processes runs every scenario --repeat times, and all the samples
+are kept:
+
+  startup          MainWindow construction, and until every visible list is
+                   built; warm, after a first unrecorded window
+  tab_open         bringing a hidden, unbuilt list into view, painted
+  render           render_entries, then (paint) a synchronous repaint of the view
+  edit             one priority edit through ListTab.set_priority
+  edit_to_persist  from that edit until it is on disk (WRITE_DELAY_MS included)
+  reorder          reorder_entries after REORDER_EDITS in-cell priority edits
+  clear_completed  clear_completed_entries on a fresh copy of a list
+  idle_cpu         process CPU (all threads) while the window sits idle with
+                   its tabs and tab cache built, as a percent of one core
+
+Results are printed and, with -o, written as JSON. With --baseline (a file
+written by -o earlier) each metric's median is compared with the baseline's:
+one more than --tolerance slower, and slower by more than the unit's noise
+floor, is a regression and the run exits 1. A baseline recorded with a
+different data profile is not compared (exit 2).
+
+Runs headless (QT_QPA_PLATFORM defaults to offscreen):
+    python benchmarks/suite.py -o results.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --preset large --only startup,tab_open --repeat 3
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5 import QtCore, QtWidgets
+
+from main import ListTab, MainWindow
+from src import settings
+from benchmarks.synthetic import DataProfile, add_profile_arguments, generate_data_dir, profile_from_args
+
+FORMAT = 1
+PRESETS = {
+    "small": DataProfile(lists=8, entries=500),
+    "default": DataProfile(lists=20, entries=5000),
+    "large": DataProfile(lists=50, entries=50000),
+}
+SCENARIOS = ["startup", "tab_open", "render", "edit", "reorder", "clear_completed", "idle_cpu"]
+REORDER_EDITS = 50
+# Differences smaller than this are noise whatever the tolerance says.
+NOISE_FLOOR = {"ms": 1.0, "%": 1.0}
+# Settings that change what the scenarios measure, recorded with the results.
+RECORDED_SETTINGS = ["WRITE_DELAY_MS", "WRITE_MAX_DELAY_MS", "FSYNC_WRITES", "JOURNAL_MODE", "TAB_CACHE_SIZE",
+                     "LOADER_WORKERS", "JSON_BACKEND", "STREAM_LOAD_MIN_BYTES", "WATCH_DELAY_MS"]
+
+
+def pump_until(app, done, timeout=30):
+    """Run the event loop until done() is true; False if it timed out."""
+    end = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > end:
+            return False
+        app.processEvents(QtCore.QEventLoop.AllEvents, 5)
+        time.sleep(0.0005)
+    return True
+
+
+def idle(app, seconds):
+    # A real event loop, so timers fire as they would in the app.
+    loop = QtCore.QEventLoop()
+    QtCore.QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+
+
+class Suite:
+    """Runs the scenarios on one data folder and collects their samples."""
+
+    def __init__(self, app, data_dir, repeat, idle_seconds):
+        self.app = app
+        self.data_dir = data_dir
+        self.repeat = repeat
+        self.idle_seconds = idle_seconds
+        self.metrics = {}  # name -> {"unit": ..., "samples": [...], plus context}
+
+    def add(self, name, value, unit="ms", **context):
+        metric = self.metrics.setdefault(name, {"unit": unit, "samples": []})
+        metric["samples"].append(value)
+        metric.update(context)
+
+    def open_window(self):
+        gc.collect()
+        start = time.perf_counter()
+        window = MainWindow(self.data_dir)
+        constructed = time.perf_counter() - start
+        window.show()
+        if not pump_until(self.app, lambda: not window.pending_lists):
+            raise RuntimeError("lists did not finish loading")
+        loaded = time.perf_counter() - start
+        # Indexing runs on in the background; let it finish before measuring more.
+        window.search_index.wait()
+        self.app.processEvents()
+        return window, constructed, loaded
+
+    def close_window(self, window):
+        window.close()
+        window.deleteLater()
+        self.app.processEvents()
+
+    def current_tab(self, window):
+        # The first tab in file order, shown; which tab Qt made current
+        # depends on which file finished parsing first.
+        tab = window.visible_tabs[0][1]
+        if window.tab_widget.currentWidget() is not tab:
+            window.tab_widget.setCurrentWidget(tab)
+            self.app.processEvents()
+        return tab
+
+    def warm_up(self):
+        # A first, unrecorded window writes the search cache and pulls the
+        # files into the OS cache, so every sample starts from a warm start.
+        window, _, _ = self.open_window()
+        self.close_window(window)
+
+    # -- scenarios --
+    def startup(self):
+        for _ in range(self.repeat):
+            window, constructed, loaded = self.open_window()
+            self.add("startup_ms", constructed * 1000, tabs=len(window.visible_tabs))
+            self.add("startup_loaded_ms", loaded * 1000)
+            self.close_window(window)
+
+    def tab_open(self):
+        window, _, _ = self.open_window()
+        # Each sample opens a list no earlier one built, so none comes from the cache.
+        hidden = [d.path for d in window.hidden_lists if d.path not in window.tab_cache]
+        if not hidden:
+            print("  tab_open: no hidden lists; use more lists than MainWindow.MAX_VISIBLE_TABS")
+        for path in hidden[:self.repeat]:
+            start = time.perf_counter()
+            window.bring_hidden_to_visible(path)
+            tab = self.current_tab(window)
+            tab.table.viewport().repaint()
+            self.app.processEvents()
+            self.add("tab_open_ms", (time.perf_counter() - start) * 1000)
+        self.close_window(window)
+
+    def render(self):
+        window, _, _ = self.open_window()
+        tab = self.current_tab(window)
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            tab.render_entries()
+            rendered = time.perf_counter()
+            tab.table.viewport().repaint()
+            self.add("render_ms", (rendered - start) * 1000, rows=tab.model.rowCount())
+            self.add("paint_ms", (time.perf_counter() - rendered) * 1000)
+        self.close_window(window)
+
+    def edit(self):
+        window, _, _ = self.open_window()
+        tab = self.current_tab(window)
+        for i in range(self.repeat):
+            key = tab.model.key_for_row(i)
+            priority = tab.list_data[key]["priority"] % 10 + 1
+            start = time.perf_counter()
+            tab.set_priority([key], priority)
+            edited = time.perf_counter()
+            if not pump_until(self.app, lambda: not tab.unsaved_keys() and not tab.writer.pending()):
+                raise RuntimeError("edit was not written")
+            self.add("edit_ms", (edited - start) * 1000)
+            self.add("edit_to_persist_ms", (time.perf_counter() - start) * 1000)
+        self.close_window(window)
+
+    def reorder(self):
+        window, _, _ = self.open_window()
+        tab = self.current_tab(window)
+        model = tab.model
+        for _ in range(self.repeat):
+            # In-cell edits leave their rows where they are until the reorder.
+            rows = range(0, model.rowCount(), max(1, model.rowCount() // REORDER_EDITS))
+            for row in list(rows)[:REORDER_EDITS]:
+                priority = model.data(model.index(row, 1), QtCore.Qt.EditRole)
+                model.setData(model.index(row, 1), (int(priority) + 4) % 10 + 1)
+            tab.reorder_timer.stop()
+            start = time.perf_counter()
+            moved = tab.reorder_entries()
+            self.add("reorder_ms", (time.perf_counter() - start) * 1000, rows_moved=moved)
+        self.close_window(window)
+
+    def clear_completed(self):
+        source = os.path.join(self.data_dir, sorted(f for f in os.listdir(self.data_dir) if f.endswith(".json"))[0])
+        with tempfile.TemporaryDirectory() as scratch:
+            for i in range(self.repeat):
+                path = os.path.join(scratch, f"copy_{i}.json")
+                shutil.copyfile(source, path)
+                tab = ListTab(path)
+                completed = sum(1 for entry in tab.list_data.values() if entry["completed"])
+                start = time.perf_counter()
+                tab.clear_completed_entries()
+                self.app.processEvents()
+                self.add("clear_completed_ms", (time.perf_counter() - start) * 1000, entries_removed=completed)
+                tab.teardown(discard=True)
+                self.app.processEvents()
+
+    def idle_cpu(self):
+        window, _, _ = self.open_window()
+        # Fill the tab cache as well, so every built tab's timers and watchers count.
+        for descriptor in list(window.hidden_lists[:settings.TAB_CACHE_SIZE]):
+            window.hidden_tab(descriptor.path)
+        idle(self.app, 0.5)  # let startup work (cache saves, watcher settling) finish
+        tabs = len(window.visible_tabs) + len(window.tab_cache)
+        for _ in range(self.repeat):
+            wall, cpu = time.perf_counter(), time.process_time()
+            idle(self.app, self.idle_seconds)
+            used = (time.process_time() - cpu) / (time.perf_counter() - wall)
+            self.add("idle_cpu_percent", used * 100, unit="%", tabs=tabs)
+        self.close_window(window)
+
+
+def summarize(metrics):
+    for metric in metrics.values():
+        samples = metric["samples"]
+        metric["median"] = statistics.median(samples)
+        metric["min"] = min(samples)
+        metric["max"] = max(samples)
+    return metrics
+
+
+def environment():
+    from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+    return {
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "qpa": os.environ.get("QT_QPA_PLATFORM"),
+    }
+
+
+def run_worker(data_dir, output, repeat, idle_seconds, scenarios):
+    """One process's samples of the scenarios on an existing data folder."""
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    suite = Suite(app, data_dir, repeat, idle_seconds)
+    suite.warm_up()
+    for name in scenarios:
+        gc.collect()
+        getattr(suite, name)()
+    with open(output, 'w') as f:
+        json.dump(suite.metrics, f)
+
+
+def run(profile, repeat, idle_seconds, scenarios, processes):
+    """Generate the data folder, then run the scenarios in processes fresh
+    worker processes in turn and pool their samples. Timings differ more
+    from one process to the next than within one, so a single process is
+    a poor sample of what the code costs."""
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        start = time.perf_counter()
+        generate_data_dir(data_dir, profile)
+        print(f"generated {profile.lists} lists of {profile.entries} entries in {time.perf_counter() - start:.1f} s")
+        output = os.path.join(tmp, "samples.json")
+        for n in range(processes):
+            start = time.perf_counter()
+            worker = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", data_dir,
+                                     "--worker-output", output, "--repeat", str(repeat),
+                                     "--idle-seconds", str(idle_seconds), "--only", ",".join(scenarios)],
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            if worker.returncode:
+                raise RuntimeError(f"benchmark worker failed:\n{worker.stdout}{worker.stderr}")
+            with open(output) as f:
+                for name, metric in json.load(f).items():
+                    pooled = metrics.setdefault(name, {"unit": metric["unit"], "samples": []})
+                    pooled["samples"].extend(metric.pop("samples"))
+                    pooled.update(metric)
+            print(f"  process {n + 1}/{processes} {time.perf_counter() - start:6.1f} s")
+    return {
+        "format": FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "profile": profile.to_dict(),
+        "repeat": repeat,
+        "processes": processes,
+        "environment": environment(),
+        "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS},
+        "metrics": summarize(metrics),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """(name, baseline median, median, relative change, status) per metric;
+    status is "ok", "faster", "REGRESSION" or "new"."""
+    rows = []
+    for name, metric in results["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None:
+            rows.append((name, None, metric["median"], None, "new"))
+            continue
+        before, now = base["median"], metric["median"]
+        change = (now - before) / before if before else 0.0
+        slack = NOISE_FLOOR.get(metric["unit"], 0.0)
+        if now > before * (1 + tolerance) and now - before > slack:
+            status = "REGRESSION"
+        elif now < before * (1 - tolerance) and before - now > slack:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, before, now, change, status))
+    return rows
+
+
+def report(results, rows=None):
+    print(f"\n{'metric':<22} {'median':>10} {'min':>10} {'max':>10}" + (f" {'baseline':>10} {'change':>8}" if rows else ""))
+    compared = {row[0]: row for row in rows or ()}
+    for name, metric in results["metrics"].items():
+        unit = metric["unit"]
+        line = f"{name:<22} {metric['median']:>8.2f}{unit:>2} {metric['min']:>8.2f}{unit:>2} {metric['max']:>8.2f}{unit:>2}"
+        if name in compared:
+            _, before, _, change, status = compared[name]
+            if before is None:
+                line += f" {'-':>10} {'':>8}  {status}"
+            else:
+                line += f" {before:>8.2f}{unit:>2} {change * 100:>+7.1f}%  {status}"
+        print(line)
+
+
+def parse_args(argv=None):
+    first = argparse.ArgumentParser(add_help=False)
+    first.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    known, _ = first.parse_known_args(argv)
+    parser = argparse.ArgumentParser(description="Run the benchmark suite on a synthetic data folder.",
+                                     parents=[first])
+    add_profile_arguments(parser, PRESETS[known.preset])
+    parser.add_argument("--repeat", type=int, default=10, help="samples per metric in each process")
+    parser.add_argument("--processes", type=int, default=3, help="worker processes the samples are pooled from")
+    parser.add_argument("--idle-seconds", type=float, default=1.0, help="length of each idle CPU sample")
+    parser.add_argument("--only", help=f"comma-separated scenarios to run ({', '.join(SCENARIOS)})")
+    parser.add_argument("-o", "--output", help="write the results as JSON here")
+    parser.add_argument("--baseline", help="results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="relative slowdown over the baseline's median that counts as a regression")
+    # Used by run() to start its worker processes.
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    scenarios = SCENARIOS
+    if args.only:
+        scenarios = [name.strip() for name in args.only.split(",")]
+        unknown = [name for name in scenarios if name not in SCENARIOS]
+        if unknown:
+            parser.error(f"unknown scenario: {', '.join(unknown)}")
+    if args.repeat < 1 or args.processes < 1:
+        parser.error("--repeat and --processes must be at least 1")
+    try:
+        profile = profile_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    return args, profile, scenarios
+
+
+def main(argv=None):
+    args, profile, scenarios = parse_args(argv)
+    if args.worker:
+        run_worker(args.worker, args.worker_output, args.repeat, args.idle_seconds, scenarios)
+        return
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if DataProfile.from_dict(baseline["profile"]) != profile:
+            print(f"{args.baseline} was recorded with {DataProfile.from_dict(baseline['profile'])},"
+                  f" not {profile}; not comparing")
+            sys.exit(2)
+        if baseline.get("environment", {}).get("machine") != platform.machine() \
+                or baseline.get("environment", {}).get("cpus") != os.cpu_count():
+            print(f"note: {args.baseline} was recorded on a different machine; expect differences")
+
+    results = run(profile, args.repeat, args.idle_seconds, scenarios, args.processes)
+    rows = compare(results, baseline, args.tolerance) if baseline else None
+    report(results, rows)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    regressions = [row[0] for row in rows or () if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance * 100:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
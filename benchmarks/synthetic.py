@@ -0,0 +1,148 @@
+"""Synthetic data folders for the benchmarks, reproducible from a seed.
+
+A DataProfile says what the folder looks like: how many lists, how many
+entries in each, how long entry texts run, how priorities are spread and
+how many entries are completed. The same profile and seed always give the
+same files, byte for byte.
+
+Pure Python, no Qt needed:
+    python benchmarks/synthetic.py OUT_DIR --lists 20 --entries 5000 --words 8 --skew 1.2 --completed 0.3
+"""
+import argparse
+import math
+import os
+import random
+import sys
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.persistence import write_json_atomic
+
+TEXT_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+VOCABULARY_SIZE = 4000
+SYLLABLES = ["ka", "lo", "mi", "ra", "su", "te", "vo", "ne", "pi", "da", "gu", "ze", "ro", "ba", "fi", "sho"]
+
+
+class DataProfile:
+    """Shape of a synthetic data folder.
+
+    words is the mean number of words per entry text; text_distribution
+    picks how the counts spread around it ("fixed", "uniform" over
+    1..2*words, or a long-tailed "lognormal"). Priority p is drawn with
+    weight 1 / p**priority_skew, so 0 spreads priorities evenly and larger
+    values crowd the low ones. completed_ratio is the chance an entry is
+    completed.
+    """
+
+    FIELDS = ("lists", "entries", "words", "text_distribution", "priority_skew", "completed_ratio", "seed")
+
+    def __init__(self, lists=20, entries=2000, words=6, text_distribution="lognormal", priority_skew=1.0,
+                 completed_ratio=0.25, seed=1):
+        if text_distribution not in TEXT_DISTRIBUTIONS:
+            raise ValueError(f"text_distribution must be one of {', '.join(TEXT_DISTRIBUTIONS)}")
+        if not 0 <= completed_ratio <= 1:
+            raise ValueError("completed_ratio must be between 0 and 1")
+        if lists < 1 or entries < 0 or words < 1:
+            raise ValueError("lists and words must be at least 1, entries at least 0")
+        self.lists = lists
+        self.entries = entries
+        self.words = words
+        self.text_distribution = text_distribution
+        self.priority_skew = priority_skew
+        self.completed_ratio = completed_ratio
+        self.seed = seed
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**{field: values[field] for field in cls.FIELDS if field in values})
+
+    def __eq__(self, other):
+        return isinstance(other, DataProfile) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "DataProfile(" + ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items()) + ")"
+
+
+def vocabulary(rng, size=VOCABULARY_SIZE):
+    """Pronounceable made-up words, so the search index sees realistic prefixes."""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def word_count(rng, profile):
+    if profile.text_distribution == "fixed":
+        return profile.words
+    if profile.text_distribution == "uniform":
+        return rng.randint(1, 2 * profile.words - 1)
+    # Median words, with a tail of much longer notes.
+    return max(1, round(rng.lognormvariate(math.log(profile.words), 0.6)))
+
+
+def generate_list(rng, words, profile, first_key=1700000000000):
+    priorities = list(range(1, 11))
+    weights = list(accumulate(1 / p ** profile.priority_skew for p in priorities))
+    # Zipf-like word choice: common words show up in many entries.
+    word_weights = list(accumulate(1 / (rank + 1) for rank in range(len(words))))
+    data = {}
+    for i in range(profile.entries):
+        text = " ".join(rng.choices(words, cum_weights=word_weights, k=word_count(rng, profile)))
+        data[str(first_key + i)] = {
+            "text": text.capitalize(),
+            "priority": rng.choices(priorities, cum_weights=weights)[0],
+            "completed": rng.random() < profile.completed_ratio,
+        }
+    return data
+
+
+def generate_data_dir(path, profile):
+    """Write profile.lists list files into path; returns their paths."""
+    os.makedirs(path, exist_ok=True)
+    rng = random.Random(profile.seed)
+    words = vocabulary(rng)
+    paths = []
+    for n in range(profile.lists):
+        file_path = os.path.join(path, f"list_{n:04d}.json")
+        write_json_atomic(file_path, generate_list(rng, words, profile, first_key=1700000000000 + n * 10 ** 7))
+        paths.append(file_path)
+    return paths
+
+
+def add_profile_arguments(parser, defaults=None):
+    defaults = defaults or DataProfile()
+    parser.add_argument("--lists", type=int, default=defaults.lists, help="list files in the folder")
+    parser.add_argument("--entries", type=int, default=defaults.entries, help="entries per list")
+    parser.add_argument("--words", type=int, default=defaults.words, help="mean words per entry text")
+    parser.add_argument("--text-distribution", choices=TEXT_DISTRIBUTIONS, default=defaults.text_distribution)
+    parser.add_argument("--skew", dest="priority_skew", type=float, default=defaults.priority_skew,
+                        help="priority p drawn with weight 1/p**skew (0: even)")
+    parser.add_argument("--completed", dest="completed_ratio", type=float, default=defaults.completed_ratio,
+                        help="fraction of entries completed")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def profile_from_args(args):
+    return DataProfile.from_dict(vars(args))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic data folder for the benchmarks.")
+    parser.add_argument("out", help="folder to write the lists into")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        profile = profile_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    paths = generate_data_dir(args.out, profile)
+    size = sum(os.path.getsize(p) for p in paths)
+    print(f"{len(paths)} lists, {profile.entries} entries each, {size / 1e6:.1f} MB in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,132 @@
+from src.startup_profile import profile
+profile.begin("imports")
+import logging
 import os
-import json
+import re
+import time
+import queue
+import threading
+from collections import OrderedDict
 from PyQt5 import QtWidgets, QtGui, QtCore
 from src.title_bar import CustomTitleBar
+from src.list_filter import ListFilter
+from src.list_model import ListModel, PriorityDelegate, PRIORITY_COLUMN
+from src.list_document import ListDocument, default_list
+from src import settings
+from src.list_catalog import ListDescriptor, scan_lists
+from src.list_loader import ListLoader, ParsedList
+from src.storage import FILE_FILTER, engine_for, is_list_file
+from src.stream_loader import iter_batches
+from src.file_watcher import FileWatcher
+from src.search_index import CACHE_NAME, SearchIndex
+from src.instrumentation import instruments, timed
+from src.diagnostics_panel import DiagnosticsPanel, StallWatch
+from src.sync_client import SyncError, SyncLog
+profile.end("imports")
 
-# Define colors for priority levels
-priority_colors = {
-    10: QtGui.QColor(230, 0, 0),       # red
-    9: QtGui.QColor(255, 75, 0),        # red-orange
-    8: QtGui.QColor(255, 150, 50),      # orange
-    7: QtGui.QColor(255, 200, 0),       # yellow-orange
-    6: QtGui.QColor(255, 255, 0),       # yellow
-    5: QtGui.QColor(200, 255, 0),       # light green
-    4: QtGui.QColor(125, 255, 0),       # grey-blue
-    3: QtGui.QColor(60, 240, 0),        # blue-white
-    2: QtGui.QColor(0, 220, 20),        # bright blue
-    1: QtGui.QColor(0, 200, 75)         # green
-}
+log = logging.getLogger(__name__)
 
 ###############################################################################
-# ListTab: Each tab (or “list”) is a self-contained widget with its own JSON.
+# ListTab: Each tab (or “list”) shows one ListDocument and edits it in place.
 ###############################################################################
 class ListTab(QtWidgets.QWidget):
-    def __init__(self, json_file_path, parent=None):
+    # Relays "a streamed batch is queued" from the streaming thread.
+    stream_ready = QtCore.pyqtSignal()
+    # Keys the user chose to move to another list; MainWindow offers the lists.
+    moveRequested = QtCore.pyqtSignal(list)
+    # A write found the file changed by another program (from a writer thread).
+    diskChanged = QtCore.pyqtSignal()
+    # A write failed, or None once writes work again (from a writer thread).
+    writeError = QtCore.pyqtSignal(object)
+
+    def __init__(self, json_file_path, parent=None, parsed=None, search_index=None, edit_log=None):
         super().__init__(parent)
-        self.json_file_path = json_file_path
-        self.list_data = self.load_json()
+        # The list itself: entries, file, edit log and search index upkeep.
+        # A very large file is not parsed up front: the tab starts empty and
+        # its entries stream in once it is shown (see start_streaming).
+        # A write that finds the file changed by another program is reported
+        # through diskChanged, and check_disk merges the changes in. A write
+        # that fails is retried, and shown under the table until one works.
+        # With the sync daemon's edit log (a SyncLog) the daemon owns the
+        # file: edits go to it, and everyone's come back through apply_delta.
+        self.document = ListDocument(json_file_path, parsed, search_index,
+                                     on_conflict=self._report_conflict, stream=True, edit_log=edit_log,
+                                     on_write_error=self._report_write_error)
         self.setup_ui()
+        self.writeError.connect(self.show_write_error, QtCore.Qt.QueuedConnection)
 
-        # Monitor cell changes and periodic updates.
-        self.table.cellChanged.connect(self.handle_cell_changed)
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.check_for_changes)
-        self.timer.start(10)  # every 10 ms
+        # Edits are pushed into list_data by the model as they happen.
+        self.model.entryChanged.connect(self.handle_entry_changed)
 
+        # Rows whose priority was edited settle into place a second later.
+        # The timer only runs while moves are pending, so idle lists cost nothing.
         self.reorder_timer = QtCore.QTimer(self)
+        self.reorder_timer.setSingleShot(True)
+        self.reorder_timer.setInterval(1000)
         self.reorder_timer.timeout.connect(self.reorder_entries)
-        self.reorder_timer.start(1000)  # every 1 second
+        self.model.movesPending.connect(self.schedule_reorder)
+        if self.loading:
+            self.start_streaming()
+        elif self.load_error is not None:
+            # Shown without a dialog: the window may still be starting up.
+            self.set_editable(False)
+            self.status_bar.showMessage(f"Could not read this list; nothing is written to it: {self.load_error}")
+            self.status_bar.show()
+
+        # Edits made to the file by other programs are merged in as they land.
+        # Queued even from the GUI thread: a conflict is found mid-write.
+        # A synced list's file is the daemon's; it sends the changes instead.
+        self.diskChanged.connect(self.check_disk, QtCore.Qt.QueuedConnection)
+        self.watcher = FileWatcher(self)
+        if not self.synced:
+            for path in self.document.watched_paths():
+                self.watcher.watch(path)
+        self.watcher.changed.connect(self.check_disk)
+
+    # The document's state, as the rest of the GUI (and the benchmarks) see it.
+    @property
+    def json_file_path(self):
+        return self.document.path
+
+    @property
+    def list_data(self):
+        return self.document.list_data
+
+    @property
+    def search_index(self):
+        return self.document.search_index
+
+    @property
+    def storage(self):
+        return self.document.storage
+
+    @property
+    def writer(self):
+        return self.document.writer
+
+    @property
+    def journal(self):
+        return self.document.journal
+
+    @property
+    def guard(self):
+        return self.document.guard
+
+    @property
+    def loading(self):
+        return self.document.loading
+
+    @property
+    def load_error(self):
+        return self.document.load_error
+
+    @property
+    def synced(self):
+        return isinstance(self.document.journal, SyncLog)
+
+    @property
+    def reloads(self):
+        return self.document.reloads
 
     def setup_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
@@ -44,163 +135,309 @@ class ListTab(QtWidgets.QWidget):
         self.internal_toolbar.setStyleSheet("background-color: black; color: white;")
         layout.addWidget(self.internal_toolbar)
 
-        new_entry_action = QtWidgets.QAction("New Entry", self)
-        new_entry_action.triggered.connect(self.create_entry)
-        self.internal_toolbar.addAction(new_entry_action)
+        self.new_entry_action = QtWidgets.QAction("New Entry", self)
+        self.new_entry_action.triggered.connect(self.create_entry)
+        self.internal_toolbar.addAction(self.new_entry_action)
+
+        self.clear_completed_action = QtWidgets.QAction("Clear Completed", self)
+        self.clear_completed_action.triggered.connect(self.clear_completed_entries)
+        self.internal_toolbar.addAction(self.clear_completed_action)
+
+        self.import_action = QtWidgets.QAction("Import…", self)
+        self.import_action.triggered.connect(self.import_from_file)
+        self.internal_toolbar.addAction(self.import_action)
 
-        clear_completed_action = QtWidgets.QAction("Clear Completed", self)
-        clear_completed_action.triggered.connect(self.clear_completed_entries)
-        self.internal_toolbar.addAction(clear_completed_action)
+        # View filters for this tab; applying one only fetches the first page.
+        self.internal_toolbar.addSeparator()
+        self.hide_completed_action = QtWidgets.QAction("Hide Completed", self)
+        self.hide_completed_action.setCheckable(True)
+        self.hide_completed_action.toggled.connect(self.apply_filter)
+        self.internal_toolbar.addAction(self.hide_completed_action)
+        self.internal_toolbar.addWidget(QtWidgets.QLabel(" Priority ≥ "))
+        self.min_priority_box = QtWidgets.QSpinBox()
+        self.min_priority_box.setRange(1, 10)
+        self.min_priority_box.valueChanged.connect(self.apply_filter)
+        self.internal_toolbar.addWidget(self.min_priority_box)
+        self.filter_box = QtWidgets.QLineEdit()
+        self.filter_box.setPlaceholderText("Filter text")
+        self.filter_box.setClearButtonEnabled(True)
+        self.filter_box.setMaximumWidth(220)
+        self.filter_box.textChanged.connect(self.apply_filter)
+        self.internal_toolbar.addWidget(self.filter_box)
+        self.regex_action = QtWidgets.QAction("Regex", self)
+        self.regex_action.setCheckable(True)
+        self.regex_action.toggled.connect(self.apply_filter)
+        self.internal_toolbar.addAction(self.regex_action)
 
-        # Table for list entries.
-        self.table = QtWidgets.QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Text", "Priority", "Completed"])
+        # Table for list entries; rows are produced on demand by the model.
+        self.table = QtWidgets.QTableView()
         layout.addWidget(self.table)
-        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
-        self.table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeToContents)
-        self.table.horizontalHeader().setSectionResizeMode(2, QtWidgets.QHeaderView.ResizeToContents)
+
+        # Shown only while the list's edits cannot be written.
+        self.status_bar = QtWidgets.QStatusBar(self)
+        self.status_bar.setSizeGripEnabled(False)
+        self.status_bar.setStyleSheet("color: red;")
+        self.status_bar.hide()
+        layout.addWidget(self.status_bar)
 
         font = QtGui.QFont("Courier", 12)
         self.table.setFont(font)
         self.setStyleSheet("""
             QWidget { background-color: black; color: white; }
-            QTableWidget { background-color: black; color: white; gridline-color: grey; }
+            QTableView { background-color: black; color: white; gridline-color: grey; }
             QHeaderView::section { background-color: black; color: white; }
             QToolBar { background-color: black; color: white; }
         """)
-        self.render_entries()
-
-    def load_json(self):
-        # If the file doesn’t exist or is empty, create a default entry.
-        if not os.path.exists(self.json_file_path):
-            with open(self.json_file_path, 'w') as f:
-                default_list = {
-                    "example_entry": {
-                        "text": "Example Entry",
-                        "priority": 5,
-                        "completed": False
-                    }
-                }
-                json.dump(default_list, f, indent=4)
-                return default_list
-        with open(self.json_file_path, 'r') as f:
+
+        # The model is attached after font and style are applied so neither
+        # triggers a size pass over every row.
+        self.model = ListModel(self.list_data, self)
+        self.table.setModel(self.model)
+        self.priority_delegate = PriorityDelegate(self.table)
+        self.table.setItemDelegateForColumn(PRIORITY_COLUMN, self.priority_delegate)
+        self.table.clicked.connect(self.handle_clicked)
+        # Rows are selected whole, several at a time, for the batch actions.
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.table.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.table.customContextMenuRequested.connect(self.show_entry_menu)
+
+        # Fixed column widths and row heights keep layout independent of list length.
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        header.setSectionResizeMode(1, QtWidgets.QHeaderView.Fixed)
+        header.setSectionResizeMode(2, QtWidgets.QHeaderView.Fixed)
+        option = QtWidgets.QStyleOptionViewItem()
+        option.initFrom(self.table)
+        option.widget = self.table
+        priority_width = self.priority_delegate.sizeHint(option, QtCore.QModelIndex()).width()
+        header.resizeSection(1, max(header.sectionSizeHint(1), priority_width))
+        header.resizeSection(2, header.sectionSizeHint(2))
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+
+    def start_streaming(self):
+        # The file is memory-mapped and parsed on a thread. Batches wait in a
+        # two-slot queue, so however far the GUI falls behind, only a couple
+        # of batches beyond list_data itself are ever held. The first batch
+        # is small, so the top of the list shows almost at once; later rows
+        # slot in by priority as they arrive. Until the whole file is in,
+        # the list is read-only: a write now would drop the unread entries.
+        self.set_editable(False)
+        self.loading_label = QtWidgets.QLabel(" Loading… ")
+        self.loading_label_action = self.internal_toolbar.addWidget(self.loading_label)
+        self._stream_queue = queue.Queue(maxsize=2)
+        self._stream_stop = threading.Event()
+        self._stream_started = time.perf_counter()
+        self.stream_ready.connect(self.drain_stream)
+        threading.Thread(target=self._stream_entries, name="list-stream", daemon=True).start()
+
+    def _stream_entries(self):
+        # Runs on the streaming thread: queues each batch, then None when the
+        # file is done or the exception that stopped it.
+        try:
+            for batch in iter_batches(self.json_file_path):
+                if not self._queue_streamed(batch):
+                    return
+        except (OSError, ValueError) as e:
+            self._queue_streamed(e)
+        else:
+            self._queue_streamed(None)
+
+    def _queue_streamed(self, item):
+        while not self._stream_stop.is_set():
+            try:
+                self._stream_queue.put(item, timeout=0.1)
+            except queue.Full:
+                continue
             try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                data = {}
-        if not data:
-            default_list = {
-                "example_entry": {
-                    "text": "Example Entry",
-                    "priority": 5,
-                    "completed": False
-                }
-            }
-            data.update(default_list)
-            with open(self.json_file_path, 'w') as f:
-                json.dump(data, f, indent=4)
-        return data
-
-    def update_json(self):
-        with open(self.json_file_path, 'w') as f:
-            json.dump(self.list_data, f, indent=4)
+                self.stream_ready.emit()
+            except RuntimeError:
+                return False  # The tab was deleted meanwhile.
+            return True
+        return False
+
+    @timed("ListTab.drain_stream")
+    def drain_stream(self):
+        # One queued item per signal, so the event loop runs between batches.
+        if not self.loading:
+            return
+        try:
+            item = self._stream_queue.get_nowait()
+        except queue.Empty:
+            return
+        if isinstance(item, list):
+            self.model.add_entries(self.document.append_streamed(item))
+            self.loading_label.setText(f" Loading… {len(self.list_data):,} entries ")
+        else:
+            self.finish_streaming(item)
+
+    def finish_streaming(self, error=None):
+        replayed = self.document.finish_loading(error)
+        self.internal_toolbar.removeAction(self.loading_label_action)
+        profile.add(f"stream {os.path.basename(self.json_file_path)}", time.perf_counter() - self._stream_started)
+        if error is not None:
+            QtWidgets.QMessageBox.warning(self, "Error",
+                                          f"Could not read all of '{os.path.basename(self.json_file_path)}':\n{error}\n\n"
+                                          "The entries read so far are shown read-only.")
+            return
+        if replayed:
+            self.render_entries()
+        self.set_editable(True)
+        # The file may have been changed while it was streaming in.
+        self.check_disk()
+
+    def set_editable(self, editable):
+        self.model.read_only = not editable
+        self.new_entry_action.setEnabled(editable)
+        self.clear_completed_action.setEnabled(editable)
+        self.import_action.setEnabled(editable)
+
+    def update_json(self, keys=()):
+        self.document.update_json(keys)
 
+    def unsaved_keys(self):
+        """Keys edited here whose change has not reached the file yet."""
+        return self.document.unsaved_keys()
+
+    def _report_conflict(self):
+        # Called on a writer thread; check_disk runs on the GUI thread.
+        try:
+            self.diskChanged.emit()
+        except RuntimeError:
+            pass  # The tab was deleted meanwhile.
+
+    def _report_write_error(self, error):
+        # Called on a writer thread; show_write_error runs on the GUI thread.
+        try:
+            self.writeError.emit(error)
+        except RuntimeError:
+            pass  # The tab was deleted meanwhile.
+
+    def show_write_error(self, error):
+        if error is None:
+            self.status_bar.clearMessage()
+            self.status_bar.hide()
+        else:
+            self.status_bar.showMessage(f"Not saved, retrying: {error}")
+            self.status_bar.show()
+
+    @timed("ListTab.check_disk")
+    def check_disk(self, path=None):
+        """Merge in changes another program made to the file; True if it had any."""
+        merge = self.document.check_disk()
+        if merge is None:
+            return False
+        self.show_merge(merge)
+        return True
+
+    def apply_delta(self, put, removed):
+        """Show entries the sync daemon reports changed or deleted. Rows whose
+        priority changed settle with the reorder timer, as edits made here do."""
+        self.show_merge(self.document.apply_delta(put, removed), move_now=False)
+
+    def show_merge(self, merge, move_now=True):
+        # Only the entries that differ are touched, so the model moves, adds
+        # or drops just their rows (or resets once, past BULK_ROWS).
+        if merge.removed:
+            self.model.remove_entries(merge.removed)
+        if merge.added:
+            self.model.add_entries(merge.added)
+        self.model.entries_changed(merge.changed)
+        if move_now:
+            self.model.entries_changed(merge.moved, reorder=True)
+        else:
+            self.model.queue_moves(merge.moved)
+
+    def flush(self):
+        # Write any pending edits now (used on close and before file moves).
+        # False if a write failed; it stays queued for a retry.
+        try:
+            self.document.flush()
+        except Exception as e:
+            self.show_write_error(e)
+            return False
+        return True
+
+    def teardown(self, discard=False):
+        # Stop timers, persist (or drop) pending edits and release the widgets.
+        self.reorder_timer.stop()
+        self.watcher.clear()
+        if self.loading:
+            self._stream_stop.set()
+        try:
+            self.document.close(discard)
+        except Exception as e:
+            # Logged already, and retried in the background while the app runs.
+            log.warning("closing %s with edits not yet written: %s", self.json_file_path, e)
+        self.deleteLater()
+
+    @timed("ListTab.render_entries")
     def render_entries(self):
-        sorted_entries = sorted(self.list_data.items(), key=lambda x: x[1]['priority'], reverse=True)
-        self.table.setRowCount(len(sorted_entries))
-        for row, (timestamp, entry) in enumerate(sorted_entries):
-            text = entry['text']
-            priority = entry['priority']
-            completed = entry['completed']
-
-            text_item = QtWidgets.QTableWidgetItem(text)
-            text_item.setFlags(text_item.flags() | QtCore.Qt.ItemIsEditable)
-            text_item.setTextAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft)
-            self.table.setItem(row, 0, text_item)
-
-            priority_combo = QtWidgets.QComboBox()
-            priority_combo.addItems([str(i) for i in range(1, 11)])
-            priority_combo.setCurrentIndex(priority - 1)
-            self.table.setCellWidget(row, 1, priority_combo)
-
-            completed_item = QtWidgets.QTableWidgetItem()
-            completed_item.setCheckState(QtCore.Qt.Checked if completed else QtCore.Qt.Unchecked)
-            completed_item.setData(QtCore.Qt.CheckStateRole, QtCore.Qt.Checked if completed else QtCore.Qt.Unchecked)
-            self.table.setItem(row, 2, completed_item)
-
-            font = QtGui.QFont()
-            font.setStrikeOut(completed)
-            text_item.setFont(font)
-
-            color = priority_colors.get(priority, QtGui.QColor(0, 0, 0))
-            text_item.setForeground(QtGui.QBrush(color))
-
-    def handle_cell_changed(self, row, column):
-        if column == 2:
-            item = self.table.item(row, column)
-            if item is not None:
-                checked = item.checkState() == QtCore.Qt.Checked
-                sorted_keys = sorted(self.list_data.keys(), key=lambda k: self.list_data[k]['priority'], reverse=True)
-                if row < len(sorted_keys):
-                    timestamp = sorted_keys[row]
-                    self.list_data[timestamp]['completed'] = checked
-                    font = self.table.item(row, 0).font()
-                    font.setStrikeOut(checked)
-                    self.table.item(row, 0).setFont(font)
-                    self.update_json()
-
-    def check_for_changes(self):
-        for row in range(self.table.rowCount()):
-            text_item = self.table.item(row, 0)
-            priority_widget = self.table.cellWidget(row, 1)
-            if text_item is not None and priority_widget is not None:
-                sorted_keys = sorted(self.list_data.keys(), key=lambda k: self.list_data[k]['priority'], reverse=True)
-                if row < len(sorted_keys):
-                    timestamp = sorted_keys[row]
-                    if text_item.text() != self.list_data[timestamp]['text']:
-                        self.list_data[timestamp]['text'] = text_item.text()
-                        self.update_json()
-                    current_priority = priority_widget.currentIndex() + 1
-                    if self.list_data[timestamp]['priority'] != current_priority:
-                        self.list_data[timestamp]['priority'] = current_priority
-                        self.update_json()
-                        color = priority_colors.get(current_priority, QtGui.QColor(0, 0, 0))
-                        text_item.setForeground(QtGui.QBrush(color))
+        self.model.set_list_data(self.list_data)
+
+    def apply_filter(self):
+        try:
+            list_filter = ListFilter(self.hide_completed_action.isChecked(), self.min_priority_box.value(),
+                                     self.filter_box.text(), self.regex_action.isChecked())
+        except re.error:
+            # Keep the last good filter while a pattern is half typed.
+            self.filter_box.setStyleSheet("color: red;")
+            return
+        self.filter_box.setStyleSheet("")
+        self.model.set_filter(list_filter)
+
+    def handle_clicked(self, index):
+        # Open the priority picker on a single click, as the old combo boxes did.
+        if index.column() == PRIORITY_COLUMN:
+            self.table.edit(index)
+
+    def show_entry_menu(self, pos):
+        # Batch actions on the selected rows.
+        keys = self.selected_keys()
+        if not keys or self.model.read_only:
+            return
+        menu = QtWidgets.QMenu(self)
+        priority_menu = menu.addMenu("Set Priority")
+        for priority in range(10, 0, -1):
+            priority_menu.addAction(str(priority), lambda checked, p=priority: self.set_priority(keys, p))
+        menu.addAction("Mark Completed", lambda checked: self.set_completed(keys, True))
+        menu.addAction("Mark Not Completed", lambda checked: self.set_completed(keys, False))
+        menu.addAction("Move to Another List…", lambda checked: self.moveRequested.emit(keys))
+        menu.addSeparator()
+        menu.addAction(f"Delete {len(keys)} Entries" if len(keys) > 1 else "Delete Entry",
+                       lambda checked: self.confirm_delete(keys))
+        menu.exec_(self.table.viewport().mapToGlobal(pos))
+
+    def confirm_delete(self, keys):
+        reply = QtWidgets.QMessageBox.question(self, 'Confirm Delete', f"Delete {len(keys)} selected entries?",
+                                               QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                                               QtWidgets.QMessageBox.No)
+        if reply == QtWidgets.QMessageBox.Yes:
+            self.delete_entries(keys)
+
+    def import_from_file(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import Entries", "", "Text Files (*.txt);;All Files (*)")
+        if not path:
+            return
+        priority, ok = QtWidgets.QInputDialog.getInt(self, "Import Entries", "Priority for the new entries (1-10):",
+                                                     1, 1, 10)
+        if not ok:
+            return
+        try:
+            self.import_text_file(path, priority)
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Could not import file:\n{e}")
+
+    def handle_entry_changed(self, timestamp, field):
+        self.document.entry_changed(timestamp, field)
 
+    def schedule_reorder(self):
+        if not self.reorder_timer.isActive():
+            self.reorder_timer.start()
+
+    @timed("ListTab.reorder_entries")
     def reorder_entries(self):
-        sorted_entries = sorted(self.list_data.items(), key=lambda x: x[1]['priority'], reverse=True)
-        self.table.setRowCount(len(sorted_entries))
-        for row, (timestamp, entry) in enumerate(sorted_entries):
-            text = entry['text']
-            priority = entry['priority']
-            completed = entry['completed']
-            text_item = self.table.item(row, 0)
-            if text_item is not None:
-                text_item.setText(text)
-            else:
-                text_item = QtWidgets.QTableWidgetItem(text)
-                self.table.setItem(row, 0, text_item)
-            priority_widget = self.table.cellWidget(row, 1)
-            if priority_widget is not None:
-                priority_widget.setCurrentIndex(priority - 1)
-            else:
-                priority_combo = QtWidgets.QComboBox()
-                priority_combo.addItems([str(i) for i in range(1, 11)])
-                priority_combo.setCurrentIndex(priority - 1)
-                self.table.setCellWidget(row, 1, priority_combo)
-            completed_item = self.table.item(row, 2)
-            if completed_item is not None:
-                completed_item.setCheckState(QtCore.Qt.Checked if completed else QtCore.Qt.Unchecked)
-            else:
-                completed_item = QtWidgets.QTableWidgetItem()
-                completed_item.setCheckState(QtCore.Qt.Checked if completed else QtCore.Qt.Unchecked)
-                self.table.setItem(row, 2, completed_item)
-            font = QtGui.QFont()
-            font.setStrikeOut(completed)
-            text_item.setFont(font)
-            color = priority_colors.get(priority, QtGui.QColor(0, 0, 0))
-            text_item.setForeground(QtGui.QBrush(color))
+        return self.model.apply_pending_moves()
 
     def create_entry(self):
         text, ok = QtWidgets.QInputDialog.getText(self, "New Entry", "Enter entry text:")
@@ -209,27 +446,78 @@ class ListTab(QtWidgets.QWidget):
         priority, ok = QtWidgets.QInputDialog.getInt(self, "New Entry", "Enter priority (1-10):", 1, 1, 10)
         if not ok:
             return
-        timestamp = str(int(QtCore.QDateTime.currentMSecsSinceEpoch() / 1000))
-        self.list_data[timestamp] = {
-            "text": text,
-            "priority": priority,
-            "completed": False
-        }
-        self.update_json()
-        self.render_entries()
+        self.add_entry(text, priority)
+
+    def add_entry(self, text, priority=1, completed=False):
+        """Add one entry under a fresh key and return the key.
+
+        Constant time whatever the list size: the key is new and the largest
+        yet, so the entry is appended to list_data and to its priority's rows.
+        """
+        timestamp = self.document.add_entry(text, priority, completed)
+        self.model.add_entry(timestamp)
+        return timestamp
 
     def clear_completed_entries(self):
-        self.list_data = {ts: entry for ts, entry in self.list_data.items() if not entry['completed']}
-        self.update_json()
-        self.render_entries()
+        self.model.remove_entries(self.document.clear_completed_entries())
+
+    # -- batches: one journal record (or one file write) and one model update each --
+    def selected_keys(self):
+        rows = sorted(index.row() for index in self.table.selectionModel().selectedRows())
+        return [self.model.key_for_row(row) for row in rows]
+
+    def set_field(self, keys, field, value):
+        """Set one field to the same value on a batch of entries."""
+        keys = self.document.set_field(keys, field, value)
+        self.model.entries_changed(keys, reorder=field == 'priority')
+        return len(keys)
+
+    def set_priority(self, keys, priority):
+        return self.set_field(keys, 'priority', int(priority))
+
+    def set_completed(self, keys, completed=True):
+        return self.set_field(keys, 'completed', bool(completed))
+
+    def delete_entries(self, keys):
+        keys = self.document.delete_entries(keys)
+        self.model.remove_entries(keys)
+        return len(keys)
+
+    def add_entries(self, entries):
+        """Add (key, entry dict) pairs; a key already in use gets a new one.
+
+        Returns the keys the entries were stored under.
+        """
+        keys = self.document.add_entries(entries)
+        self.model.add_entries(keys)
+        return keys
+
+    def import_text_file(self, path, priority=1):
+        """Add one entry per non-blank line of a text file; returns how many."""
+        keys = self.document.import_text_file(path, priority)
+        self.model.add_entries(keys)
+        return len(keys)
+
+    def move_entries(self, keys, target):
+        """Move entries to another ListTab, keeping their keys where free."""
+        keys = [key for key in keys if key in self.list_data]
+        if not keys or target is self or target.model.read_only:
+            return 0
+        target.add_entries([(key, dict(self.list_data[key])) for key in keys])
+        return self.delete_entries(keys)
 
     def save_list(self):
+        if self.loading or self.load_error is not None:
+            QtWidgets.QMessageBox.warning(self, "Save List", "This list has not been read completely yet.")
+            return None
         base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-        new_file, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save List", base_dir, "JSON Files (*.json)")
+        new_file, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Save List", base_dir, FILE_FILTER)
         if new_file:
-            with open(new_file, 'w') as f:
-                json.dump(self.list_data, f, indent=4)
-            self.json_file_path = new_file
+            for path in self.document.watched_paths():
+                self.watcher.unwatch(path)
+            self.document.save_as(new_file)
+            for path in self.document.watched_paths():
+                self.watcher.watch(path)
             return new_file
         return None
 
@@ -239,15 +527,31 @@ class ListTab(QtWidgets.QWidget):
 class MainWindow(QtWidgets.QMainWindow):
     MAX_VISIBLE_TABS = 5
 
-    def __init__(self):
+    # (load generation, ParsedList, sync version or None) relayed from
+    # loader threads to the GUI thread.
+    list_parsed = QtCore.pyqtSignal(object)
+
+    def __init__(self, data_dir=None, sync=None):
         super().__init__()
+        profile.begin("window construction")
+        self.data_dir = data_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
         self.setWindowTitle("Multi-List Application")
         self.setWindowFlags(QtCore.Qt.FramelessWindowHint)
         self.resize(1000, 700)
 
         # Containers for loaded lists.
         self.visible_tabs = []   # List of tuples: (file_path, ListTab)
-        self.cached_tabs = []    # Tabs not currently displayed
+        self.hidden_lists = []   # ListDescriptors for lists not currently displayed
+        # Recently hidden ListTabs kept built, least recently used first.
+        self.tab_cache = OrderedDict()  # file_path -> ListTab
+        # Lists being parsed in the background for the visible tabs.
+        self.pending_lists = []
+        self.startup_lists = []
+        self.load_generation = 0
+        self.loader = ListLoader()
+        self.list_parsed.connect(self.handle_list_parsed)
+        # Word index over every list, built in the background from a cache.
+        self.search_index = SearchIndex(os.path.join(self.data_dir, CACHE_NAME))
 
         # Central widget and layout.
         central_widget = QtWidgets.QWidget()
@@ -261,6 +565,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.title_bar.setStyleSheet("background-color: black; color: white;")
         self.main_layout.addWidget(self.title_bar)
         self.title_bar.installEventFilter(self)
+        self.title_bar.diagnosticsRequested.connect(self.show_diagnostics)
         self.drag_position = None
 
         # Top toolbar: Left side dropdown for list options and right side dropdown for hidden lists.
@@ -284,6 +589,15 @@ class MainWindow(QtWidgets.QMainWindow):
         spacer.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
         self.top_toolbar.addWidget(spacer)
 
+        # Search across all lists; results drop down below the box.
+        self.search_box = QtWidgets.QLineEdit()
+        self.search_box.setPlaceholderText("Search all lists")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.setMaximumWidth(260)
+        self.search_box.returnPressed.connect(self.run_search)
+        self.top_toolbar.addWidget(self.search_box)
+        self.search_menu = QtWidgets.QMenu(self)
+
         # Right: Dropdown for hidden (cached) lists.
         self.hidden_button = QtWidgets.QPushButton("Hidden Lists")
         self.hidden_button.setStyleSheet("QPushButton { background-color: black; color: white; border: none; }")
@@ -297,14 +611,41 @@ class MainWindow(QtWidgets.QMainWindow):
         self.tab_widget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.tab_widget.customContextMenuRequested.connect(self.tab_context_menu)
 
+        # Event loop stalls are watched for only while instruments record.
+        self.stall_watch = StallWatch(self)
+        if instruments.enabled:
+            self.stall_watch.start()
+        self.diagnostics_panel = None
+
+        # With syncing on (--sync, or settings.SYNC) and a sync daemon serving
+        # the data folder, lists load from the daemon and edits go through it;
+        # everyone's edits come back as deltas (see apply_sync_delta).
+        self.sync = None
+        if settings.SYNC if sync is None else sync:
+            # QtNetwork is only loaded when syncing.
+            from src.sync_link import SyncLink
+            self.sync = SyncLink.connect_to(self.data_dir, self)
+        if self.sync is not None:
+            self.sync.delta.connect(self.apply_sync_delta)
+            self.sync.listRemoved.connect(self.sync_list_removed)
+            self.sync.disconnected.connect(self.sync_lost)
+            self.sync.request("subscribe")
+
+        profile.end("window construction")
+
         # Load all lists from the data folder.
         self.load_all_lists()
         self.update_hidden_lists_menu()
+        # Lists other programs add to, remove from or change in the folder
+        # are picked up as they land (see sync_data_dir).
+        self.folder_watcher = FileWatcher(self)
+        self.folder_watcher.watch(self.data_dir)
+        self.folder_watcher.changed.connect(self.sync_data_dir)
 
         # Apply full dark theme.
         self.setStyleSheet("""
             QWidget { background-color: black; color: white; }
-            QTableWidget { background-color: black; color: white; gridline-color: grey; }
+            QTableView { background-color: black; color: white; gridline-color: grey; }
             QHeaderView::section { background-color: black; color: white; }
             QToolBar { background-color: black; color: white; }
             QTabWidget::pane { border: none; }
@@ -324,98 +665,316 @@ class MainWindow(QtWidgets.QMainWindow):
                 return True
         return super().eventFilter(source, event)
 
+    def paintEvent(self, event):
+        profile.milestone("first paint")
+        super().paintEvent(event)
+
+    def show_diagnostics(self):
+        if self.diagnostics_panel is None:
+            self.diagnostics_panel = DiagnosticsPanel(self.stall_watch, self)
+        self.diagnostics_panel.show()
+        self.diagnostics_panel.raise_()
+
+    def closeEvent(self, event):
+        # Make sure every list's pending edits reach disk before exiting.
+        tabs = [tab for _, tab in self.visible_tabs] + list(self.tab_cache.values())
+        failed = [tab.json_file_path for tab in tabs if not tab.flush()]
+        if failed:
+            QtWidgets.QMessageBox.warning(self, "Error", "Could not save the latest edits to:\n"
+                                          + "\n".join(failed))
+        self.loader.shutdown(wait=False)
+        if self.sync is not None:
+            # Synced edits are the daemon's to write; make sure it has them all.
+            self.sync.close()
+        # Every edit is on disk now, so edited lists can be cached as well.
+        self.search_index.save(settle=True)
+        self.stall_watch.stop()
+        super().closeEvent(event)
+
     def load_all_lists(self):
-        base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-        if not os.path.exists(base_dir):
-            os.makedirs(base_dir)
-        files = sorted([f for f in os.listdir(base_dir) if f.endswith(".json")])
+        base_dir = self.data_dir
+        with profile.phase("directory scan"):
+            if not os.path.exists(base_dir):
+                os.makedirs(base_dir)
+            descriptors = scan_lists(base_dir)
+        self.search_index.refresh([d.path for d in descriptors])
         # Clear any existing tabs.
+        for _, tab in self.visible_tabs:
+            tab.teardown()
+        for tab in self.tab_cache.values():
+            tab.teardown()
         self.visible_tabs = []
-        self.cached_tabs = []
+        self.hidden_lists = descriptors[self.MAX_VISIBLE_TABS:]
+        self.tab_cache.clear()
         self.tab_widget.clear()
-        for f in files:
-            file_path = os.path.join(base_dir, f)
-            # Create ListTab.
-            tab = ListTab(file_path)
-            # Use the file name (without extension) as the list name.
-            tab_name = os.path.splitext(f)[0]
-            if len(self.visible_tabs) < self.MAX_VISIBLE_TABS:
-                self.visible_tabs.append((file_path, tab))
-                self.tab_widget.addTab(tab, tab_name)
+        # Only the lists that are shown get a ListTab; the rest stay descriptors.
+        # Their files are parsed in the loader's pool and each tab is added as
+        # soon as its file is ready, in directory order.
+        self.load_generation += 1
+        self.pending_lists = descriptors[:self.MAX_VISIBLE_TABS]
+        self.startup_lists = list(self.pending_lists)
+        # A file that parses before submit returns is handled right away,
+        # so iterate over a copy of the pending list.
+        for descriptor in self.startup_lists:
+            if self.sync is not None:
+                self.sync.request("snapshot", lambda reply, d=descriptor, g=self.load_generation:
+                                  self.handle_snapshot(g, d, reply), list=descriptor.name)
             else:
-                self.cached_tabs.append((file_path, tab))
+                self.submit_list(descriptor)
+        if not self.pending_lists:
+            profile.milestone("all lists loaded")
+
+    def submit_list(self, descriptor):
+        self.loader.submit(descriptor.path,
+                           lambda parsed, g=self.load_generation: self.list_parsed.emit((g, parsed, None)))
+
+    def handle_snapshot(self, generation, descriptor, reply):
+        # A list the daemon cannot serve is read from its file instead.
+        if not reply.get("ok"):
+            log.warning("sync daemon could not load %s: %s", descriptor.name, reply.get("error"))
+            self.submit_list(descriptor)
+            return
+        result = reply["result"]
+        self.handle_list_parsed((generation, ParsedList(descriptor.path, result["entries"]), result["version"]))
+
+    def handle_list_parsed(self, result):
+        generation, parsed, sync_version = result
+        if generation != self.load_generation:
+            return  # A newer load_all_lists superseded this one.
+        descriptor = next((d for d in self.pending_lists if d.path == parsed.path), None)
+        if descriptor is None:
+            return
+        self.pending_lists.remove(descriptor)
+        if len(self.visible_tabs) < self.MAX_VISIBLE_TABS:
+            tab = self.create_tab(descriptor.path, parsed, sync_version)
+            # Tabs the user opened meanwhile stay in front; the rest keep file order.
+            order = {d.path: rank for rank, d in enumerate(self.startup_lists)}
+            index = sum(1 for fp, _ in self.visible_tabs if order.get(fp, -1) < order[descriptor.path])
+            self.visible_tabs.insert(index, (descriptor.path, tab))
+            self.tab_widget.insertTab(index, tab, descriptor.name)
+        else:
+            # Tabs opened in the meantime took the slot; keep it hidden.
+            self.hidden_lists.insert(0, descriptor)
+            self.update_hidden_lists_menu()
+        if not self.pending_lists:
+            profile.milestone("all lists loaded")
+
+    def sync_data_dir(self, path=None):
+        """Catch up with lists other programs added to, removed from or changed
+        in the data folder, without the full rescan of load_all_lists.
+
+        Built tabs watch their own files; this only updates descriptors, the
+        hidden list menu and the search index, and closes tabs whose file is gone.
+        """
+        try:
+            on_disk = {os.path.abspath(d.path): d for d in scan_lists(self.data_dir)}
+        except OSError:
+            return
+        data_dir = os.path.abspath(self.data_dir)
+
+        def gone(fp):
+            fp = os.path.abspath(fp)
+            return os.path.dirname(fp) == data_dir and fp not in on_disk
+
+        # Hidden lists first, so a closed tab is never refilled with a gone list.
+        known = {os.path.abspath(d.path) for d in self.pending_lists}
+        changed = []
+        hidden = []
+        for descriptor in self.hidden_lists:
+            path = os.path.abspath(descriptor.path)
+            known.add(path)
+            if gone(path):
+                self.search_index.remove_list(path)
+                continue
+            hidden.append(descriptor)
+            current = on_disk.get(path)
+            if current is not None and current.mtime != descriptor.mtime:
+                descriptor.mtime = current.mtime
+                if descriptor.path not in self.tab_cache:
+                    changed.append(path)
+        removed = len(self.hidden_lists) - len(hidden)
+        self.hidden_lists = hidden
+        for fp in [fp for fp in self.tab_cache if gone(fp)]:
+            self.tab_cache.pop(fp).teardown(discard=True)
+        for fp, tab in list(self.visible_tabs):
+            known.add(os.path.abspath(fp))
+            if gone(fp):
+                self.search_index.remove_list(fp)
+                self.close_tab(tab, discard=True)
+                removed += 1
+        added = [d for path, d in on_disk.items() if path not in known]
+        self.hidden_lists.extend(added)
+        if added or changed:
+            self.search_index.reindex(changed + [d.path for d in added])
+        # Our own writes land here too (temporary files come and go); they
+        # leave the menu as it was.
+        if added or removed:
+            self.update_hidden_lists_menu()
 
     def update_hidden_lists_menu(self):
         self.hidden_menu.clear()
-        for file_path, tab in self.cached_tabs:
-            name = os.path.splitext(os.path.basename(file_path))[0]
-            action = self.hidden_menu.addAction(name)
-            action.triggered.connect(lambda checked, fp=file_path, t=tab: self.bring_hidden_to_visible(fp, t))
+        for descriptor in self.hidden_lists:
+            action = self.hidden_menu.addAction(descriptor.name)
+            action.triggered.connect(lambda checked, fp=descriptor.path: self.bring_hidden_to_visible(fp))
         # Also update Delete List menu (if needed in options).
 
-    def bring_hidden_to_visible(self, file_path, tab):
-        # Remove from cached.
-        self.cached_tabs = [item for item in self.cached_tabs if item[0] != file_path]
-        # Insert at index 0 in QTabWidget.
+    def materialize_tab(self, file_path):
+        # Reuse a cached ListTab if there is one, otherwise build it now.
+        tab = self.tab_cache.pop(file_path, None)
+        if tab is None:
+            tab = self.create_tab(file_path)
+        return tab
+
+    def create_tab(self, file_path, parsed=None, sync_version=None):
+        if self.sync is not None and parsed is None:
+            parsed, sync_version = self.sync_snapshot(file_path)
+        edit_log = None
+        if sync_version is not None:
+            edit_log = SyncLog(os.path.splitext(os.path.basename(file_path))[0], self.sync.send_edit, sync_version)
+        tab = ListTab(file_path, parsed=parsed, search_index=self.search_index, edit_log=edit_log)
+        tab.moveRequested.connect(lambda keys, source=tab: self.move_entries(source, keys))
+        return tab
+
+    def sync_snapshot(self, file_path):
+        """(ParsedList, version) of a data folder list from the daemon, or
+        (None, None) to read it from its file."""
+        if os.path.dirname(os.path.abspath(file_path)) != os.path.abspath(self.data_dir):
+            return None, None
+        try:
+            result = self.sync.call("snapshot", list=os.path.splitext(os.path.basename(file_path))[0])
+        except SyncError as e:
+            log.warning("%s", e)
+            return None, None
+        return ParsedList(file_path, result["entries"]), result["version"]
+
+    def synced_tabs(self, name):
+        """Built tabs showing the list the daemon calls name."""
+        return [tab for tab in [tab for _, tab in self.visible_tabs] + list(self.tab_cache.values())
+                if isinstance(tab.document.journal, SyncLog) and tab.document.journal.name == name]
+
+    def apply_sync_delta(self, name, version, put, removed):
+        # Only built tabs follow; a list built later starts from a fresh snapshot.
+        for tab in self.synced_tabs(name):
+            delta = tab.document.journal.take_delta(version, put, removed)
+            if delta is not None:
+                tab.apply_delta(*delta)
+
+    def sync_list_removed(self, name):
+        # The daemon dropped a list whose file went away. Its tabs go; should
+        # the file be back, it is listed again and shown from a fresh snapshot.
+        for tab in self.synced_tabs(name):
+            cached = [fp for fp, cached_tab in self.tab_cache.items() if cached_tab is tab]
+            if cached:
+                self.tab_cache.pop(cached[0]).teardown(discard=True)
+            else:
+                self.close_tab(tab, discard=True)
+        self.sync_data_dir()
+
+    def sync_lost(self):
+        # Without the daemon every list goes back to reading and writing its own file.
+        self.sync = None
+        self.load_all_lists()
+
+    def move_entries(self, source, keys):
+        # Offer every other list; a hidden one is built, and kept cached, to take them.
+        menu = QtWidgets.QMenu(self)
+        for fp, tab in self.visible_tabs:
+            if tab is not source and not tab.model.read_only:
+                menu.addAction(os.path.splitext(os.path.basename(fp))[0],
+                               lambda checked, t=tab: source.move_entries(keys, t))
+        for descriptor in self.hidden_lists:
+            menu.addAction(descriptor.name,
+                           lambda checked, fp=descriptor.path: source.move_entries(keys, self.hidden_tab(fp)))
+        if menu.isEmpty():
+            menu.addAction("No other lists").setEnabled(False)
+        menu.exec_(QtGui.QCursor.pos())
+
+    def hidden_tab(self, file_path):
+        """A built ListTab for a hidden list, kept in the tab cache."""
+        tab = self.materialize_tab(file_path)
+        self.cache_hidden_tab(file_path, tab)
+        return tab
+
+    def cache_hidden_tab(self, file_path, tab):
+        # Keep the tab built for a while; tear down the least recently hidden.
+        self.tab_cache[file_path] = tab
+        self.tab_cache.move_to_end(file_path)
+        while len(self.tab_cache) > settings.TAB_CACHE_SIZE:
+            _, evicted = self.tab_cache.popitem(last=False)
+            evicted.teardown()
+
+    def show_tab_first(self, file_path, tab):
+        # Insert as the first (leftmost) tab; push the last one out if over the limit.
         self.tab_widget.insertTab(0, tab, os.path.splitext(os.path.basename(file_path))[0])
         self.visible_tabs.insert(0, (file_path, tab))
-        # If visible_tabs exceeds limit, move last one to cached.
         if len(self.visible_tabs) > self.MAX_VISIBLE_TABS:
             removed_file, removed_tab = self.visible_tabs.pop()
             index = self.tab_widget.indexOf(removed_tab)
             if index != -1:
                 self.tab_widget.removeTab(index)
-            self.cached_tabs.insert(0, (removed_file, removed_tab))
+            self.hidden_lists.insert(0, ListDescriptor(removed_file, entry_count=len(removed_tab.list_data)))
+            self.cache_hidden_tab(removed_file, removed_tab)
         self.update_hidden_lists_menu()
 
+    def bring_hidden_to_visible(self, file_path):
+        for fp, tab in self.visible_tabs:
+            if os.path.abspath(fp) == os.path.abspath(file_path):
+                self.tab_widget.setCurrentWidget(tab)
+                return
+        # Remove from hidden.
+        self.hidden_lists = [d for d in self.hidden_lists if d.path != file_path]
+        self.show_tab_first(file_path, self.materialize_tab(file_path))
+
+    def run_search(self):
+        query = self.search_box.text().strip()
+        if not query:
+            return
+        hits = self.search_index.search(query, limit=settings.SEARCH_RESULT_LIMIT)
+        self.search_menu.clear()
+        if not hits:
+            note = "No matches" if self.search_index.ready else "No matches yet (still indexing)"
+            self.search_menu.addAction(note).setEnabled(False)
+        for hit in hits:
+            name = os.path.splitext(os.path.basename(hit.path))[0]
+            action = self.search_menu.addAction(f"{name}: {hit.text}")
+            action.triggered.connect(lambda checked, h=hit: self.show_search_hit(h))
+        self.search_menu.popup(self.search_box.mapToGlobal(QtCore.QPoint(0, self.search_box.height())))
+
+    def show_search_hit(self, hit):
+        # Bring the hit's list to the front and select the entry.
+        known = [d.path for d in self.hidden_lists] + list(self.tab_cache)
+        path = next((fp for fp in known if os.path.abspath(fp) == hit.path), hit.path)
+        self.bring_hidden_to_visible(path)
+        for fp, tab in self.visible_tabs:
+            if os.path.abspath(fp) == hit.path:
+                self.tab_widget.setCurrentWidget(tab)
+                row = tab.model.row_for_key(hit.key)
+                if row is not None:
+                    tab.table.selectRow(row)
+                    tab.table.scrollTo(tab.model.index(row, 0))
+                return
+
     def new_list(self):
-        base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(self, "New List", base_dir, "JSON Files (*.json)")
+        base_dir = self.data_dir
+        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(self, "New List", base_dir, FILE_FILTER)
         if file_name:
             if not os.path.exists(file_name):
-                default_data = {
-                    "example_entry": {
-                        "text": "Example Entry",
-                        "priority": 5,
-                        "completed": False
-                    }
-                }
-                with open(file_name, 'w') as f:
-                    json.dump(default_data, f, indent=4)
-            tab = ListTab(file_name)
-            tab_name = os.path.splitext(os.path.basename(file_name))[0]
+                engine_for(file_name).write(file_name, default_list())
             # Insert new list as the first (leftmost) tab.
-            self.tab_widget.insertTab(0, tab, tab_name)
-            self.visible_tabs.insert(0, (file_name, tab))
-            if len(self.visible_tabs) > self.MAX_VISIBLE_TABS:
-                removed_file, removed_tab = self.visible_tabs.pop()
-                index = self.tab_widget.indexOf(removed_tab)
-                if index != -1:
-                    self.tab_widget.removeTab(index)
-                self.cached_tabs.insert(0, (removed_file, removed_tab))
-            self.update_hidden_lists_menu()
+            self.show_tab_first(file_name, self.create_tab(file_name))
 
     def open_list(self):
-        base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-        file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Open List", base_dir, "JSON Files (*.json)")
+        base_dir = self.data_dir
+        file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Open List", base_dir, FILE_FILTER)
         if file_name:
             # Check if already loaded.
-            for fp, tab in self.visible_tabs + self.cached_tabs:
+            known = [fp for fp, _ in self.visible_tabs] + [d.path for d in self.hidden_lists]
+            for fp in known:
                 if os.path.abspath(fp) == os.path.abspath(file_name):
                     # Bring to visible.
-                    self.bring_hidden_to_visible(fp, tab)
+                    self.bring_hidden_to_visible(fp)
                     return
-            tab = ListTab(file_name)
-            tab_name = os.path.splitext(os.path.basename(file_name))[0]
-            self.tab_widget.insertTab(0, tab, tab_name)
-            self.visible_tabs.insert(0, (file_name, tab))
-            if len(self.visible_tabs) > self.MAX_VISIBLE_TABS:
-                removed_file, removed_tab = self.visible_tabs.pop()
-                index = self.tab_widget.indexOf(removed_tab)
-                if index != -1:
-                    self.tab_widget.removeTab(index)
-                self.cached_tabs.insert(0, (removed_file, removed_tab))
-            self.update_hidden_lists_menu()
+            self.show_tab_first(file_name, self.create_tab(file_name))
 
     def save_list_current(self):
         current_tab = self.tab_widget.currentWidget()
@@ -431,9 +990,9 @@ class MainWindow(QtWidgets.QMainWindow):
                         break
 
     def delete_list(self):
-        # Show a menu listing all .json files in the data folder.
-        base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-        files = sorted([f for f in os.listdir(base_dir) if f.endswith(".json")])
+        # Show a menu listing all list files in the data folder.
+        base_dir = self.data_dir
+        files = sorted([f for f in os.listdir(base_dir) if is_list_file(f)])
         menu = QtWidgets.QMenu()
         for f in files:
             file_path = os.path.join(base_dir, f)
@@ -448,20 +1007,21 @@ class MainWindow(QtWidgets.QMainWindow):
                                                QtWidgets.QMessageBox.No)
         if reply == QtWidgets.QMessageBox.Yes:
             # Remove tab if loaded.
-            for lst in (self.visible_tabs, self.cached_tabs):
-                for item in lst:
-                    fp, tab = item
-                    if os.path.abspath(fp) == os.path.abspath(file_path):
-                        if tab in [t for _, t in self.visible_tabs]:
-                            index = self.tab_widget.indexOf(tab)
-                            if index != -1:
-                                self.tab_widget.removeTab(index)
-                            self.visible_tabs = [i for i in self.visible_tabs if i[0] != file_path]
-                        else:
-                            self.cached_tabs = [i for i in self.cached_tabs if i[0] != file_path]
-                        break
+            target = os.path.abspath(file_path)
+            for fp, tab in self.visible_tabs:
+                if os.path.abspath(fp) == target:
+                    index = self.tab_widget.indexOf(tab)
+                    if index != -1:
+                        self.tab_widget.removeTab(index)
+                    # Drop pending writes so they cannot recreate the file.
+                    tab.teardown(discard=True)
+            self.visible_tabs = [i for i in self.visible_tabs if os.path.abspath(i[0]) != target]
+            for fp in [fp for fp in self.tab_cache if os.path.abspath(fp) == target]:
+                self.tab_cache.pop(fp).teardown(discard=True)
+            self.hidden_lists = [d for d in self.hidden_lists if os.path.abspath(d.path) != target]
+            self.search_index.remove_list(file_path)
             try:
-                os.remove(file_path)
+                engine_for(file_path).remove(file_path)
             except Exception as e:
                 QtWidgets.QMessageBox.warning(self, "Error", f"Could not delete file:\n{e}")
             self.update_hidden_lists_menu()
@@ -474,25 +1034,40 @@ class MainWindow(QtWidgets.QMainWindow):
             close_action = menu.addAction("Close Tab")
             action = menu.exec_(tab_bar.mapToGlobal(pos))
             if action == close_action:
-                # Remove the tab from visible_tabs.
                 widget = self.tab_widget.widget(index)
-                file_path = None
-                for fp, tab in self.visible_tabs:
-                    if tab == widget:
-                        file_path = fp
-                        break
-                self.tab_widget.removeTab(index)
-                self.visible_tabs = [i for i in self.visible_tabs if i[0] != file_path]
-                # If any cached tabs exist, fill the gap.
-                if self.cached_tabs:
-                    cached_fp, cached_tab = self.cached_tabs.pop(0)
-                    self.tab_widget.insertTab(index, cached_tab, os.path.splitext(os.path.basename(cached_fp))[0])
-                    self.visible_tabs.insert(index, (cached_fp, cached_tab))
-                self.update_hidden_lists_menu()
+                if widget is not None:
+                    self.close_tab(widget)
+
+    def close_tab(self, tab, discard=False):
+        # Remove the tab from visible_tabs.
+        index = self.tab_widget.indexOf(tab)
+        self.tab_widget.removeTab(index)
+        self.visible_tabs = [i for i in self.visible_tabs if i[1] is not tab]
+        tab.teardown(discard=discard)
+        # If any hidden lists exist, fill the gap.
+        if self.hidden_lists:
+            descriptor = self.hidden_lists.pop(0)
+            hidden_tab = self.materialize_tab(descriptor.path)
+            self.tab_widget.insertTab(index, hidden_tab, descriptor.name)
+            self.visible_tabs.insert(index, (descriptor.path, hidden_tab))
+        self.update_hidden_lists_menu()
 
 if __name__ == "__main__":
     import sys
-    app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow()
+    profile_startup = "--profile-startup" in sys.argv
+    if "--instrument" in sys.argv:
+        instruments.enable()
+    argv = [arg for arg in sys.argv if arg not in ("--profile-startup", "--instrument", "--sync")]
+    app = QtWidgets.QApplication(argv)
+    window = MainWindow(sync=True if "--sync" in sys.argv else None)
     window.show()
+    if profile_startup:
+        # Report once the window has painted and every visible list is built.
+        def report_when_ready():
+            if profile.complete:
+                profile.report()
+                app.quit()
+            else:
+                QtCore.QTimer.singleShot(10, report_when_ready)
+        QtCore.QTimer.singleShot(0, report_when_ready)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""zen-lists: the lists in data/ from the command line, without the GUI.
+
+    zen-lists list                        every list, with its entry count
+    zen-lists list groceries --open       a list's entries, highest priority first
+    zen-lists add groceries "oat milk" -p 7
+    zen-lists complete groceries 179228793364400100482130427
+    zen-lists query milk                  search every list, as the search box does
+    zen-lists export groceries --format csv -o groceries.csv
+
+Only the Qt-free core (ListDocument and friends) is imported, so a command
+runs in a few tens of milliseconds. Edits are written the way the app
+writes them, and an open window merges them in as they land. list, export
+and query only read list files; they never write or rename one.
+"""
+import os
+import re
+import sys
+
+from src.storage import LIST_SUFFIXES, is_list_file
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+class CommandError(Exception):
+    """A command that cannot be carried out; reported without a traceback."""
+
+
+def list_path(data_dir, name):
+    """The file of the list called name in data_dir, or name itself if it is
+    the path of a list file (.json or .sqlite). Any other file is never
+    taken for a list."""
+    if is_list_file(name) and os.path.isfile(name):
+        return name
+    candidates = [name] if is_list_file(name) else [name + suffix for suffix in LIST_SUFFIXES]
+    for candidate in candidates:
+        path = os.path.join(data_dir, candidate)
+        if os.path.isfile(path):
+            return path
+    raise CommandError(f"no list named {name!r} in {data_dir}")
+
+
+def open_list(data_dir, name, read_only=False):
+    """The list's ListDocument; read_only for commands that only show it,
+    so opening never rewrites or renames the file."""
+    from src.list_document import ListDocument
+    return ListDocument(list_path(data_dir, name), read_only=read_only)
+
+
+def save(document):
+    try:
+        if not document.save():
+            raise CommandError(f"{document.path} keeps changing; some edits were not written")
+    finally:
+        document.close()
+
+
+def format_entry(key, entry):
+    mark = "x" if entry['completed'] else " "
+    return f"{key:<27}  {entry['priority']:>2}  [{mark}]  {entry['text']}"
+
+
+def cmd_list(args, out):
+    if args.name is None:
+        from src.list_catalog import scan_lists
+        for descriptor in scan_lists(args.data):
+            out.write(f"{descriptor.name:<30} {descriptor.entry_count:>8} entries\n")
+        return 0
+    from src.list_filter import ListFilter
+    document = open_list(args.data, args.name, read_only=True)
+    list_filter = ListFilter(args.open, args.min_priority, args.text or "", args.regex)
+    keys = list(document.ordered_keys())
+    if list_filter.active:
+        keys, _ = list_filter.select(document.list_data, keys)
+    for key in keys:
+        out.write(format_entry(key, document.list_data[key]) + "\n")
+    document.close()
+    return 0
+
+
+def cmd_add(args, out):
+    document = open_list(args.data, args.name)
+    keys = [document.add_entry(text, args.priority) for text in args.texts]
+    save(document)
+    out.write("".join(key + "\n" for key in keys))
+    return 0
+
+
+def cmd_complete(args, out):
+    if not args.keys and args.match is None:
+        raise CommandError("name the entries to complete, by key or with --match")
+    document = open_list(args.data, args.name)
+    missing = [key for key in args.keys if key not in document.list_data]
+    if missing:
+        document.close()
+        raise CommandError(f"no entries {', '.join(missing)} in {document.path}")
+    keys = list(args.keys)
+    if args.match is not None:
+        from src.list_filter import ListFilter
+        keys += ListFilter(text=args.match).select(document.list_data, document.list_data)[0]
+    changed = document.set_completed(keys, not args.undo)
+    save(document)
+    out.write(f"{len(changed)} entries marked {'not ' if args.undo else ''}completed\n")
+    return 0
+
+
+def cmd_query(args, out):
+    from src.list_catalog import scan_lists
+    from src.search_index import CACHE_NAME, SearchIndex
+    index = SearchIndex(os.path.join(args.data, CACHE_NAME))
+    index.refresh([descriptor.path for descriptor in scan_lists(args.data)])
+    index.wait()
+    if index.last_error is not None:
+        raise CommandError(f"search failed: {index.last_error}")
+    for hit in index.search(" ".join(args.words), limit=args.limit):
+        name = os.path.splitext(os.path.basename(hit.path))[0]
+        out.write(f"{name}: {hit.key}  {hit.text}\n")
+    return 0
+
+
+def cmd_export(args, out):
+    document = open_list(args.data, args.name, read_only=True)
+    keys = list(document.ordered_keys())
+    entries = document.list_data
+    target = open(args.output, 'w', encoding='utf-8', newline="") if args.output else out
+    try:
+        if args.format == "json":
+            import json
+            json.dump({key: dict(entries[key]) for key in keys}, target, indent=4)
+            target.write("\n")
+        elif args.format == "csv":
+            import csv
+            writer = csv.writer(target)
+            writer.writerow(["key", "text", "priority", "completed"])
+            for key in keys:
+                entry = entries[key]
+                writer.writerow([key, entry['text'], entry['priority'], entry['completed']])
+        else:
+            for key in keys:
+                entry = entries[key]
+                target.write(f"[{'x' if entry['completed'] else ' '}] {entry['text']}\n")
+    finally:
+        if target is not out:
+            target.close()
+        document.close()
+    return 0
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog="zen-lists", description="Read and edit the lists in data/.")
+    parser.add_argument("--data", default=DATA_DIR, help="folder holding the lists (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    show = commands.add_parser("list", help="show every list, or the entries of one")
+    show.add_argument("name", nargs="?", help="list name (file name without extension) or path")
+    show.add_argument("--open", action="store_true", help="leave out completed entries")
+    show.add_argument("--min-priority", type=int, default=1, metavar="N", help="only priority N and above")
+    show.add_argument("--text", help="only entries containing TEXT")
+    show.add_argument("--regex", action="store_true", help="match --text as a regular expression")
+    show.set_defaults(run=cmd_list)
+
+    add = commands.add_parser("add", help="add entries; prints their keys")
+    add.add_argument("name")
+    add.add_argument("texts", nargs="+", metavar="text", help="one entry per argument")
+    add.add_argument("-p", "--priority", type=int, default=1, choices=range(1, 11), metavar="1-10")
+    add.set_defaults(run=cmd_add)
+
+    complete = commands.add_parser("complete", help="mark entries completed")
+    complete.add_argument("name")
+    complete.add_argument("keys", nargs="*", metavar="key")
+    complete.add_argument("--match", metavar="TEXT", help="also every entry containing TEXT")
+    complete.add_argument("--undo", action="store_true", help="mark them not completed instead")
+    complete.set_defaults(run=cmd_complete)
+
+    query = commands.add_parser("query", help="search the text of every list")
+    query.add_argument("words", nargs="+", help="word prefixes an entry must all contain")
+    query.add_argument("--limit", type=int, default=50)
+    query.set_defaults(run=cmd_query)
+
+    export = commands.add_parser("export", help="write a list out, highest priority first")
+    export.add_argument("name")
+    export.add_argument("--format", choices=["json", "csv", "text"], default="json")
+    export.add_argument("-o", "--output", help="file to write (default: standard output)")
+    export.set_defaults(run=cmd_export)
+    return parser
+
+
+def main(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    out = out or sys.stdout
+    try:
+        return args.run(args, out)
+    except (CommandError, OSError, ValueError, re.error) as e:
+        print(f"zen-lists: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
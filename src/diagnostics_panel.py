@@ -0,0 +1,147 @@
+from PyQt5 import QtWidgets, QtCore
+
+from src.instrumentation import StallMonitor, instruments
+
+
+class StallWatch(QtCore.QObject):
+    """Runs a StallMonitor over the Qt event loop: a timer beats while the
+    loop gets through, and only while instruments are enabled."""
+
+    def __init__(self, parent=None, threshold_ms=None):
+        super().__init__(parent)
+        self.monitor = StallMonitor(instruments, threshold_ms)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(self.monitor.interval_ms)
+        self._timer.timeout.connect(self.monitor.beat)
+
+    @property
+    def active(self):
+        return self._timer.isActive()
+
+    def start(self):
+        self.monitor.start()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        self.monitor.stop()
+
+
+###############################################################################
+# DiagnosticsPanel: what the instruments recorded, refreshed while it is
+# shown. Opened by double-clicking the title in CustomTitleBar.
+###############################################################################
+class DiagnosticsPanel(QtWidgets.QDialog):
+    TIMING_HEADERS = ["Path", "Calls", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Total ms"]
+    TIMING_FIELDS = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "total_ms"]
+
+    def __init__(self, stall_watch, parent=None):
+        super().__init__(parent)
+        self.stall_watch = stall_watch
+        self.setWindowTitle("Diagnostics")
+        self.resize(760, 560)
+        self.setStyleSheet("""
+            QWidget { background-color: black; color: white; }
+            QTableWidget { gridline-color: grey; }
+            QHeaderView::section { background-color: black; color: white; }
+        """)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        controls = QtWidgets.QHBoxLayout()
+        self.record_box = QtWidgets.QCheckBox("Record")
+        self.record_box.setChecked(instruments.enabled)
+        self.record_box.toggled.connect(self.set_recording)
+        controls.addWidget(self.record_box)
+        self.status_label = QtWidgets.QLabel()
+        self.export_note = ""
+        controls.addWidget(self.status_label, 1)
+        reset_button = QtWidgets.QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        controls.addWidget(reset_button)
+        export_button = QtWidgets.QPushButton("Export Trace…")
+        export_button.clicked.connect(self.export_trace)
+        controls.addWidget(export_button)
+        layout.addLayout(controls)
+
+        self.timings = QtWidgets.QTableWidget(0, len(self.TIMING_HEADERS))
+        self.timings.setHorizontalHeaderLabels(self.TIMING_HEADERS)
+        self.timings.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.timings.verticalHeader().hide()
+        self.timings.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.timings, 3)
+
+        self.counters = QtWidgets.QTableWidget(0, 2)
+        self.counters.setHorizontalHeaderLabels(["Counter", "Value"])
+        self.counters.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.counters.verticalHeader().hide()
+        self.counters.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.counters, 2)
+
+        layout.addWidget(QtWidgets.QLabel(f"Event loop stalls (over {self.stall_watch.monitor.threshold * 1000:.0f} ms)"))
+        self.stalls = QtWidgets.QPlainTextEdit()
+        self.stalls.setReadOnly(True)
+        self.stalls.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        layout.addWidget(self.stalls, 2)
+
+        # Refreshed only while shown, so a closed panel costs nothing.
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def set_recording(self, enabled):
+        instruments.enable(enabled)
+        if enabled and not self.stall_watch.active:
+            self.stall_watch.start()
+        elif not enabled and self.stall_watch.active:
+            self.stall_watch.stop()
+        self.refresh()
+
+    def reset(self):
+        instruments.reset()
+        self.refresh()
+
+    def export_trace(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Trace", "trace.json",
+                                                        "Trace Event JSON (*.json)")
+        if not path:
+            return
+        try:
+            events = instruments.export(path)
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "Error", f"Could not export trace:\n{e}")
+            return
+        self.export_note = f"; last export: {events:,} events to {path}"
+        self.refresh()
+
+    def refresh(self):
+        snapshot = instruments.snapshot()
+        histograms = snapshot["histograms"]
+        self.timings.setRowCount(len(histograms))
+        for row, (name, summary) in enumerate(histograms.items()):
+            self.timings.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
+            for column, field in enumerate(self.TIMING_FIELDS, 1):
+                value = summary[field]
+                text = f"{value:,}" if field == "count" else f"{value:.3f}"
+                item = QtWidgets.QTableWidgetItem(text)
+                item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                self.timings.setItem(row, column, item)
+        counters = snapshot["counters"]
+        self.counters.setRowCount(len(counters))
+        for row, (name, value) in enumerate(counters.items()):
+            self.counters.setItem(row, 0, QtWidgets.QTableWidgetItem(name))
+            item = QtWidgets.QTableWidgetItem(f"{value:,}")
+            item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+            self.counters.setItem(row, 1, item)
+        self.stalls.setPlainText("\n".join(f"{stall['ms']:.0f} ms at {stall['start_ms'] / 1000:.1f} s:\n{stall['stack']}"
+                                           for stall in reversed(snapshot["stalls"])))
+        state = "recording" if instruments.enabled else "not recording"
+        self.status_label.setText(f"{state}, {len(instruments.events):,} trace events{self.export_note}")
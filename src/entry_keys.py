@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+
+
+###############################################################################
+# Entry keys: new entries are keyed by creation time plus a number naming the
+# process that made them, and increase so a new entry sorts after the rest.
+###############################################################################
+class KeyGenerator:
+    """Monotonic keys for new entries, unique across processes.
+
+    A key is the creation time in milliseconds, three digits counting the
+    entries made within that millisecond, then NODE_DIGITS digits naming the
+    generator, e.g. "179228793364400100482130427". The counter makes every
+    key one generator hands out larger than the one before, as a number and
+    as a string; when a millisecond runs out of counter values the next one
+    is borrowed, so bulk inserts never wait on the clock.
+
+    The generator digits are the process id (seven digits, enough for any
+    Linux pid_max) followed by four random ones, picked on first use and
+    again in a child forked from the process. Processes running at the
+    same time on one machine have different pids, so their keys never
+    collide. Processes on different machines writing the same list (through
+    a sync tool, say) can share a pid. For two of them to pick one key they
+    must then also draw the same four random digits (1 in 10,000) and hand
+    out a key in the same millisecond with the same counter: unlikely, not
+    impossible.
+
+    Lists keep whatever keys they already have (seconds such as
+    "1700000000", names such as "example_entry"); new keys only have to
+    avoid them, which new_keys checks against the list it is given.
+    """
+
+    COUNTER = 1000
+    NODE_DIGITS = 11
+
+    def __init__(self, node=None, clock=time.time_ns):
+        # Without a node of its own the generator names itself after the
+        # process it runs in, and again after a fork: a child must not go on
+        # handing out its parent's keys.
+        self._own_node = node is None
+        self._clock = clock
+        self._pid = None
+        if not self._own_node:
+            self.node = f"{node:0{self.NODE_DIGITS}d}"
+            self._start()
+
+    def _start(self):
+        self._pid = os.getpid()
+        if self._own_node:
+            node = self._pid % 10 ** 7 * 10000 + int.from_bytes(os.urandom(2), "big") % 10000
+            self.node = f"{node:0{self.NODE_DIGITS}d}"
+        self._last = 0
+        # Also fresh after a fork, in case another thread held the old one.
+        self._lock = threading.Lock()
+
+    def _ticks(self, count):
+        # First of count consecutive ticks (milliseconds * COUNTER + counter),
+        # and the node digits to go with them.
+        if self._pid != os.getpid():
+            self._start()
+        with self._lock:
+            first = max(self._clock() // 1_000_000 * self.COUNTER, self._last + 1)
+            self._last = first + count - 1
+            return first, self.node
+
+    def new_key(self, taken=()):
+        while True:
+            tick, node = self._ticks(1)
+            key = f"{tick}{node}"
+            if key not in taken:
+                return key
+
+    def new_keys(self, count, taken=()):
+        """count new keys, in increasing order, none of them in taken."""
+        first, node = self._ticks(count)
+        keys = [f"{tick}{node}" for tick in range(first, first + count)]
+        if taken and any(key in taken for key in keys):
+            # Only if taken has keys from this generator, or one with its digits.
+            keys = [key for key in keys if key not in taken]
+            keys += self.new_keys(count - len(keys), taken)
+        return keys
+
+
+_generator = KeyGenerator()
+new_key = _generator.new_key
+new_keys = _generator.new_keys
@@ -0,0 +1,334 @@
+import threading
+from array import array
+from collections.abc import Mapping, MutableMapping
+
+FIELDS = ("text", "priority", "completed")
+
+
+def _priority_array(values, typecode='h'):
+    # Priorities are small, so two bytes each; a list with one that is not
+    # (files are edited by hand) gets eight-byte ones instead of failing.
+    try:
+        return array(typecode, values)
+    except OverflowError:
+        return array('q', values)
+
+
+class EntryView(Mapping):
+    """Dict-like window onto one entry of an EntryStore.
+
+    Views are cheap and meant to be short-lived: one taken before entries are
+    deleted from the store may point at a different slot afterwards.
+    """
+
+    __slots__ = ("_store", "_slot")
+
+    def __init__(self, store, slot):
+        self._store = store
+        self._slot = slot
+
+    def __getitem__(self, field):
+        return self._store._get(self._slot, field)
+
+    def __setitem__(self, field, value):
+        self._store._set(self._slot, field, value)
+
+    def __iter__(self):
+        yield from FIELDS
+        extra = self._store._extras.get(self._slot)
+        if extra:
+            yield from extra
+
+    def __len__(self):
+        return len(FIELDS) + len(self._store._extras.get(self._slot, ()))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class EntryStore(MutableMapping):
+    """Column-oriented replacement for list_data's dict of entry dicts.
+
+    Each entry occupies one slot: its key and text in two lists, its priority
+    in an array('h') (an array('q') once a priority outgrows that) and its
+    completed flag as one bit of a bytearray, instead of a dict with three
+    keys per entry. Iteration follows insertion order and store[key] returns
+    an EntryView, so callers written against the plain dict (including
+    json/journal code that does store[key]['text'] = ...) keep working. Fields other than the three known ones are kept per entry so a
+    file round-trips unchanged.
+
+    Every change to the columns holds the store's lock, and so does the
+    copy to_dict() takes, so a writer thread can snapshot the store while
+    the GUI thread edits it. Reads on the editing thread need no lock.
+    """
+
+    def __init__(self, data=None):
+        self._lock = threading.RLock()
+        self._reset()
+        if data:
+            self.update(data)
+
+    def _reset(self):
+        self._slot_of = {}          # key -> slot
+        self._keys = []             # slot -> key, None once deleted
+        self._texts = []            # slot -> text
+        self._priorities = array('h')
+        self._completed = bytearray()  # one bit per slot
+        self._extras = {}           # slot -> dict of unknown fields
+        self._holes = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        # Column-at-a-time build; much faster than appending entry by entry.
+        store = cls()
+        keys = list(data)
+        values = list(data.values())
+        store._keys = keys
+        store._slot_of = {key: slot for slot, key in enumerate(keys)}
+        store._texts = [entry.get('text', "") for entry in values]
+        store._priorities = _priority_array([int(entry.get('priority', 1)) for entry in values])
+        completed = bytearray((len(values) + 7) // 8)
+        for slot, entry in enumerate(values):
+            if entry.get('completed'):
+                completed[slot >> 3] |= 1 << (slot & 7)
+            if len(entry) != len(FIELDS) or 'text' not in entry or 'completed' not in entry:
+                extra = {k: v for k, v in entry.items() if k not in FIELDS}
+                if extra:
+                    store._extras[slot] = extra
+        store._completed = completed
+        return store
+
+    def append_batch(self, items):
+        """Add (key, entry dict) pairs a column at a time; returns the new keys.
+
+        Used by the streaming loader, which hands over a batch at a time. A
+        key already in the store replaces its entry in place, as with a dict,
+        and is not returned.
+        """
+        with self._lock:
+            return self._append_batch(items)
+
+    def _append_batch(self, items):
+        slot_of = self._slot_of
+        first = len(self._keys)
+        fresh = []
+        for key, entry in items:
+            slot = slot_of.get(key)
+            if slot is None:
+                slot_of[key] = first + len(fresh)
+                fresh.append((key, entry))
+            elif slot >= first:
+                fresh[slot - first] = (key, entry)  # repeated within the batch
+            else:
+                self[key] = entry
+        if not fresh:
+            return []
+        keys = [key for key, _ in fresh]
+        self._keys.extend(keys)
+        self._texts.extend(entry.get('text', "") for _, entry in fresh)
+        self._extend_priorities([int(entry.get('priority', 1)) for _, entry in fresh])
+        completed = self._completed
+        completed.extend(bytes((first + len(fresh) + 7) // 8 - len(completed)))
+        for slot, (_, entry) in enumerate(fresh, first):
+            if entry.get('completed'):
+                completed[slot >> 3] |= 1 << (slot & 7)
+            if len(entry) != len(FIELDS) or 'text' not in entry or 'completed' not in entry:
+                extra = {k: v for k, v in entry.items() if k not in FIELDS}
+                if extra:
+                    self._extras[slot] = extra
+        return keys
+
+    # -- slot level -------------------------------------------------------
+    def _extend_priorities(self, values):
+        # Callers hold the lock. Built apart first, so a value too large for
+        # the column leaves it as it was until it is widened.
+        column = self._priorities
+        values = _priority_array(values, column.typecode)
+        if values.typecode != column.typecode:
+            column = self._priorities = array('q', column)
+        column.extend(values)
+
+    def _append(self, key, entry):
+        # Callers hold the lock.
+        slot = len(self._keys)
+        self._slot_of[key] = slot
+        self._keys.append(key)
+        self._texts.append(entry.get('text', ""))
+        priority = int(entry.get('priority', 1))
+        try:
+            self._priorities.append(priority)
+        except OverflowError:
+            self._priorities = array('q', self._priorities)
+            self._priorities.append(priority)
+        if slot % 8 == 0:
+            self._completed.append(0)
+        if entry.get('completed'):
+            self._completed[slot >> 3] |= 1 << (slot & 7)
+        extra = {k: v for k, v in entry.items() if k not in FIELDS}
+        if extra:
+            self._extras[slot] = extra
+        return slot
+
+    def _get(self, slot, field):
+        if field == 'text':
+            return self._texts[slot]
+        if field == 'priority':
+            return self._priorities[slot]
+        if field == 'completed':
+            return bool(self._completed[slot >> 3] & (1 << (slot & 7)))
+        return self._extras[slot][field]
+
+    def _set(self, slot, field, value):
+        with self._lock:
+            self._set_unlocked(slot, field, value)
+
+    def _set_unlocked(self, slot, field, value):
+        if field == 'text':
+            self._texts[slot] = value
+        elif field == 'priority':
+            value = int(value)
+            try:
+                self._priorities[slot] = value
+            except OverflowError:
+                self._priorities = array('q', self._priorities)
+                self._priorities[slot] = value
+        elif field == 'completed':
+            if value:
+                self._completed[slot >> 3] |= 1 << (slot & 7)
+            else:
+                self._completed[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+        else:
+            self._extras.setdefault(slot, {})[field] = value
+
+    def _compact(self):
+        # Drop deleted slots once they make up most of the columns. Callers
+        # hold the lock.
+        live = [slot for slot, key in enumerate(self._keys) if key is not None]
+        entries = [(self._keys[slot], self.entry_dict(slot)) for slot in live]
+        self._reset()
+        for key, entry in entries:
+            self._append(key, entry)
+
+    def entry_dict(self, slot):
+        entry = {
+            "text": self._texts[slot],
+            "priority": self._priorities[slot],
+            "completed": bool(self._completed[slot >> 3] & (1 << (slot & 7))),
+        }
+        extra = self._extras.get(slot)
+        if extra:
+            entry.update(extra)
+        return entry
+
+    # -- mapping interface ------------------------------------------------
+    def __getitem__(self, key):
+        return EntryView(self, self._slot_of[key])
+
+    def __setitem__(self, key, entry):
+        entry = dict(entry)
+        with self._lock:
+            slot = self._slot_of.get(key)
+            if slot is None:
+                self._append(key, entry)
+                return
+            # Replacing an entry keeps its position, as with a dict.
+            self._extras.pop(slot, None)
+            for field, value in entry.items():
+                self._set_unlocked(slot, field, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            slot = self._slot_of.pop(key)
+            self._keys[slot] = None
+            self._texts[slot] = None
+            self._extras.pop(slot, None)
+            self._set_unlocked(slot, 'completed', False)
+            self._holes += 1
+            if self._holes > 1024 and self._holes * 2 > len(self._keys):
+                self._compact()
+
+    def __iter__(self):
+        return (key for key in list(self._keys) if key is not None)
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, key):
+        return key in self._slot_of
+
+    def __repr__(self):
+        return f"EntryStore({len(self)} entries)"
+
+    # -- bulk helpers -----------------------------------------------------
+    def priority(self, key):
+        return self._priorities[self._slot_of[key]]
+
+    def priority_items(self):
+        """(key, priority) pairs in insertion order, without building views."""
+        priorities = self._priorities
+        return [(key, priorities[slot]) for slot, key in enumerate(self._keys) if key is not None]
+
+    def text_items(self):
+        """(key, text) pairs in insertion order, without building views."""
+        texts = self._texts
+        return [(key, texts[slot]) for slot, key in enumerate(self._keys) if key is not None]
+
+    def select(self, keys, hide_completed=False, min_priority=None, text_match=None, limit=None):
+        """Keys from the iterable keys whose entry passes every given test.
+
+        Reads the columns directly instead of building a view per entry and
+        stops after limit matches. Returns (matching keys, keys examined).
+        """
+        slot_of, texts, priorities, completed = self._slot_of, self._texts, self._priorities, self._completed
+        found = []
+        examined = 0
+        for key in keys:
+            examined += 1
+            slot = slot_of[key]
+            if hide_completed and completed[slot >> 3] & (1 << (slot & 7)):
+                continue
+            if min_priority is not None and priorities[slot] < min_priority:
+                continue
+            if text_match is not None and not text_match(texts[slot]):
+                continue
+            found.append(key)
+            if limit is not None and len(found) >= limit:
+                break
+        return found, examined
+
+    def completed_keys(self):
+        completed = self._completed
+        return [key for slot, key in enumerate(self._keys)
+                if key is not None and completed[slot >> 3] & (1 << (slot & 7))]
+
+    def delete_keys(self, keys):
+        for key in keys:
+            if key in self._slot_of:
+                del self[key]
+
+    def to_dict(self):
+        """Plain dict of entry dicts, in insertion order, for serialization.
+
+        Safe to call from a writer thread while the GUI thread edits: the
+        columns are copied under the store's lock, so the result is the store
+        as it was at one moment, and the dict is built from the copies after
+        the lock is released.
+        """
+        with self._lock:
+            keys, texts, priorities = list(self._keys), list(self._texts), self._priorities[:]
+            completed = bytes(self._completed)
+            extras = {slot: dict(extra) for slot, extra in self._extras.items()}
+        data = {}
+        for slot, key in enumerate(keys):
+            if key is None:
+                continue
+            entry = {
+                "text": texts[slot],
+                "priority": priorities[slot],
+                "completed": bool(completed[slot >> 3] & (1 << (slot & 7))),
+            }
+            extra = extras.get(slot)
+            if extra:
+                entry.update(extra)
+            data[key] = entry
+        return data
@@ -0,0 +1,122 @@
+import os
+
+from PyQt5 import QtCore
+
+from src import settings
+from src.persistence import file_signature
+
+
+class FileWatcher(QtCore.QObject):
+    """QFileSystemWatcher that reports each changed path once per burst.
+
+    Other programs often write a file in several steps, or many times in a
+    row; changed(path) is emitted delay_ms after the first change of a burst
+    rather than on every one, so a storm of writes costs one reload per
+    delay at most.
+
+    The platform watcher follows a file's inode, and a file replaced by
+    os.replace is a new inode it silently stops seeing. So a watched file's
+    directory is watched too: a directory event reports each watched file in
+    it whose file_signature moved, and the file itself is watched afresh.
+    """
+
+    changed = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None, delay_ms=None):
+        super().__init__(parent)
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._file_changed)
+        self._watcher.directoryChanged.connect(self._directory_changed)
+        self._directories = set()  # directories watched for their own sake
+        self._files = {}           # file -> file_signature when last reported
+        self._parents = {}         # directory -> watched files in it
+        self._touched = set()      # paths whose own watch fired
+        self._suspects = set()     # files whose directory changed
+        # Started by the first change of a burst and not pushed back by the
+        # rest, so a steady stream of writes is still reported every delay.
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(settings.WATCH_DELAY_MS if delay_ms is None else delay_ms)
+        self._timer.timeout.connect(self._report)
+        self.bursts = 0
+        self.events = 0
+
+    def watch(self, path):
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            self._directories.add(path)
+            self._watcher.addPath(path)
+            return
+        self._files[path] = file_signature(path)
+        directory = os.path.dirname(path)
+        self._parents.setdefault(directory, set()).add(path)
+        if os.path.isdir(directory) and directory not in self._watcher.directories():
+            self._watcher.addPath(directory)
+        self._rearm(path)
+
+    def unwatch(self, path):
+        path = os.path.abspath(path)
+        self._touched.discard(path)
+        self._suspects.discard(path)
+        if path in self._directories:
+            self._directories.discard(path)
+            if path not in self._parents:
+                self._watcher.removePath(path)
+            return
+        if self._files.pop(path, False) is False:
+            return
+        if path in self._watcher.files():
+            self._watcher.removePath(path)
+        directory = os.path.dirname(path)
+        siblings = self._parents.get(directory, set())
+        siblings.discard(path)
+        if not siblings:
+            self._parents.pop(directory, None)
+            if directory not in self._directories and directory in self._watcher.directories():
+                self._watcher.removePath(directory)
+
+    def clear(self):
+        for path in list(self._files) + list(self._directories):
+            self.unwatch(path)
+        self._timer.stop()
+
+    def _rearm(self, path):
+        # Drop whatever inode the platform watcher had and follow the current one.
+        if path in self._watcher.files():
+            self._watcher.removePath(path)
+        if os.path.exists(path):
+            self._watcher.addPath(path)
+
+    def _file_changed(self, path):
+        self.events += 1
+        if path in self._files:
+            self._touched.add(path)
+            self._start()
+
+    def _directory_changed(self, path):
+        self.events += 1
+        if path in self._directories:
+            self._touched.add(path)
+        self._suspects.update(self._parents.get(path, ()))
+        self._start()
+
+    def _start(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _report(self):
+        touched, self._touched = self._touched, set()
+        suspects, self._suspects = self._suspects, set()
+        self.bursts += 1
+        for path in touched - self._files.keys():
+            if path in self._directories:
+                self.changed.emit(path)
+        for path in touched | suspects:
+            if path not in self._files:
+                continue
+            signature = file_signature(path)
+            if path not in touched and signature == self._files[path]:
+                continue  # Another file in the directory changed.
+            self._files[path] = signature
+            self._rearm(path)
+            self.changed.emit(path)
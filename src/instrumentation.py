@@ -0,0 +1,244 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+from functools import wraps
+
+from src import settings
+
+
+class Histogram:
+    """Durations of one hot path, in power-of-two buckets of microseconds.
+
+    Bucket i holds calls that took under 2**i us (bucket 0: under 1 us), so
+    a histogram is a fixed 32 ints however many calls it has seen, and a
+    percentile is exact to within a factor of two.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * self.BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound, in seconds, of the bucket holding the given fraction of calls."""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= wanted:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            "buckets_us": {f"<{1 << i}": n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class Stall:
+    """One stretch the GUI event loop spent inside a single callback."""
+
+    __slots__ = ("start", "seconds", "stack")
+
+    def __init__(self, start, seconds, stack):
+        self.start = start      # perf_counter when the loop last got through
+        self.seconds = seconds
+        self.stack = stack      # the GUI thread's stack while it was stuck
+
+    def __repr__(self):
+        return f"Stall({self.seconds * 1000:.0f} ms)"
+
+
+###############################################################################
+# Instruments: histograms, counters, stalls and a trace of recent calls for
+# the hot paths. Off unless settings.INSTRUMENT is set (or the diagnostics
+# panel turns it on); while off, a timed function costs one flag check.
+###############################################################################
+class Instruments:
+    """Where the time goes, recorded only while enabled.
+
+    @timed("name") functions add their duration to a Histogram and, as a
+    complete ("X") event, to a bounded trace of recent calls; count() bumps
+    a counter and traces its new value. export() writes the trace in the
+    Trace Event format, which chrome://tracing and Perfetto open.
+    """
+
+    def __init__(self, enabled=False, trace_events=None):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.histograms = {}   # name -> Histogram
+        self.counters = {}     # name -> int
+        self.stalls = deque(maxlen=100)
+        self.events = deque(maxlen=settings.TRACE_EVENTS if trace_events is None else trace_events)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.stalls.clear()
+            self.events.clear()
+
+    def _us(self, when):
+        return (when - self.origin) * 1e6
+
+    def record(self, name, start, seconds, args=None):
+        """One call of name that began at start (perf_counter) and took seconds."""
+        event = {"name": name, "ph": "X", "ts": self._us(start), "dur": seconds * 1e6,
+                 "pid": self._pid, "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            self.events.append(event)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            value = self.counters[name] = self.counters.get(name, 0) + n
+            self.events.append({"name": name, "ph": "C", "ts": self._us(time.perf_counter()),
+                                "pid": self._pid, "args": {name: value}})
+
+    def timed(self, name):
+        """Decorator recording each call of the function under name."""
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, start, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def add_stall(self, stall):
+        with self._lock:
+            self.stalls.append(stall)
+            self.events.append({"name": "event loop stall", "ph": "X", "ts": self._us(stall.start),
+                                "dur": stall.seconds * 1e6, "pid": self._pid, "tid": main_thread_id(),
+                                "args": {"stack": stall.stack}})
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "histograms": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "stalls": [{"start_ms": (s.start - self.origin) * 1000, "ms": s.seconds * 1000, "stack": s.stack}
+                           for s in self.stalls],
+            }
+
+    def export(self, path):
+        """Write the trace and a summary as a Trace Event JSON file; returns
+        the number of events written."""
+        import json
+        summary = self.snapshot()
+        with self._lock:
+            events = list(self.events)
+        names = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": thread.ident,
+                  "args": {"name": thread.name}} for thread in threading.enumerate()]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": names + events, "displayTimeUnit": "ms", "otherData": summary}, f)
+        return len(events)
+
+
+def main_thread_id():
+    return threading.main_thread().ident
+
+
+def thread_stack(thread_id):
+    """The current stack of another thread, innermost call last."""
+    import traceback
+    frame = sys._current_frames().get(thread_id)
+    return "".join(traceback.format_stack(frame)) if frame is not None else ""
+
+
+class StallMonitor:
+    """Watches an event loop for callbacks that hold it longer than threshold.
+
+    The loop calls beat() from a timer that fires every interval; a watchdog
+    thread notices when beats stop for threshold and takes the loop thread's
+    stack right then, i.e. inside the callback that is stuck. When the loop
+    gets through again the stall is added to instruments and logged.
+    """
+
+    def __init__(self, instruments, threshold_ms=None, thread_id=None):
+        self.instruments = instruments
+        self.threshold = (settings.STALL_THRESHOLD_MS if threshold_ms is None else threshold_ms) / 1000
+        self.thread_id = thread_id or main_thread_id()
+        self.last_beat = time.perf_counter()
+        self._stack = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self.last_beat = time.perf_counter()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="stall-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def interval_ms(self):
+        # Beats come a few times per threshold, so a late one means a stall.
+        return max(1, int(self.threshold * 1000 / 5))
+
+    def beat(self):
+        now = time.perf_counter()
+        last, self.last_beat = self.last_beat, now
+        stack, self._stack = self._stack, None
+        if stack is not None and now - last >= self.threshold:
+            stall = Stall(last, now - last, stack)
+            self.instruments.add_stall(stall)
+            import logging
+            logging.getLogger(__name__).warning("event loop stalled for %.0f ms in:\n%s",
+                                                stall.seconds * 1000, stack)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 4):
+            if self._stack is None and time.perf_counter() - self.last_beat > self.threshold:
+                self._stack = thread_stack(self.thread_id)
+
+
+instruments = Instruments(enabled=settings.INSTRUMENT
+                          or os.environ.get("ZEN_LISTS_INSTRUMENT", "").strip().lower() not in ("", "0", "false", "no", "off"))
+timed = instruments.timed
@@ -0,0 +1,324 @@
+import os
+import abc
+import json
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only one instance should use journal mode there.
+    fcntl = None
+
+from src import settings
+from src.instrumentation import instruments
+from src.persistence import write_json_atomic
+
+log = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+# A journal being folded into the snapshot; replayed if a compaction died.
+COMPACTING_SUFFIX = ".journal.old"
+# Held by whichever instance is compacting the list's journal.
+LOCK_SUFFIX = ".journal.lock"
+
+
+def journal_path(json_path):
+    return json_path + JOURNAL_SUFFIX
+
+
+def remove_journal_files(json_path):
+    for path in (json_path + JOURNAL_SUFFIX, json_path + COMPACTING_SUFFIX, json_path + LOCK_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def apply_record(data, record):
+    """Apply one journal record to a list dict.
+
+    Every record carries absolute values, so replaying a journal onto a
+    snapshot that already contains some of its effects is harmless.
+    """
+    op = record.get("op")
+    if op == "create":
+        data[record["key"]] = dict(record["entry"])
+    elif op == "create_many":
+        for key, entry in record["entries"]:
+            data[key] = dict(entry)
+    elif op in ("text", "priority", "completed"):
+        entry = data.get(record["key"])
+        if entry is not None:
+            entry[op] = record["value"]
+    elif op == "set_many":
+        field, value = record["field"], record["value"]
+        for key in record["keys"]:
+            entry = data.get(key)
+            if entry is not None:
+                entry[field] = value
+    elif op in ("delete", "clear_completed"):
+        for key in record["keys"]:
+            data.pop(key, None)
+
+
+def replay(data, json_path):
+    """Apply any journal left next to json_path to data; returns records applied."""
+    applied = 0
+    for path in (json_path + COMPACTING_SUFFIX, json_path + JOURNAL_SUFFIX):
+        if os.path.exists(path):
+            applied += _replay_file(data, path)
+    return applied
+
+
+def _replay_file(data, path):
+    applied = 0
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-append.
+                break
+            apply_record(data, record)
+            applied += 1
+    return applied
+
+
+def _lock(f, blocking=True):
+    # Raises BlockingIOError if not blocking and another process holds it.
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def has_journal(json_path):
+    return os.path.exists(json_path + JOURNAL_SUFFIX) or os.path.exists(json_path + COMPACTING_SUFFIX)
+
+
+class RecordLog(abc.ABC):
+    """The edit log interface ListDocument writes to, one record per edit in
+    the format apply_record reads. Subclasses say where a record goes by
+    defining append(record): ListJournal appends it to the journal file,
+    sync_client.SyncLog hands it to the sync daemon.
+    """
+
+    @abc.abstractmethod
+    def append(self, record):
+        """Take one record; called once per edit."""
+
+    def create(self, key, entry):
+        self.append({"op": "create", "key": key, "entry": dict(entry)})
+
+    def set_field(self, key, field, value):
+        self.append({"op": field, "key": key, "value": value})
+
+    def create_many(self, entries):
+        """One record for a batch of (key, entry) pairs."""
+        self.append({"op": "create_many", "entries": [[key, dict(entry)] for key, entry in entries]})
+
+    def set_fields(self, keys, field, value):
+        """One record setting field to value on every key."""
+        self.append({"op": "set_many", "keys": list(keys), "field": field, "value": value})
+
+    def delete(self, keys):
+        self.append({"op": "delete", "keys": list(keys)})
+
+    def clear_completed(self, keys):
+        self.append({"op": "clear_completed", "keys": list(keys)})
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class ListJournal(RecordLog):
+    """Append-only operation log for one list file.
+
+    Each edit appends one small JSON line, so the cost of a change no longer
+    depends on the list size. Once the journal passes compact_bytes it is set
+    aside and folded into the JSON snapshot on a background thread.
+
+    Several instances may share a list. Appends hold an flock on the journal
+    and follow it to a new inode once a compaction has set it aside, and a
+    compaction folds the journal into the JSON file as it is on disk, not
+    into this instance's entries, so every instance's records end up in
+    the snapshot. One instance compacts at a time (the .journal.lock file);
+    the others notice through unchanged() and the file guard that the list
+    moved on and merge it in (ListDocument.check_disk).
+    """
+
+    def __init__(self, json_path, compact_bytes=None, fsync=None, guard=None, on_error=None):
+        self.json_path = json_path
+        self.compact_bytes = settings.JOURNAL_COMPACT_BYTES if compact_bytes is None else compact_bytes
+        self.fsync = settings.FSYNC_WRITES if fsync is None else fsync
+        # Compaction rewrites the JSON file; see persistence.DiskGuard.
+        self.guard = guard
+        self.records_appended = 0
+        self.bytes_appended = 0
+        self.compactions = 0
+        self.last_error = None
+        # Told about a failed compaction (the journal is kept, so no edit is
+        # lost), and with None once one succeeds again.
+        self.on_error = on_error
+        self._file = None
+        self._lock = threading.Lock()
+        self._compactor = None
+        # The journal as last read or appended to by us alone.
+        self._seen = self.signature()
+
+    @property
+    def path(self):
+        return self.json_path + JOURNAL_SUFFIX
+
+    def signature(self):
+        """Inode and size of the journal, or None if there is none."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size) if st.st_size else None
+
+    def unchanged(self):
+        """False if another instance appended since we last looked."""
+        return self.signature() == self._seen
+
+    def seen(self, signature=None):
+        """Record the journal as read by us (now, or as of signature)."""
+        self._seen = self.signature() if signature is None else signature
+
+    def _open(self):
+        # The journal, locked for an append, and its stat. Callers hold self._lock.
+        while True:
+            if self._file is None:
+                self._file = open(self.path, 'a')
+            _lock(self._file)
+            st = os.fstat(self._file.fileno())
+            try:
+                if os.stat(self.path).st_ino == st.st_ino:
+                    return self._file, st
+            except FileNotFoundError:
+                pass
+            # A compaction set the journal aside after we opened it.
+            _unlock(self._file)
+            self._file.close()
+            self._file = None
+
+    def append(self, record):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self._lock:
+            f, st = self._open()
+            try:
+                before = (st.st_ino, st.st_size) if st.st_size else None
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+                size = st.st_size + len(line)
+            finally:
+                _unlock(f)
+            if before == self._seen:
+                # Nobody else appended since we last looked.
+                self._seen = (st.st_ino, size)
+            self.records_appended += 1
+            self.bytes_appended += len(line)
+            should_compact = size >= self.compact_bytes
+        instruments.count("journal records")
+        instruments.count("journal bytes", len(line))
+        if should_compact:
+            self.compact()
+
+    def compact(self, wait=False):
+        """Fold the journal into the JSON snapshot; in the background unless wait."""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                if not wait:
+                    return
+                compactor = self._compactor
+            else:
+                compactor = self._compactor = threading.Thread(
+                    target=self._write_snapshot, name="journal-compactor", daemon=True)
+                compactor.start()
+        if wait:
+            compactor.join()
+
+    def _write_snapshot(self):
+        try:
+            with open(self.json_path + LOCK_SUFFIX, 'a') as lock:
+                try:
+                    _lock(lock, blocking=False)
+                except BlockingIOError:
+                    return  # Another instance is compacting; ours go in with its.
+                try:
+                    self._fold()
+                finally:
+                    _unlock(lock)
+        except Exception as e:
+            self.last_error = e
+            log.warning("compacting the journal of %s failed: %s", self.json_path, e)
+            if self.on_error is not None:
+                self.on_error(e)
+        else:
+            if self.last_error is not None:
+                self.last_error = None
+                if self.on_error is not None:
+                    self.on_error(None)
+
+    def _fold(self):
+        old = self.json_path + COMPACTING_SUFFIX
+        with self._lock:
+            if os.path.exists(old):
+                # A previous compaction never finished; fold it first.
+                ours = None
+            elif os.path.exists(self.path):
+                os.replace(self.path, old)
+                ours, self._seen = self._seen, None
+            else:
+                return
+        with open(old, 'r') as f:
+            # An append that opened the journal before the rename still holds
+            # it; once it is done, any other finds the journal gone and
+            # starts a fresh one.
+            _lock(f)
+            _unlock(f)
+            st = os.fstat(f.fileno())
+        # Only the file as it is on disk has every instance's records.
+        from src.storage import engine_for  # storage imports this module
+        try:
+            data = engine_for(self.json_path).read(self.json_path)
+        except FileNotFoundError:
+            data = {}
+        mine = (ours == (st.st_ino, st.st_size) and
+                (self.guard is None or self.guard.unchanged()))
+        _replay_file(data, old)
+        # New edits keep going to a fresh journal; the old one is only
+        # removed once a snapshot containing its effects is on disk.
+        write_json_atomic(self.json_path, data, self.fsync)
+        if self.guard is not None and mine:
+            # Nothing in it we had not applied already: the file holds just
+            # what this instance holds.
+            self.guard.seen()
+        os.remove(old)
+        self.compactions += 1
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,50 @@
+import os
+
+from src.storage import engine_for, is_list_file
+
+
+class ListDescriptor:
+    """What MainWindow knows about a list that has no ListTab built.
+
+    Only a stat() is needed to make one; the entry count is read from the
+    file the first time it is asked for.
+    """
+
+    __slots__ = ("path", "name", "mtime", "_entry_count", "_counted_mtime")
+
+    def __init__(self, path, mtime=None, entry_count=None):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        if mtime is None:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                mtime = 0.0
+        self.mtime = mtime
+        self._entry_count = entry_count
+        self._counted_mtime = mtime if entry_count is not None else None
+
+    @property
+    def entry_count(self):
+        if self._entry_count is None or self._counted_mtime != self.mtime:
+            self._entry_count = count_entries(self.path)
+            self._counted_mtime = self.mtime
+        return self._entry_count
+
+    def __repr__(self):
+        return f"ListDescriptor({self.path!r})"
+
+
+def count_entries(path):
+    return engine_for(path).count(path)
+
+
+def scan_lists(base_dir):
+    """Descriptors for every list file in base_dir, sorted by file name."""
+    descriptors = []
+    with os.scandir(base_dir) as it:
+        for dir_entry in it:
+            if is_list_file(dir_entry.name) and dir_entry.is_file():
+                descriptors.append(ListDescriptor(dir_entry.path, dir_entry.stat().st_mtime))
+    descriptors.sort(key=lambda d: os.path.basename(d.path))
+    return descriptors
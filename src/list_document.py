@@ -0,0 +1,457 @@
+import errno
+import os
+
+from src import journal, settings
+from src.entry_keys import new_key, new_keys
+from src.entry_store import EntryStore
+from src.instrumentation import timed
+from src.list_loader import parse_list
+from src.persistence import DiskGuard, ListWriter, file_signature, snapshot
+from src.priority_index import PriorityIndex
+from src.startup_profile import profile
+from src.storage import engine_for
+
+
+def default_list():
+    """What a new or empty list file starts out with."""
+    return {
+        "example_entry": {
+            "text": "Example Entry",
+            "priority": 5,
+            "completed": False
+        }
+    }
+
+
+class Merge:
+    """The keys check_disk (or apply_delta) changed in list_data, for a view to follow.
+
+    moved entries had their priority changed, so their rows move as well.
+    """
+
+    __slots__ = ("removed", "added", "changed", "moved")
+
+    def __init__(self, removed=(), added=(), changed=(), moved=()):
+        self.removed = list(removed)
+        self.added = list(added)
+        self.changed = list(changed)
+        self.moved = list(moved)
+
+    def __len__(self):
+        return len(self.removed) + len(self.added) + len(self.changed) + len(self.moved)
+
+    def __repr__(self):
+        return (f"Merge(removed={len(self.removed)}, added={len(self.added)}, "
+                f"changed={len(self.changed)}, moved={len(self.moved)})")
+
+
+###############################################################################
+# ListDocument: one list file and its entries, with no GUI attached. ListTab
+# shows one in a table; the command-line tool (src/cli.py) edits one directly.
+###############################################################################
+class ListDocument:
+    """A list's entries and everything that keeps its file in step with them.
+
+    Edits go through the methods here: each updates list_data, hands the
+    change to the file (a coalesced whole-file write, or one record in the
+    storage engine's edit log) and to the search index, then returns the
+    keys it touched so a view can update just their rows.
+
+    Nothing overwrites the file once another program has changed it: the
+    write is held back, on_conflict is called (on the writing thread) and
+    check_disk merges the other program's entries in first.
+
+    A write that fails is retried until it goes through; on_write_error is
+    called (on the writing thread) with the error, and with None once
+    writes work again.
+
+    With read_only set, opening never writes or renames the file: a
+    missing file raises FileNotFoundError and an unreadable one ValueError
+    instead of being replaced by the example list. Such a document is for
+    reading: it has no edit log and its writer is never scheduled, so an
+    edit changes the entries in memory and nothing on disk.
+    """
+
+    def __init__(self, path, parsed=None, search_index=None, on_conflict=None, stream=False, edit_log=None,
+                 on_write_error=None, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        # How the file is read and written, picked by its extension.
+        self.storage = engine_for(path)
+        # parsed is a ParsedList already read off the caller's thread, if any.
+        if parsed is None:
+            parsed = parse_list(path)
+        # A very large file is not parsed up front. With stream set the
+        # document starts empty and the caller feeds it batches (see
+        # append_streamed); otherwise it is streamed in here and now.
+        self.loading = parsed.stream
+        self.load_error = None
+        # An edit_log passed in owns the file; load_json goes through it too.
+        self.journal = edit_log
+        # The file as read; load_json updates it if it has to write the file.
+        self._loaded_signature = parsed.signature
+        # Entries are held column-wise; list_data still behaves like the dict.
+        if self.loading:
+            self.list_data = EntryStore()
+        else:
+            self.list_data = EntryStore.from_dict(self.load_json(parsed))
+        # Cross-list search index, told about every change to entry text.
+        self.search_index = search_index
+        if search_index is not None and not self.loading and self.load_error is None:
+            search_index.track(path, self.list_data)
+        # Edits are written to disk in the background, coalesced per burst,
+        # or handed one at a time to the storage engine's edit log: the
+        # journal in journal mode, row updates for a .sqlite list. An
+        # edit_log passed in takes every edit instead (the sync daemon's,
+        # which owns the file then; see src/sync_client.py).
+        self.guard = DiskGuard(path, self._loaded_signature, on_conflict=on_conflict)
+        self.on_write_error = on_write_error
+        self.writer = ListWriter(path, lambda: self.list_data, write=self.storage.write, guard=self.guard,
+                                 on_error=on_write_error)
+        if edit_log is None and not read_only:
+            edit_log = self.storage.edit_log(path, lambda: self.list_data, guard=self.guard,
+                                             on_error=on_write_error)
+        self.journal = edit_log
+        # Keys edited since the last whole-file write, with writer.edits_requested
+        # as of the edit; a merge keeps them as they are here.
+        self._unsaved = {}
+        self.reloads = 0
+        if self.loading and not stream:
+            from src.stream_loader import iter_batches
+            try:
+                for batch in iter_batches(path):
+                    self.append_streamed(batch)
+            except (OSError, ValueError) as e:
+                self.finish_loading(e)
+            else:
+                self.finish_loading()
+
+    @property
+    def writable(self):
+        """False while entries are still streaming in, if some could not be
+        read, or if the document was opened read_only."""
+        return not self.loading and self.load_error is None and not self.read_only
+
+    @timed("ListDocument.load_json")
+    def load_json(self, parsed=None):
+        if parsed is None:
+            parsed = parse_list(self.path)
+        profile.add(f"parse {os.path.basename(self.path)}", parsed.seconds)
+        if parsed.error is not None:
+            if self.read_only:
+                raise parsed.error
+            # Not malformed, just unreadable for now: leave the file alone
+            # and the document empty and unwritable, as after a failed stream.
+            self.load_error = parsed.error
+            return {}
+        if self.read_only:
+            if parsed.missing:
+                raise FileNotFoundError(errno.ENOENT, "no such list", self.path)
+            if parsed.corrupt:
+                raise ValueError(f"{self.path} is not a list file")
+            return parsed.data
+        # If the file doesn’t exist or is empty, create a default entry.
+        if parsed.missing:
+            data = default_list()
+            self.storage.write(self.path, data)
+            self._loaded_signature = file_signature(self.path)
+            return data
+        data = parsed.data
+        if parsed.corrupt:
+            # Keep the unreadable file around rather than overwriting it.
+            os.replace(self.path, self.path + ".corrupt")
+            data = {}
+        if parsed.replayed and not settings.JOURNAL_MODE:
+            # Fold a journal left by journal mode back into plain JSON.
+            self.storage.write(self.path, data)
+            journal.remove_journal_files(self.path)
+            self._loaded_signature = file_signature(self.path)
+        if not data:
+            data.update(default_list())
+            if self.journal is not None:
+                self.journal.create_many(data.items())
+            else:
+                self.storage.write(self.path, data)
+                self._loaded_signature = file_signature(self.path)
+        return data
+
+    # -- streaming a large file in --------------------------------------------
+    def append_streamed(self, batch):
+        """Add a batch of (key, entry) pairs read from the file; returns their keys."""
+        return self.list_data.append_batch(batch)
+
+    def finish_loading(self, error=None):
+        """The whole file is in (or error stopped it); True if a journal was
+        replayed over what streamed in, which a view must show afresh."""
+        self.loading = False
+        if error is not None:
+            # Keep what was read, but never write it over the file it came from.
+            self.load_error = error
+            return False
+        replayed = journal.has_journal(self.path) and journal.replay(self.list_data, self.path) > 0
+        if replayed and not settings.JOURNAL_MODE and not self.read_only:
+            # Fold a journal left by journal mode back into plain JSON.
+            self.storage.write(self.path, snapshot(self.list_data))
+            journal.remove_journal_files(self.path)
+            self.guard.seen()
+        if self.search_index is not None:
+            self.search_index.track(self.path, self.list_data)
+        return replayed
+
+    # -- keeping the file in step ----------------------------------------------
+    @timed("ListDocument.update_json")
+    def update_json(self, keys=()):
+        self.writer.schedule()
+        generation = self.writer.edits_requested
+        for key in keys:
+            self._unsaved[key] = generation
+
+    def _log(self, keys, record):
+        # One record in the edit log if there is one, otherwise a file write;
+        # neither for a read_only document.
+        if self.read_only:
+            return
+        if self.journal is not None:
+            record(self.journal)
+        else:
+            self.update_json(keys)
+
+    def unsaved_keys(self):
+        """Keys edited here whose change has not reached the file yet."""
+        written = self.writer.edits_written
+        self._unsaved = {key: g for key, g in self._unsaved.items() if g > written}
+        return set(self._unsaved)
+
+    @timed("ListDocument.check_disk")
+    def check_disk(self):
+        """Merge in changes another program made to the file.
+
+        Returns the Merge, or None if the file had no changes (or could not
+        be read right now).
+        """
+        if not self.writable:
+            return None
+        if self.journal is not None:
+            # Our own edits reach the file (or its journal) first. One that
+            # cannot is reported and retried by the log; merge anyway.
+            try:
+                self.journal.flush()
+            except Exception:
+                pass
+        # In journal mode another instance may have appended to the journal.
+        shared = self.journal if isinstance(self.journal, journal.ListJournal) else None
+        if self.guard.unchanged() and (shared is None or shared.unchanged()):
+            return None
+        journal_signature = shared.signature() if shared is not None else None
+        signature = file_signature(self.path)
+        if signature is None:
+            return None  # Deleted; whoever lists data/ drops the list.
+        try:
+            data = self.storage.read(self.path)
+        except (OSError, ValueError):
+            return None  # Caught mid-write; its last write brings us back here.
+        if journal.has_journal(self.path):
+            journal.replay(data, self.path)
+        self.reloads += 1
+        keep = self.unsaved_keys()
+        merge = self.merge_entries(data, keep)
+        # Only now may writes go ahead: one let through before the merge
+        # would put the old entries back over the other program's.
+        self.guard.seen(signature)
+        if shared is not None:
+            shared.seen(journal_signature)
+        if keep:
+            # Their write was held back; it can go ahead now the file is merged.
+            self.writer.schedule()
+        return merge
+
+    def merge_entries(self, data, keep=()):
+        """Make list_data match data key by key, leaving the keys in keep alone."""
+        removed = [key for key in self.list_data if key not in data and key not in keep]
+        return self._merge(removed, ((key, entry) for key, entry in data.items() if key not in keep))
+
+    def apply_delta(self, put, removed=()):
+        """Apply entries changed elsewhere, as the sync daemon reports them:
+        put maps keys to whole entries to add or overwrite, removed lists
+        keys deleted. Applying one twice changes nothing the second time."""
+        return self._merge([key for key in removed if key in self.list_data], put.items())
+
+    def _merge(self, removed, entries):
+        store = self.list_data
+        added, changed, moved = [], [], []
+        for key, entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            if key not in store:
+                added.append((key, entry))
+                continue
+            current = store[key]
+            if current != entry:
+                (moved if current['priority'] != entry.get('priority', 1) else changed).append(key)
+                store[key] = entry
+        if removed:
+            store.delete_keys(removed)
+        added_keys = store.append_batch(added) if added else []
+        if self.search_index is not None:
+            if removed:
+                self.search_index.remove_entries(self.path, removed)
+            texts = [(key, str(entry.get('text', ""))) for key, entry in added]
+            texts += [(key, store[key]['text']) for key in changed + moved]
+            if texts:
+                self.search_index.update_entries(self.path, texts)
+        return Merge(removed, added_keys, changed, moved)
+
+    def flush(self):
+        """Write any pending edits now; blocks until they are on disk."""
+        self.writer.flush()
+        if self.journal is not None:
+            self.journal.flush()
+
+    def save(self, attempts=5):
+        """flush, for callers with no event loop to run check_disk from
+        on_conflict: a write held back by another program's changes is
+        merged with them and tried again. True once every edit is on disk."""
+        for _ in range(attempts):
+            self.flush()
+            if self.guard.unchanged() or self.check_disk() is None:
+                break
+        return not self.writer.pending() and not self.unsaved_keys()
+
+    def close(self, discard=False):
+        """Persist (or with discard, drop) pending edits and release the file.
+        Raises what a failed write raised, once the file is released."""
+        try:
+            if discard:
+                self.writer.cancel()
+            else:
+                self.writer.flush()
+        finally:
+            if self.journal is not None:
+                self.journal.close()
+
+    def save_as(self, path):
+        """Write the list to path, which it lives at from then on. The
+        extension picks the engine, so this also converts."""
+        self.flush()
+        storage = engine_for(path)
+        storage.write(path, snapshot(self.list_data), self.writer.fsync)
+        self.path = path
+        self.storage = storage
+        self.guard.path = path
+        self.guard.seen()
+        self._unsaved.clear()
+        self.writer.path = path
+        self.writer.write = storage.write
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = storage.edit_log(path, lambda: self.list_data, guard=self.guard,
+                                        on_error=self.on_write_error)
+        if self.search_index is not None:
+            self.search_index.index_list(path, self.list_data)
+
+    # -- reading ------------------------------------------------------------
+    def watched_paths(self):
+        """The files another program's edits show up in: the list file, and
+        in journal mode its journal, which other instances append to."""
+        if isinstance(self.journal, journal.ListJournal):
+            return [self.path, self.journal.path]
+        return [self.path]
+
+    def ordered_keys(self):
+        """Keys in display order: highest priority first, ties in insertion order."""
+        return iter(PriorityIndex(self.list_data))
+
+    # -- edits ----------------------------------------------------------------
+    def add_entry(self, text, priority=1, completed=False):
+        """Add one entry under a fresh key and return the key.
+
+        Constant time whatever the list size: the key is new and the largest
+        yet, so the entry is appended to list_data.
+        """
+        key = new_key(self.list_data)
+        self.list_data[key] = {
+            "text": text,
+            "priority": priority,
+            "completed": completed
+        }
+        self._log([key], lambda log: log.create(key, self.list_data[key]))
+        if self.search_index is not None:
+            self.search_index.update_entry(self.path, key, text)
+        return key
+
+    def add_entries(self, entries):
+        """Add (key, entry dict) pairs; a key already in use gets a new one.
+
+        Returns the keys the entries were stored under.
+        """
+        entries = list(entries)
+        seen = set()
+        taken = []
+        for i, (key, _) in enumerate(entries):
+            if key is None or key in self.list_data or key in seen:
+                taken.append(i)
+            else:
+                seen.add(key)
+        for i, key in zip(taken, new_keys(len(taken), self.list_data)):
+            entries[i] = (key, entries[i][1])
+        keys = self.list_data.append_batch(entries)
+        self._log(keys, lambda log: log.create_many(entries))
+        if self.search_index is not None:
+            self.search_index.update_entries(self.path, [(key, str(entry.get('text', ""))) for key, entry in entries])
+        return keys
+
+    def entry_changed(self, key, field):
+        """Record one field of one entry, already set in list_data."""
+        if field == 'text' and self.search_index is not None:
+            self.search_index.update_entry(self.path, key, self.list_data[key]['text'])
+        self._log([key], lambda log: log.set_field(key, field, self.list_data[key][field]))
+
+    def set_field(self, keys, field, value):
+        """Set one field to the same value on a batch of entries; returns the
+        keys that actually changed."""
+        keys = [key for key in keys if key in self.list_data and self.list_data[key][field] != value]
+        if not keys:
+            return []
+        for key in keys:
+            self.list_data[key][field] = value
+        self._log(keys, lambda log: log.set_fields(keys, field, value))
+        if field == 'text' and self.search_index is not None:
+            self.search_index.update_entries(self.path, [(key, value) for key in keys])
+        return keys
+
+    def set_priority(self, keys, priority):
+        return self.set_field(keys, 'priority', int(priority))
+
+    def set_completed(self, keys, completed=True):
+        return self.set_field(keys, 'completed', bool(completed))
+
+    def delete_entries(self, keys):
+        """Delete the entries under keys; returns the keys that were there."""
+        keys = [key for key in keys if key in self.list_data]
+        if not keys:
+            return []
+        # Drop the entries before logging it: a compaction the record sets
+        # off snapshots list_data and must not see them.
+        self.list_data.delete_keys(keys)
+        self._log(keys, lambda log: log.delete(keys))
+        if self.search_index is not None:
+            self.search_index.remove_entries(self.path, keys)
+        return keys
+
+    def clear_completed_entries(self):
+        """Delete every completed entry; returns their keys."""
+        completed = self.list_data.completed_keys()
+        self.list_data.delete_keys(completed)
+        self._log(completed, lambda log: log.clear_completed(completed))
+        if self.search_index is not None:
+            self.search_index.remove_entries(self.path, completed)
+        return completed
+
+    def import_text_file(self, path, priority=1):
+        """Add one entry per non-blank line of a text file; returns the new keys."""
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            texts = [line.strip() for line in f]
+        texts = [text for text in texts if text]
+        keys = new_keys(len(texts), self.list_data)
+        return self.add_entries([(key, {"text": text, "priority": priority, "completed": False})
+                                 for key, text in zip(keys, texts)])
@@ -0,0 +1,57 @@
+import re
+
+
+class ListFilter:
+    """Which entries a ListModel (or the CLI) shows: every one unless a
+    criterion is set.
+
+    text is matched as a case-insensitive substring, or as a regular
+    expression when regex is set (an invalid one raises re.error).
+    """
+
+    __slots__ = ("hide_completed", "min_priority", "text", "regex", "text_match")
+
+    def __init__(self, hide_completed=False, min_priority=1, text="", regex=False):
+        self.hide_completed = hide_completed
+        self.min_priority = min_priority
+        self.text = text
+        self.regex = regex
+        self.text_match = None
+        if text and regex:
+            self.text_match = re.compile(text, re.IGNORECASE).search
+        elif text:
+            needle = text.casefold()
+            self.text_match = lambda value: needle in value.casefold()
+
+    @property
+    def active(self):
+        return self.hide_completed or self.min_priority > 1 or self.text_match is not None
+
+    def select(self, list_data, keys, limit=None):
+        """(matching keys, keys examined) for keys, stopping after limit matches."""
+        min_priority = self.min_priority if self.min_priority > 1 else None
+        select = getattr(list_data, "select", None)
+        if select is not None:
+            return select(keys, self.hide_completed, min_priority, self.text_match, limit)
+        found = []
+        examined = 0
+        for key in keys:
+            examined += 1
+            entry = list_data[key]
+            if self.hide_completed and entry['completed']:
+                continue
+            if min_priority is not None and entry['priority'] < min_priority:
+                continue
+            if self.text_match is not None and not self.text_match(entry['text']):
+                continue
+            found.append(key)
+            if limit is not None and len(found) >= limit:
+                break
+        return found, examined
+
+    def matches(self, list_data, key):
+        return bool(self.select(list_data, (key,))[0])
+
+    def __repr__(self):
+        return (f"ListFilter(hide_completed={self.hide_completed}, min_priority={self.min_priority}, "
+                f"text={self.text!r}, regex={self.regex})")
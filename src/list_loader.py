@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+
+from src import journal, settings
+from src.persistence import file_signature
+from src.storage import engine_for, json_loads
+
+class ParsedList:
+    """Result of reading one list file, safe to hand between threads and processes."""
+
+    __slots__ = ("path", "data", "missing", "corrupt", "replayed", "seconds", "stream", "signature", "error")
+
+    def __init__(self, path, data=None, missing=False, corrupt=False, replayed=0, seconds=0.0, stream=False,
+                 signature=None, error=None):
+        self.path = path
+        self.data = data
+        self.missing = missing
+        self.corrupt = corrupt
+        # Why a file that is there could not be read (no permission, say);
+        # unlike a corrupt one it is left as it is.
+        self.error = error
+        self.replayed = replayed
+        self.seconds = seconds
+        # Too large to parse up front; the reader streams it (see stream_loader).
+        self.stream = stream
+        # file_signature taken before reading: a later change shows up as a
+        # different signature even if it raced the read.
+        self.signature = signature
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+def parse_list(path):
+    """Read, parse and replay the journal of one list file. Never raises for
+    missing, malformed or unreadable files; those are reported on the result
+    instead.
+
+    Files of at least STREAM_LOAD_MIN_BYTES are not read here; the result
+    only has stream set.
+    """
+    start = time.perf_counter()
+    engine = engine_for(path)
+    signature = file_signature(path)
+    if engine.streams and settings.STREAM_LOAD_MIN_BYTES is not None:
+        size = signature[2] if signature is not None else 0
+        if size >= settings.STREAM_LOAD_MIN_BYTES:
+            return ParsedList(path, stream=True, seconds=time.perf_counter() - start, signature=signature)
+    try:
+        data = engine.read(path)
+    except FileNotFoundError:
+        return ParsedList(path, missing=True, seconds=time.perf_counter() - start)
+    except ValueError:
+        return ParsedList(path, corrupt=True, seconds=time.perf_counter() - start, signature=signature)
+    except OSError as e:
+        return ParsedList(path, error=e, seconds=time.perf_counter() - start, signature=signature)
+    try:
+        replayed = journal.replay(data, path) if journal.has_journal(path) else 0
+    except OSError as e:
+        return ParsedList(path, error=e, seconds=time.perf_counter() - start, signature=signature)
+    return ParsedList(path, data, replayed=replayed, seconds=time.perf_counter() - start, signature=signature)
+
+
+class ListLoader:
+    """Reads and parses list files concurrently.
+
+    Files go to a thread pool; with process_min_bytes set, files at least
+    that large are parsed in a process pool instead. Callbacks run on a
+    worker thread, so GUI code must hop back to its own thread (see
+    MainWindow, which relays them through a Qt signal).
+    """
+
+    def __init__(self, workers=None, process_min_bytes=None):
+        self.workers = workers or settings.LOADER_WORKERS
+        if process_min_bytes is None:
+            process_min_bytes = settings.LOADER_PROCESS_MIN_BYTES
+        self.process_min_bytes = process_min_bytes
+        self._threads = None
+        self._processes = None
+        self._lock = threading.Lock()
+
+    def _executor_for(self, path):
+        with self._lock:
+            if self.process_min_bytes is not None:
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    size = 0
+                if size >= self.process_min_bytes:
+                    if self._processes is None:
+                        from concurrent.futures import ProcessPoolExecutor
+                        self._processes = ProcessPoolExecutor(max_workers=self.workers)
+                    return self._processes
+            if self._threads is None:
+                # Deferred, like the process pool: parse_list alone (the CLI)
+                # needs neither.
+                from concurrent.futures import ThreadPoolExecutor
+                self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="list-loader")
+            return self._threads
+
+    def submit(self, path, callback=None):
+        """Parse path in a pool; callback, if given, gets the ParsedList even
+        if the pool failed to (a crashed worker process, say), with error set."""
+        future = self._executor_for(path).submit(parse_list, path)
+        if callback is not None:
+            def done(f):
+                if f.cancelled():
+                    return  # Shut down meanwhile; nobody is waiting.
+                try:
+                    parsed = f.result()
+                except Exception as e:
+                    parsed = ParsedList(path, error=e)
+                callback(parsed)
+            future.add_done_callback(done)
+        return future
+
+    def load_all(self, paths):
+        """Parse every path; yields ParsedList results in completion order."""
+        from concurrent.futures import as_completed
+        futures = [self.submit(path) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            for executor in (self._threads, self._processes):
+                if executor is not None:
+                    executor.shutdown(wait=wait, cancel_futures=True)
+            self._threads = None
+            self._processes = None
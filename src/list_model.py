@@ -0,0 +1,518 @@
+from itertools import islice
+from PyQt5 import QtWidgets, QtGui, QtCore
+from src import settings
+from src.instrumentation import instruments
+from src.list_filter import ListFilter
+from src.priority_index import PriorityIndex
+
+# Define colors for priority levels
+priority_colors = {
+    10: QtGui.QColor(230, 0, 0),       # red
+    9: QtGui.QColor(255, 75, 0),        # red-orange
+    8: QtGui.QColor(255, 150, 50),      # orange
+    7: QtGui.QColor(255, 200, 0),       # yellow-orange
+    6: QtGui.QColor(255, 255, 0),       # yellow
+    5: QtGui.QColor(200, 255, 0),       # light green
+    4: QtGui.QColor(125, 255, 0),       # grey-blue
+    3: QtGui.QColor(60, 240, 0),        # blue-white
+    2: QtGui.QColor(0, 220, 20),        # bright blue
+    1: QtGui.QColor(0, 200, 75)         # green
+}
+
+PRIORITY_ROLE = QtCore.Qt.UserRole + 1
+
+TEXT_COLUMN, PRIORITY_COLUMN, COMPLETED_COLUMN = range(3)
+
+_paint_resources = None
+
+
+def paint_resources():
+    """Brushes and fonts shared by every ListModel, built when the first one is."""
+    global _paint_resources
+    if _paint_resources is None:
+        brushes = {p: QtGui.QBrush(c) for p, c in priority_colors.items()}
+        struck_font = QtGui.QFont()
+        struck_font.setStrikeOut(True)
+        _paint_resources = (brushes, QtGui.QBrush(QtGui.QColor(0, 0, 0)), QtGui.QFont(), struck_font)
+    return _paint_resources
+
+
+###############################################################################
+# ListModel: Table model that reads and writes a list_data dict in place.
+# With a filter set, rows are the matching entries found so far: the order is
+# scanned a page at a time as the view scrolls (canFetchMore/fetchMore).
+###############################################################################
+class ListModel(QtCore.QAbstractTableModel):
+    # Emitted with (timestamp key, field name) after an edit lands in list_data.
+    entryChanged = QtCore.pyqtSignal(str, str)
+    # Emitted when the first row of a new batch starts waiting to move.
+    movesPending = QtCore.pyqtSignal()
+
+    HEADERS = ["Text", "Priority", "Completed"]
+    # Batches touching more rows than this reset the model rather than
+    # signal row by row; past it a rebuild is cheaper for model and view.
+    BULK_ROWS = 64
+
+    def __init__(self, list_data, parent=None):
+        super().__init__(parent)
+        self.list_data = list_data
+        # Row order; highest priority first, ties in insertion order.
+        self.order = PriorityIndex(list_data)
+        # Keys whose priority changed but whose row has not moved yet.
+        self.pending_moves = set()
+        # Reorder counters: passes run, rows moved overall and in the last pass.
+        self.reorder_passes = 0
+        self.rows_moved_total = 0
+        self.last_reorder_rows = 0
+        # Filtered view: matching keys in row order among the first _scanned
+        # rows of self.order; the rest is scanned on demand.
+        self.filter = ListFilter()
+        self.filtered = False
+        self.page_rows = settings.FILTER_PAGE_ROWS
+        self.scan_rows = settings.FILTER_SCAN_ROWS
+        self._wanted = 0
+        self._step_scheduled = False
+        self._visible = []
+        self._visible_set = set()
+        self._scanned = 0
+        # Set while _visible changes, so a view reacting to the change cannot
+        # start fetching the next page in the middle of it.
+        self._updating = False
+        # Rows cannot be edited while set (a list still streaming in).
+        self.read_only = False
+        # Shared paint resources instead of one QFont/QBrush per row.
+        self._brushes, self._default_brush, self._font, self._struck_font = paint_resources()
+
+    def set_list_data(self, list_data):
+        self.beginResetModel()
+        self.list_data = list_data
+        self.order.rebuild(list_data)
+        self.pending_moves.clear()
+        self._clear_visible()
+        self.endResetModel()
+        self._fetch_page()
+
+    def set_filter(self, list_filter):
+        """Show only entries matching list_filter; costs one page, not the list."""
+        self.beginResetModel()
+        self.filter = list_filter
+        self.filtered = list_filter.active
+        self._clear_visible()
+        self.endResetModel()
+        self._fetch_page()
+
+    def _clear_visible(self):
+        self._visible = []
+        self._visible_set = set()
+        self._scanned = 0
+
+    def _scan_end(self):
+        # Rows below min_priority sit at the end of the order and never match.
+        return self.order.rows_at_least(self.filter.min_priority)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return (not parent.isValid() and self.filtered and not self._updating
+                and self._scanned < self._scan_end())
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if self.canFetchMore(parent):
+            self._fetch_page()
+
+    def _fetch_page(self):
+        if not self.filtered:
+            return 0
+        self._wanted = self.page_rows
+        return self._fetch_step()
+
+    def _fetch_step(self):
+        # Scan at most scan_rows entries per event-loop turn; a sparse filter
+        # keeps filling its page from later turns instead of blocking the UI.
+        self._step_scheduled = False
+        end = self._scan_end()
+        if not self.filtered or self._wanted <= 0 or self._scanned >= end:
+            return 0
+        keys = islice(self.order.iter_from(self._scanned), min(end - self._scanned, self.scan_rows))
+        found, examined = self.filter.select(self.list_data, keys, self._wanted)
+        self._scanned += examined
+        self._wanted -= len(found)
+        if found:
+            self._insert_visible(len(self._visible), found)
+        if self._wanted > 0 and self._scanned < end and not self._step_scheduled:
+            self._step_scheduled = True
+            QtCore.QTimer.singleShot(0, self._fetch_step)
+        return len(found)
+
+    @property
+    def fetching(self):
+        """True while a page is still being filled from the event loop."""
+        return self._step_scheduled
+
+    def _insert_visible(self, position, keys):
+        self._updating = True
+        self.beginInsertRows(QtCore.QModelIndex(), position, position + len(keys) - 1)
+        self._visible[position:position] = keys
+        self._visible_set.update(keys)
+        self.endInsertRows()
+        self._updating = False
+
+    def _remove_visible(self, position):
+        self._updating = True
+        self.beginRemoveRows(QtCore.QModelIndex(), position, position)
+        self._visible_set.discard(self._visible.pop(position))
+        self.endRemoveRows()
+        self._updating = False
+
+    def _move_visible(self, old_position, new_position):
+        self._updating = True
+        destination = new_position if new_position < old_position else new_position + 1
+        parent = QtCore.QModelIndex()
+        self.beginMoveRows(parent, old_position, old_position, parent, destination)
+        self._visible.insert(new_position, self._visible.pop(old_position))
+        self.endMoveRows()
+        self._updating = False
+
+    def fetch_all(self):
+        while self.canFetchMore():
+            self._wanted = len(self.order)
+            self._fetch_step()
+
+    def _visible_position(self, order_row, skip=None):
+        """Where a key at order_row belongs in _visible, ignoring position skip."""
+        visible, row_of = self._visible, self.order.row_of
+        lo, hi = 0, len(visible) - (skip is not None)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = mid + 1 if skip is not None and mid >= skip else mid
+            if row_of(visible[at]) < order_row:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _refilter(self, timestamp):
+        # An edit may have made a shown entry stop matching, or the reverse.
+        if timestamp not in self.order or self.order.row_of(timestamp) >= self._scanned:
+            return
+        shown = timestamp in self._visible_set
+        if shown == self.filter.matches(self.list_data, timestamp):
+            return
+        position = self._visible_position(self.order.row_of(timestamp))
+        if shown:
+            self._remove_visible(position)
+        else:
+            self._insert_visible(position, [timestamp])
+
+    def reset(self):
+        self.set_list_data(self.list_data)
+
+    def add_entry(self, timestamp):
+        """Insert a row for an entry already added to list_data."""
+        priority = self.list_data[timestamp]['priority']
+        row = self.order.insert_row(priority)
+        if self.filtered:
+            fully_scanned = self._scanned >= len(self.order)
+            self.order.add(timestamp, priority)
+            if row < self._scanned or fully_scanned:
+                self._scanned += 1
+                self._refilter(timestamp)
+            return self.row_for_key(timestamp)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.order.add(timestamp, priority)
+        self.endInsertRows()
+        return row
+
+    def add_entries(self, keys):
+        """Insert rows for a batch of entries already added to list_data.
+
+        New keys go to the end of their priority level, so a batch lands as
+        one block of rows per priority rather than one insert per row. In a
+        filtered view a batch past BULK_ROWS refills the first page through
+        the filter instead, as set_filter does.
+        """
+        if self.filtered:
+            if len(keys) <= self.BULK_ROWS:
+                for timestamp in keys:
+                    self.add_entry(timestamp)
+                return
+            for timestamp in keys:
+                self.order.add(timestamp, self.list_data[timestamp]['priority'])
+            self.set_filter(self.filter)
+            return
+        # Sequence numbers follow the batch, not the groups: they order the
+        # rows of a level, and an entry moved to another level later.
+        first = self.order.reserve(len(keys))
+        by_priority = {}
+        for seq, timestamp in enumerate(keys, first):
+            by_priority.setdefault(self.list_data[timestamp]['priority'], []).append((seq, timestamp))
+        for priority in sorted(by_priority, reverse=True):
+            group = by_priority[priority]
+            row = self.order.insert_row(priority)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row + len(group) - 1)
+            for seq, timestamp in group:
+                self.order.add(timestamp, priority, seq)
+            self.endInsertRows()
+
+    def entries_changed(self, keys, reorder=False):
+        """Update the rows of a batch of entries edited in list_data.
+
+        With reorder set their priorities changed, and the rows move to
+        their new places now instead of waiting for the reorder timer.
+        """
+        keys = [timestamp for timestamp in keys if timestamp in self.order]
+        if len(keys) > self.BULK_ROWS:
+            if reorder:
+                self.set_list_data(self.list_data)
+            elif self.filtered:
+                self.set_filter(self.filter)
+            elif self.rowCount():
+                self.dataChanged.emit(self.index(0, TEXT_COLUMN),
+                                      self.index(self.rowCount() - 1, COMPLETED_COLUMN))
+            return
+        for timestamp in keys:
+            row = self.row_for_key(timestamp)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, TEXT_COLUMN), self.index(row, COMPLETED_COLUMN))
+            if self.filtered and not reorder:
+                self._refilter(timestamp)
+        if reorder:
+            self.pending_moves.update(keys)
+            self.apply_pending_moves()
+
+    def queue_moves(self, keys):
+        """Update the rows of entries whose priority changed in list_data;
+        they move with the next reorder, as rows edited here do."""
+        keys = [timestamp for timestamp in keys if timestamp in self.order]
+        if len(keys) > self.BULK_ROWS:
+            self.set_list_data(self.list_data)
+            return
+        for timestamp in keys:
+            row = self.row_for_key(timestamp)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, TEXT_COLUMN), self.index(row, COMPLETED_COLUMN))
+        if keys and not self.pending_moves:
+            self.movesPending.emit()
+        self.pending_moves.update(keys)
+
+    def remove_entries(self, keys):
+        """Drop the rows of entries already deleted from list_data."""
+        keys = [timestamp for timestamp in keys if timestamp in self.order]
+        if len(keys) > self.BULK_ROWS:
+            self.set_list_data(self.list_data)
+            return
+        # Bottom row first, so the rows still to go keep their numbers.
+        keys.sort(key=self.order.row_of, reverse=True)
+        for timestamp in keys:
+            self.pending_moves.discard(timestamp)
+            if not self.filtered:
+                row = self.order.row_of(timestamp)
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                self.order.remove(timestamp)
+                self.endRemoveRows()
+                continue
+            if timestamp in self._visible_set:
+                self._remove_visible(self._visible_position(self.order.row_of(timestamp)))
+            if self.order.remove(timestamp) < self._scanned:
+                self._scanned -= 1
+
+    def apply_pending_moves(self):
+        """Move rows whose priority changed to their new place; returns rows moved.
+
+        Only the edited rows are touched, each with a single row move, so an
+        unchanged list costs nothing and the view repaints just what moved.
+        """
+        moved = 0
+        pending, self.pending_moves = self.pending_moves, set()
+        if not pending:
+            return 0
+        for timestamp in pending:
+            if timestamp not in self.order:
+                continue
+            priority = self.list_data[timestamp]['priority']
+            if self.filtered:
+                moved += self._move_filtered(timestamp, priority)
+                continue
+            old_row, new_row = self.order.move_target(timestamp, priority)
+            if old_row == new_row:
+                self.order.move(timestamp, priority)
+                continue
+            destination = new_row if new_row < old_row else new_row + 1
+            self.beginMoveRows(QtCore.QModelIndex(), old_row, old_row, QtCore.QModelIndex(), destination)
+            self.order.move(timestamp, priority)
+            self.endMoveRows()
+            moved += 1
+        self.reorder_passes += 1
+        self.rows_moved_total += moved
+        self.last_reorder_rows = moved
+        return moved
+
+    def _move_filtered(self, timestamp, priority):
+        # Rows here are positions in _visible, which the order does not drive,
+        # so the order is refiled first and the view told about the result.
+        old_row, new_row = self.order.move_target(timestamp, priority)
+        old_position = None
+        if timestamp in self._visible_set:
+            old_position = self._visible_position(old_row)
+        self.order.move(timestamp, priority)
+        # Keep _scanned covering the same keys, plus or minus the moved one.
+        if old_row < self._scanned:
+            if new_row >= self._scanned:
+                self._scanned -= 1
+        elif new_row < self._scanned:
+            self._scanned += 1
+        show = new_row < self._scanned and self.filter.matches(self.list_data, timestamp)
+        if old_position is not None and show:
+            new_position = self._visible_position(new_row, skip=old_position)
+            if new_position == old_position:
+                return 0
+            self._move_visible(old_position, new_position)
+        elif old_position is not None:
+            self._remove_visible(old_position)
+        elif show:
+            self._insert_visible(self._visible_position(new_row), [timestamp])
+        else:
+            return 0
+        return 1
+
+    def key_for_row(self, row):
+        if self.filtered:
+            return self._visible[row]
+        return self.order.key_at(row)
+
+    def row_for_key(self, timestamp):
+        """Row showing timestamp, or None if it is filtered out or unknown."""
+        if timestamp not in self.order:
+            return None
+        if self.filtered:
+            if timestamp not in self._visible_set:
+                return None
+            return self._visible_position(self.order.row_of(timestamp))
+        return self.order.row_of(timestamp)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._visible) if self.filtered else len(self.order)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            if orientation == QtCore.Qt.Horizontal:
+                return self.HEADERS[section]
+            return str(section + 1)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if self.read_only:
+            return flags
+        if index.column() == COMPLETED_COLUMN:
+            return flags | QtCore.Qt.ItemIsUserCheckable
+        return flags | QtCore.Qt.ItemIsEditable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        # A batch delete drops its entries from list_data before their rows
+        # go, one signal at a time; rows still pending removal show nothing.
+        entry = self.list_data.get(self.key_for_row(index.row()))
+        if entry is None:
+            return None
+        column = index.column()
+        if role == PRIORITY_ROLE:
+            return entry['priority']
+        if column == TEXT_COLUMN:
+            if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+                if instruments.enabled and role == QtCore.Qt.DisplayRole:
+                    instruments.count("rows rendered")
+                return entry['text']
+            if role == QtCore.Qt.ForegroundRole:
+                return self._brushes.get(entry['priority'], self._default_brush)
+            if role == QtCore.Qt.FontRole:
+                return self._struck_font if entry['completed'] else self._font
+            if role == QtCore.Qt.TextAlignmentRole:
+                return QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft
+        elif column == PRIORITY_COLUMN:
+            if role == QtCore.Qt.DisplayRole:
+                return str(entry['priority'])
+            if role == QtCore.Qt.EditRole:
+                return entry['priority']
+        elif column == COMPLETED_COLUMN:
+            if role == QtCore.Qt.CheckStateRole:
+                return QtCore.Qt.Checked if entry['completed'] else QtCore.Qt.Unchecked
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid():
+            return False
+        row = index.row()
+        timestamp = self.key_for_row(row)
+        entry = self.list_data[timestamp]
+        column = index.column()
+        if column == TEXT_COLUMN and role == QtCore.Qt.EditRole:
+            field, value = 'text', str(value)
+        elif column == PRIORITY_COLUMN and role == QtCore.Qt.EditRole:
+            field, value = 'priority', int(value)
+            if not 1 <= value <= 10:
+                return False
+        elif column == COMPLETED_COLUMN and role == QtCore.Qt.CheckStateRole:
+            field, value = 'completed', value == QtCore.Qt.Checked
+        else:
+            return False
+        if entry[field] == value:
+            return True
+        entry[field] = value
+        if field == 'priority':
+            if not self.pending_moves:
+                self.movesPending.emit()
+            self.pending_moves.add(timestamp)
+        # Priority and completed also change how the text cell is drawn.
+        self.dataChanged.emit(self.index(row, TEXT_COLUMN), self.index(row, COMPLETED_COLUMN))
+        if self.filtered and field != 'priority':
+            self._refilter(timestamp)
+        self.entryChanged.emit(timestamp, field)
+        return True
+
+
+###############################################################################
+# PriorityDelegate: Paints the priority cell; a combo box exists only while editing.
+###############################################################################
+class PriorityDelegate(QtWidgets.QStyledItemDelegate):
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget is not None else QtWidgets.QApplication.style()
+        combo_option = QtWidgets.QStyleOptionComboBox()
+        combo_option.rect = option.rect
+        combo_option.state = option.state | QtWidgets.QStyle.State_Enabled
+        combo_option.palette = option.palette
+        combo_option.currentText = index.data(QtCore.Qt.DisplayRole)
+        style.drawComplexControl(QtWidgets.QStyle.CC_ComboBox, combo_option, painter, option.widget)
+        style.drawControl(QtWidgets.QStyle.CE_ComboBoxLabel, combo_option, painter, option.widget)
+
+    def sizeHint(self, option, index):
+        combo_option = QtWidgets.QStyleOptionComboBox()
+        text_size = option.fontMetrics.size(0, "10")
+        style = option.widget.style() if option.widget is not None else QtWidgets.QApplication.style()
+        return style.sizeFromContents(QtWidgets.QStyle.CT_ComboBox, combo_option, text_size, option.widget)
+
+    def createEditor(self, parent, option, index):
+        editor = QtWidgets.QComboBox(parent)
+        editor.addItems([str(i) for i in range(1, 11)])
+        # Commit as soon as a value is picked, like the old per-row combos.
+        editor.activated.connect(lambda _, e=editor: self._commit(e))
+        return editor
+
+    def _commit(self, editor):
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor, QtWidgets.QAbstractItemDelegate.NoHint)
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentIndex(index.data(QtCore.Qt.EditRole) - 1)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentIndex() + 1, QtCore.Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from src import settings
+from src.instrumentation import instruments, timed
+
+log = logging.getLogger(__name__)
+
+# Read once, here on the importing thread: os.umask can only be read by
+# setting it, which would race with files other threads create.
+_umask = os.umask(0o022)
+os.umask(_umask)
+
+
+def replacement_mode(path):
+    """Permission bits for a file about to replace path: path's own, or the
+    0o666 less the umask that open() would give a new file. mkstemp makes
+    its files 0o600, which os.replace would otherwise carry over."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_umask
+
+
+def write_json_atomic(path, data, fsync=False, indent=4):
+    """Write data as JSON next to path, then swap it in with os.replace.
+
+    A crash mid-write leaves the previous file untouched instead of a
+    truncated one. Returns the number of bytes written.
+    """
+    # Deferred: tempfile pulls in random and friends, which startup never needs.
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+            size = f.tell()
+        os.chmod(tmp_path, replacement_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return size
+
+
+def file_signature(path):
+    """Inode, mtime and size of path, or None if it is gone.
+
+    Any write changes it, in place or by os.replace, so comparing it with
+    the signature after our own last write tells another program's writes
+    apart from ours.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class DiskGuard:
+    """The state a list file was in when this process last read or wrote it.
+
+    Whatever writes the file checks the guard first. If the file changed
+    since, another program wrote it, and writing now would throw its changes
+    away: the write is skipped and on_conflict called (on the writing thread)
+    so the owner can merge the file in and write again.
+    """
+
+    def __init__(self, path, signature=None, on_conflict=None):
+        self.path = path
+        self.signature = file_signature(path) if signature is None else signature
+        self.on_conflict = on_conflict
+        self.conflicts = 0
+
+    def unchanged(self):
+        return file_signature(self.path) == self.signature
+
+    def seen(self, signature=None):
+        """Record the file as read or written by us (now, or as of signature)."""
+        self.signature = file_signature(self.path) if signature is None else signature
+
+    def conflict(self):
+        self.conflicts += 1
+        if self.on_conflict is not None:
+            self.on_conflict()
+
+
+def snapshot(data):
+    """Plain dict of entries ready for json.dump, from a dict or an EntryStore."""
+    to_dict = getattr(data, "to_dict", None)
+    return to_dict() if to_dict is not None else dict(data)
+
+
+class PersistenceStats:
+    """Counters shared by every ListWriter."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.writes_requested = 0
+        self.writes_performed = 0
+        self.writes_avoided = 0
+        self.bytes_written = 0
+        self.seconds_writing = 0.0
+
+    def record_request(self, coalesced):
+        with self._lock:
+            self.writes_requested += 1
+            if coalesced:
+                self.writes_avoided += 1
+
+    def record_write(self, size, seconds):
+        with self._lock:
+            self.writes_performed += 1
+            self.bytes_written += size
+            self.seconds_writing += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "writes_requested": self.writes_requested,
+                "writes_performed": self.writes_performed,
+                "writes_avoided": self.writes_avoided,
+                "bytes_written": self.bytes_written,
+                "seconds_writing": self.seconds_writing,
+            }
+
+
+stats = PersistenceStats()
+
+
+class _WriteBehindWorker:
+    """Single background thread that performs due writes for all lists.
+
+    A write that fails (a full disk, a file made read-only) is logged and
+    queued again, WRITE_RETRY_MS later and twice as long after each failure
+    in a row, up to WRITE_RETRY_MAX_MS. The writer's last_error holds the
+    failure until a write succeeds, and its on_error, if set, is called
+    with it (and with None once a write goes through again).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._due = {}  # ListWriter -> (deadline, latest allowed deadline)
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="list-writer", daemon=True)
+            self._thread.start()
+
+    def schedule(self, writer, delay, max_delay):
+        now = time.monotonic()
+        with self._cond:
+            pending = self._due.get(writer)
+            if pending is None:
+                self._due[writer] = (now + delay, now + max_delay)
+            elif not writer.failures:
+                # Push the write back while edits keep coming, up to max_delay.
+                # A retry after a failure keeps its backoff instead.
+                self._due[writer] = (min(now + delay, pending[1]), pending[1])
+            self._ensure_thread()
+            self._cond.notify()
+        return pending is not None
+
+    def cancel(self, writer):
+        with self._cond:
+            return self._due.pop(writer, None) is not None
+
+    def write(self, writer):
+        """writer.write_now(), with a failure reported and queued for a retry."""
+        try:
+            writer.write_now()
+        except Exception as e:
+            self._failed(writer, e)
+            raise
+        if writer.failures:
+            writer.failures = 0
+            writer.last_error = None
+            log.info("writing %s works again", writer.path)
+            if writer.on_error is not None:
+                writer.on_error(None)
+
+    def _failed(self, writer, error):
+        with self._cond:
+            writer.failures += 1
+            delay = min(settings.WRITE_RETRY_MS * 2 ** (writer.failures - 1), settings.WRITE_RETRY_MAX_MS) / 1000
+            now = time.monotonic()
+            # An edit made meanwhile may have queued the write already.
+            deadline = max(now + delay, self._due.get(writer, (now, now))[0])
+            self._due[writer] = (deadline, deadline)
+            self._ensure_thread()
+            self._cond.notify()
+        writer.last_error = error
+        log.warning("writing %s failed (%s); retrying in %.1f s", writer.path, error, delay)
+        if writer.on_error is not None:
+            writer.on_error(error)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    ready = [w for w, (deadline, _) in self._due.items() if deadline <= now]
+                    if ready:
+                        for writer in ready:
+                            del self._due[writer]
+                        break
+                    timeout = min((d for d, _ in self._due.values()), default=None)
+                    self._cond.wait(None if timeout is None else timeout - now)
+            for writer in ready:
+                try:
+                    self.write(writer)
+                except Exception:
+                    pass  # Reported and queued again by write().
+
+
+_worker = _WriteBehindWorker()
+
+
+class ListWriter:
+    """Write-behind persistence for one list file.
+
+    schedule() is cheap and may be called on every edit; bursts within
+    delay_ms are coalesced into a single atomic write on a worker thread.
+    get_data is called on the worker thread and must return the live dict.
+    write(path, data, fsync) does the writing; JSON unless told otherwise.
+    With a DiskGuard, a file changed by another program is not overwritten.
+    A failed write is retried (see _WriteBehindWorker) and on_error(error)
+    told about it, on the writing thread.
+
+    Every schedule() bumps edits_requested; edits_written is the value it had
+    when the last completed write took its snapshot, so edits made at or
+    below it are on disk.
+    """
+
+    def __init__(self, path, get_data, delay_ms=None, max_delay_ms=None, fsync=None, write=None, guard=None,
+                 on_error=None):
+        self.path = path
+        self.get_data = get_data
+        self.write = write or write_json_atomic
+        self.delay = (settings.WRITE_DELAY_MS if delay_ms is None else delay_ms) / 1000
+        self.max_delay = (settings.WRITE_MAX_DELAY_MS if max_delay_ms is None else max_delay_ms) / 1000
+        self.fsync = settings.FSYNC_WRITES if fsync is None else fsync
+        self.guard = guard
+        self.edits_requested = 0
+        self.edits_written = 0
+        self.last_error = None
+        self.failures = 0  # failed writes in a row
+        self.on_error = on_error
+        self._write_lock = threading.Lock()
+
+    def schedule(self):
+        self.edits_requested += 1
+        coalesced = _worker.schedule(self, self.delay, self.max_delay)
+        stats.record_request(coalesced)
+
+    def pending(self):
+        """True while a write is scheduled or being written."""
+        with _worker._cond:
+            return self in _worker._due or self._write_lock.locked()
+
+    def cancel(self):
+        """Drop a pending write (e.g. the file is about to be deleted)."""
+        _worker.cancel(self)
+
+    def flush(self):
+        """Write now unless every edit is on disk; blocks until it is.
+
+        Raises what a failed write raised; the write stays queued for a retry.
+        """
+        _worker.cancel(self)
+        # A write may be in flight on the worker; wait for it to finish.
+        with self._write_lock:
+            pass
+        if self.edits_written < self.edits_requested:
+            _worker.write(self)
+
+    @timed("ListWriter.write_now")
+    def write_now(self):
+        with self._write_lock:
+            if self.guard is not None and not self.guard.unchanged():
+                self.guard.conflict()
+                return
+            start = time.perf_counter()
+            requested = self.edits_requested
+            # The snapshot is copied before serializing, so the list may keep
+            # changing on the GUI thread while it is written.
+            data = snapshot(self.get_data())
+            size = self.write(self.path, data, self.fsync)
+            if self.guard is not None:
+                self.guard.seen()
+            self.edits_written = requested
+            stats.record_write(size, time.perf_counter() - start)
+            instruments.count("file writes")
+            instruments.count("bytes written", size)
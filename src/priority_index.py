@@ -0,0 +1,215 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+###############################################################################
+# PriorityIndex: Row order of a list (highest priority first, then insertion
+# order) kept incrementally instead of re-sorting list_data on every lookup.
+###############################################################################
+class PriorityIndex:
+    def __init__(self, list_data=None):
+        self._seq_of = {}       # key -> insertion sequence number
+        self._key_of = {}       # sequence number -> key
+        self._priority_of = {}  # key -> priority the key is filed under
+        self._buckets = {}      # priority -> sorted list of sequence numbers
+        self._levels = []       # priorities with a bucket, highest first
+        self._starts = None     # first row of each level, rebuilt lazily
+        self._next_seq = 0
+        if list_data is not None:
+            self.rebuild(list_data)
+
+    def rebuild(self, list_data):
+        self._seq_of = {}
+        self._key_of = {}
+        self._priority_of = {}
+        self._buckets = {}
+        self._levels = []
+        self._starts = None
+        buckets = self._buckets
+        priority_items = getattr(list_data, "priority_items", None)
+        if priority_items is not None:
+            items = priority_items()
+        else:
+            items = ((key, entry['priority']) for key, entry in list_data.items())
+        for seq, (key, priority) in enumerate(items):
+            self._seq_of[key] = seq
+            self._key_of[seq] = key
+            self._priority_of[key] = priority
+            bucket = buckets.get(priority)
+            if bucket is None:
+                bucket = buckets[priority] = []
+            bucket.append(seq)
+        self._levels = sorted(buckets, reverse=True)
+        self._next_seq = len(self._seq_of)
+
+    def __len__(self):
+        return len(self._seq_of)
+
+    def __contains__(self, key):
+        return key in self._seq_of
+
+    def __iter__(self):
+        key_of = self._key_of
+        for priority in self._levels:
+            for seq in self._buckets[priority]:
+                yield key_of[seq]
+
+    def iter_from(self, row):
+        """Keys in row order, starting at row."""
+        starts = self._level_starts()
+        key_of = self._key_of
+        first = max(bisect_right(starts, row) - 1, 0)
+        for position in range(first, len(self._levels)):
+            bucket = self._buckets[self._levels[position]]
+            offset = max(row - starts[position], 0)
+            for seq in bucket[offset:] if offset else bucket:
+                yield key_of[seq]
+
+    def rows_at_least(self, priority):
+        """Number of rows whose priority is priority or higher; they come first."""
+        starts = self._level_starts()
+        for position, level in enumerate(self._levels):
+            if level < priority:
+                return starts[position]
+        return len(self._seq_of)
+
+    def _bucket(self, priority):
+        bucket = self._buckets.get(priority)
+        if bucket is None:
+            bucket = self._buckets[priority] = []
+            # Levels are kept highest first; negate to bisect an ascending view.
+            position = bisect_left([-p for p in self._levels], -priority)
+            self._levels.insert(position, priority)
+        return bucket
+
+    def _level_starts(self):
+        if self._starts is None:
+            starts = []
+            total = 0
+            for priority in self._levels:
+                starts.append(total)
+                total += len(self._buckets[priority])
+            self._starts = starts
+        return self._starts
+
+    def _level_start(self, priority):
+        return self._level_starts()[self._levels.index(priority)]
+
+    def insert_row(self, priority):
+        """Row a key added under priority would get."""
+        starts = self._level_starts()
+        for position, level in enumerate(self._levels):
+            if level < priority:
+                return starts[position]
+        return len(self._seq_of)
+
+    def reserve(self, count):
+        """Take count sequence numbers for a batch and return the first.
+
+        add(key, priority, seq) files each key of the batch under its own
+        number, so the batch keeps its order among equal priorities however
+        its keys are grouped while they are added.
+        """
+        first = self._next_seq
+        self._next_seq += count
+        return first
+
+    def add(self, key, priority, seq=None):
+        """Append key as the newest entry of its priority and return its row.
+
+        seq is a number from reserve(), larger than any in key's priority
+        level; without it the key gets the next one.
+        """
+        if key in self._seq_of:
+            raise KeyError(f"{key!r} is already indexed")
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        self._seq_of[key] = seq
+        self._key_of[seq] = key
+        self._priority_of[key] = priority
+        existed = priority in self._buckets
+        bucket = self._bucket(priority)
+        # New sequence numbers are always the largest, so this is an append.
+        bucket.append(seq)
+        if existed and self._starts is not None:
+            # Levels below shift down a row; no need to recount them all.
+            starts = self._starts
+            for position in range(self._levels.index(priority) + 1, len(starts)):
+                starts[position] += 1
+        else:
+            self._starts = None
+        return self._level_start(priority) + len(bucket) - 1
+
+    def remove(self, key):
+        """Drop key from the index and return the row it occupied."""
+        row = self.row_of(key)
+        seq = self._seq_of.pop(key)
+        del self._key_of[seq]
+        priority = self._priority_of.pop(key)
+        bucket = self._buckets[priority]
+        del bucket[bisect_left(bucket, seq)]
+        if not bucket:
+            del self._buckets[priority]
+            self._levels.remove(priority)
+        self._starts = None
+        return row
+
+    def priority_of(self, key):
+        return self._priority_of[key]
+
+    def row_of(self, key):
+        seq = self._seq_of[key]
+        priority = self._priority_of[key]
+        return self._level_start(priority) + bisect_left(self._buckets[priority], seq)
+
+    def key_at(self, row):
+        starts = self._level_starts()
+        level = bisect_right(starts, row) - 1
+        if row < 0 or level < 0:
+            raise IndexError(row)
+        bucket = self._buckets[self._levels[level]]
+        offset = row - starts[level]
+        if offset >= len(bucket):
+            raise IndexError(row)
+        return self._key_of[bucket[offset]]
+
+    def move_target(self, key, priority):
+        """Return (old row, new row) for refiling key under priority.
+
+        The new row is where the key ends up once it has been moved, which is
+        what QAbstractItemModel.beginMoveRows needs to be told up front.
+        """
+        old_row = self.row_of(key)
+        seq = self._seq_of[key]
+        current = self._priority_of[key]
+        if priority == current:
+            return old_row, old_row
+        new_row = 0
+        starts = self._level_starts()
+        for position, level in enumerate(self._levels):
+            if level > priority:
+                new_row = starts[position] + len(self._buckets[level])
+            elif level == priority:
+                new_row = starts[position] + bisect_left(self._buckets[level], seq)
+                break
+            else:
+                break
+        if current > priority:
+            # The key itself sits above its destination and leaves that range.
+            new_row -= 1
+        return old_row, new_row
+
+    def move(self, key, priority):
+        """Refile key under a new priority, keeping its insertion position."""
+        current = self._priority_of[key]
+        if priority == current:
+            return
+        seq = self._seq_of[key]
+        bucket = self._buckets[current]
+        del bucket[bisect_left(bucket, seq)]
+        if not bucket:
+            del self._buckets[current]
+            self._levels.remove(current)
+        insort(self._bucket(priority), seq)
+        self._priority_of[key] = priority
+        self._starts = None
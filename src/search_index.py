@@ -0,0 +1,534 @@
+import os
+import re
+import time
+import bisect
+import hashlib
+import threading
+from array import array
+
+from src import journal
+from src.list_loader import json_loads, parse_list
+from src.stream_loader import load_store
+from src.persistence import write_json_atomic
+
+# Directory next to the lists holding one cache file per list. It has no
+# list suffix, so scan_lists never mistakes it for a list.
+CACHE_NAME = ".search_index"
+CACHE_VERSION = 1
+
+_WORD = re.compile(r"\w+")
+# Sorts after every word that starts with a given prefix.
+_PREFIX_END = "\U0010ffff"
+# Entries merged per lock hold while a list is indexed in the background.
+_CHUNK = 20000
+# Removing more documents than this at once rebuilds the touched postings.
+_BULK_REMOVE = 64
+
+
+def tokenize(text):
+    """Distinct lower-cased words of an entry's text."""
+    return set(_WORD.findall(text.casefold())) if text else set()
+
+
+def list_signature(path):
+    """mtime and size of a list file and its journals; None if the file is gone.
+
+    Journal mode edits never touch the .json itself, so the journals are part
+    of what makes a cached index stale.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    signature = [st.st_mtime, st.st_size]
+    for suffix in (journal.JOURNAL_SUFFIX, journal.COMPACTING_SUFFIX):
+        try:
+            st = os.stat(path + suffix)
+            signature += [st.st_mtime, st.st_size]
+        except OSError:
+            signature += [0, 0]
+    return signature
+
+
+def _text_items(data):
+    # A hand-edited file (or a sync delta) can hold a number or null as an
+    # entry's text; it is indexed, and found, as its str().
+    text_items = getattr(data, "text_items", None)
+    if text_items is not None:
+        return [(key, text if isinstance(text, str) else str(text)) for key, text in text_items()]
+    return [(key, str(entry.get('text', ""))) for key, entry in data.items()]
+
+
+class SearchHit:
+    """One matching entry: the list file it lives in, its key and its text."""
+
+    __slots__ = ("path", "key", "text")
+
+    def __init__(self, path, key, text):
+        self.path = path
+        self.key = key
+        self.text = text
+
+    def __repr__(self):
+        return f"SearchHit({self.path!r}, {self.key!r}, {self.text!r})"
+
+
+class SearchIndex:
+    """Inverted index over the text of every entry in every list.
+
+    Words map to the entries containing them; a sorted vocabulary turns a
+    prefix into a contiguous run of words, so "gro" finds "groceries". Lists
+    are indexed on a background thread at startup, straight from their cache
+    file when the list's signature (mtime and size) is unchanged, and ListTab
+    keeps the index current by reporting each edit.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        # Documents are slots in three parallel lists rather than a tuple each,
+        # which keeps a million entries from swamping the garbage collector.
+        self._doc_paths = []   # doc id -> path, None once the slot is free
+        self._doc_keys = []
+        self._doc_texts = []
+        self._holes = 0        # slots of removed documents
+        self._indexing = 0     # lists being indexed, holding doc ids of their own
+        self._lists = {}       # path -> {key: doc id}
+        self._signatures = {}  # path -> signature the index matches; None once edited
+        self._unsaved = set()  # lists whose cache file is out of date
+        # Posting lists are arrays: compact, and invisible to the garbage
+        # collector, unlike a set per word. Doc ids only ever grow, so each
+        # array stays sorted and a removal is a bisect.
+        self._postings = {}    # word -> sorted array of doc ids
+        self._vocab = []       # every word in _postings, sorted
+        # Lists the builder has yet to index, and edits made to them meanwhile.
+        self._planned = set()
+        self._pending = {}     # path -> [(key, text, or None for a removal)]
+        self._generation = 0
+        self._builder = None
+        self.ready = False
+        self.lists_indexed = 0
+        self.lists_from_cache = 0
+        self.build_seconds = 0.0
+        self.last_error = None
+
+    def __len__(self):
+        return len(self._doc_paths) - self._holes
+
+    # -- documents ----------------------------------------------------------
+    def _add_doc(self, path, key, text, words, new_words):
+        doc = len(self._doc_paths)
+        self._doc_paths.append(path)
+        self._doc_keys.append(key)
+        self._doc_texts.append(text)
+        postings = self._postings
+        for word in words:
+            docs = postings.get(word)
+            if docs is None:
+                docs = postings[word] = array('i')
+                new_words.append(word)
+            docs.append(doc)
+        return doc
+
+    def _remove_docs(self, doc_ids):
+        doc_ids = list(doc_ids)
+        postings = self._postings
+        touched = set()
+        for doc in doc_ids:
+            touched |= tokenize(self._doc_texts[doc])
+            self._doc_paths[doc] = self._doc_keys[doc] = self._doc_texts[doc] = None
+        self._holes += len(doc_ids)
+        emptied = []
+        removed = set(doc_ids) if len(doc_ids) > _BULK_REMOVE else None
+        for word in touched:
+            docs = postings.get(word)
+            if docs is None:
+                continue
+            if removed is None:
+                for doc in doc_ids:
+                    at = bisect.bisect_left(docs, doc)
+                    if at < len(docs) and docs[at] == doc:
+                        del docs[at]
+            else:
+                docs = postings[word] = array('i', [doc for doc in docs if doc not in removed])
+            if not docs:
+                del postings[word]
+                emptied.append(word)
+        if len(emptied) < 16:
+            for word in emptied:
+                at = bisect.bisect_left(self._vocab, word)
+                if at < len(self._vocab) and self._vocab[at] == word:
+                    del self._vocab[at]
+        else:
+            self._vocab = [word for word in self._vocab if word in postings]
+        if not self._indexing and self._holes > 65536 and self._holes * 2 > len(self._doc_paths):
+            self._compact()
+
+    def _compact(self):
+        # Renumber live documents densely; the mapping keeps their order, so
+        # every posting array stays sorted.
+        new_id = array('i', [-1]) * len(self._doc_paths)
+        paths, keys, texts = [], [], []
+        for doc, path in enumerate(self._doc_paths):
+            if path is not None:
+                new_id[doc] = len(paths)
+                paths.append(path)
+                keys.append(self._doc_keys[doc])
+                texts.append(self._doc_texts[doc])
+        self._doc_paths, self._doc_keys, self._doc_texts = paths, keys, texts
+        self._holes = 0
+        for word, docs in self._postings.items():
+            self._postings[word] = array('i', [new_id[doc] for doc in docs])
+        for indexed in self._lists.values():
+            for key, doc in indexed.items():
+                indexed[key] = new_id[doc]
+
+    def _add_words(self, new_words):
+        if not new_words:
+            return
+        if len(new_words) < 16:
+            for word in new_words:
+                bisect.insort(self._vocab, word)
+        else:
+            # Two sorted runs; the sort merges them in linear time.
+            self._vocab.extend(sorted(new_words))
+            self._vocab.sort()
+
+    def _set_entry(self, path, key, text):
+        keys = self._lists[path]
+        doc = keys.get(key)
+        if doc is not None:
+            if text is not None and self._doc_texts[doc] == text:
+                return
+            self._remove_docs((doc,))
+            del keys[key]
+        if text is not None:
+            new_words = []
+            keys[key] = self._add_doc(path, key, text, tokenize(text), new_words)
+            self._add_words(new_words)
+        self._signatures[path] = None
+        self._unsaved.add(path)
+
+    def _install(self, path, keys, signature, saved):
+        # Swap in a freshly indexed list; the caller holds the lock.
+        old = self._lists.get(path, {})
+        self._lists[path] = keys
+        self._remove_docs(old.values())
+        self._signatures[path] = signature
+        self._planned.discard(path)
+        if saved:
+            self._unsaved.discard(path)
+        else:
+            self._unsaved.add(path)
+        # Edits made while the file was being read win over its contents.
+        for key, text in self._pending.pop(path, ()):
+            self._set_entry(path, key, text)
+
+    def _index_entries(self, path, items, signature):
+        """Replace everything indexed for path with items ((key, text) pairs)."""
+        items = list(items)
+        keys = {}
+        with self._lock:
+            self._indexing += 1
+        try:
+            for start in range(0, len(items), _CHUNK):
+                # Tokenized a chunk at a time, so few word sets are alive at once.
+                prepared = [(key, text, tokenize(text)) for key, text in items[start:start + _CHUNK]]
+                with self._lock:
+                    new_words = []
+                    for key, text, words in prepared:
+                        keys[key] = self._add_doc(path, key, text, words, new_words)
+                    self._add_words(new_words)
+            with self._lock:
+                self._install(path, keys, signature, saved=False)
+        finally:
+            with self._lock:
+                self._indexing -= 1
+
+    # -- keeping up with the lists -------------------------------------------
+    def index_list(self, path, data):
+        """(Re)index a list from its live data, e.g. after Save As."""
+        self._index_entries(os.path.abspath(path), _text_items(data), None)
+
+    def track(self, path, data):
+        """Index a list opened in a tab unless the index has it or will soon."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._lists or path in self._planned:
+                return
+        self._index_entries(path, _text_items(data), None)
+
+    def update_entry(self, path, key, text):
+        """Record a created or edited entry."""
+        path = os.path.abspath(path)
+        text = str(text)
+        with self._lock:
+            if path in self._lists:
+                self._set_entry(path, key, text)
+            elif path in self._planned:
+                self._pending.setdefault(path, []).append((key, text))
+
+    def update_entries(self, path, items):
+        """Record a batch of created or edited entries ((key, text) pairs)."""
+        path = os.path.abspath(path)
+        items = [(key, str(text)) for key, text in items]
+        with self._lock:
+            keys = self._lists.get(path)
+            if keys is None:
+                if path in self._planned:
+                    self._pending.setdefault(path, []).extend(items)
+                return
+            self._remove_docs([keys.pop(key) for key, _ in items if key in keys])
+            new_words = []
+            for key, text in items:
+                keys[key] = self._add_doc(path, key, text, tokenize(text), new_words)
+            self._add_words(new_words)
+            self._signatures[path] = None
+            self._unsaved.add(path)
+
+    def remove_entries(self, path, keys):
+        path = os.path.abspath(path)
+        with self._lock:
+            indexed = self._lists.get(path)
+            if indexed is None:
+                if path in self._planned:
+                    self._pending.setdefault(path, []).extend((key, None) for key in keys)
+                return
+            # One pass over the touched postings for the whole batch.
+            self._remove_docs([indexed.pop(key) for key in keys if key in indexed])
+            self._signatures[path] = None
+            self._unsaved.add(path)
+
+    def remove_list(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._remove_docs(self._lists.pop(path, {}).values())
+            self._signatures.pop(path, None)
+            self._unsaved.discard(path)
+            self._planned.discard(path)
+            self._pending.pop(path, None)
+        cache_file = self._cache_file(path)
+        if cache_file is not None:
+            try:
+                os.remove(cache_file)
+            except OSError:
+                pass
+
+    # -- background build ------------------------------------------------------
+    def refresh(self, paths):
+        """Index every list in paths that is not indexed yet, in the background."""
+        paths = [os.path.abspath(path) for path in paths]
+        with self._lock:
+            self._generation += 1
+            paths = [path for path in paths if path not in self._lists]
+            self._planned = set(paths)
+            self.ready = False
+            self._builder = threading.Thread(target=self._build, args=(paths, self._generation),
+                                             name="search-indexer", daemon=True)
+            self._builder.start()
+        return self._builder
+
+    def wait(self, timeout=None):
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+        return self.ready
+
+    def _build(self, paths, generation):
+        start = time.perf_counter()
+        try:
+            for path in paths:
+                if generation != self._generation:
+                    return
+                if self._index_file(path):
+                    self.lists_from_cache += 1
+                self.lists_indexed += 1
+            self.build_seconds = time.perf_counter() - start
+            self.ready = True
+            self._prune_cache(paths)
+            self.save()
+        except Exception as e:
+            self.last_error = e
+
+    def _index_file(self, path):
+        """Index path from its cache file if that is current, otherwise from
+        the list itself; True if the cache was used."""
+        signature = list_signature(path)
+        if signature is not None and self._load_cached(path, signature):
+            return True
+        parsed = parse_list(path)
+        if parsed.error is not None:
+            return False  # Unreadable for now; indexed once it changes.
+        if parsed.stream:
+            items = self._stream_items(path)
+        else:
+            data = parsed.data or {}
+            items = [(key, str(entry.get('text', ""))) for key, entry in data.items() if isinstance(entry, dict)]
+        self._index_entries(path, items, signature)
+        return False
+
+    def reindex(self, paths):
+        """Index lists again from their files, in the background; for lists
+        without a tab that another program changed or added."""
+        paths = [os.path.abspath(path) for path in paths]
+        thread = threading.Thread(target=self._reindex, args=(paths,), name="search-reindexer", daemon=True)
+        thread.start()
+        return thread
+
+    def _reindex(self, paths):
+        try:
+            for path in paths:
+                self._index_file(path)
+        except Exception as e:
+            self.last_error = e
+
+    @staticmethod
+    def _stream_items(path):
+        # A list too large to parse whole is read through the streaming
+        # loader into a compact EntryStore instead of a dict of dicts.
+        try:
+            store = load_store(path)
+        except (OSError, ValueError):
+            return []
+        return [(key, str(text)) for key, text in store.text_items()]
+
+    # -- cache files --------------------------------------------------------------
+    def _cache_file(self, path):
+        if self.cache_dir is None:
+            return None
+        name = hashlib.sha1(path.encode("utf-8", "surrogateescape")).hexdigest()[:20]
+        return os.path.join(self.cache_dir, name + ".json")
+
+    def _load_cached(self, path, signature):
+        """Install path's postings from its cache file; False if missing or stale."""
+        cache_file = self._cache_file(path)
+        if cache_file is None:
+            return False
+        try:
+            with open(cache_file, 'rb') as f:
+                payload = json_loads()(f.read())
+        except (OSError, ValueError):
+            return False
+        if (not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION
+                or payload.get("path") != path or payload.get("signature") != signature):
+            return False
+        entry_keys, texts = payload["keys"], payload["texts"]
+        with self._lock:
+            # Cached postings hold positions within the list; its documents
+            # take a fresh contiguous run of ids so they can be offset.
+            base = len(self._doc_paths)
+            self._doc_paths.extend([path] * len(entry_keys))
+            self._doc_keys.extend(entry_keys)
+            self._doc_texts.extend(texts)
+            postings = self._postings
+            new_words = []
+            for word, positions in payload["postings"].items():
+                docs = postings.get(word)
+                if docs is None:
+                    docs = postings[word] = array('i')
+                    new_words.append(word)
+                docs.extend([base + position for position in positions] if base else positions)
+            self._add_words(new_words)
+            keys = dict(zip(entry_keys, range(base, base + len(entry_keys))))
+            self._install(path, keys, signature, saved=True)
+        return True
+
+    def _prune_cache(self, paths):
+        # Drop cache files of lists that are gone from the data folder.
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return
+        with self._lock:
+            keep = {os.path.basename(self._cache_file(path)) for path in set(paths) | set(self._lists)}
+        for name in os.listdir(self.cache_dir):
+            if name not in keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def save(self, settle=False):
+        """Rewrite the cache file of every list that changed since it was saved.
+
+        Lists edited since they were indexed are skipped, as their file may
+        not have caught up yet, unless settle is set: the caller promises all
+        edits are on disk (MainWindow flushes every tab on close), so their
+        current signature can be recorded. Returns the number of files written.
+        """
+        if self.cache_dir is None:
+            return 0
+        written = 0
+        with self._save_lock:
+            for path in list(self._unsaved):
+                with self._lock:
+                    keys = self._lists.get(path)
+                    if keys is None:
+                        continue
+                    signature = self._signatures.get(path)
+                    if signature is None and settle:
+                        signature = self._signatures[path] = list_signature(path)
+                    if signature is None:
+                        continue
+                    texts = self._doc_texts
+                    entry_keys = list(keys)
+                    entry_texts = [texts[doc] for doc in keys.values()]
+                    # Edits from here on mark the list unsaved again.
+                    self._unsaved.discard(path)
+                postings = {}
+                for position, text in enumerate(entry_texts):
+                    for word in tokenize(text):
+                        postings.setdefault(word, []).append(position)
+                payload = {"version": CACHE_VERSION, "path": path, "signature": signature,
+                           "keys": entry_keys, "texts": entry_texts, "postings": postings}
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    write_json_atomic(self._cache_file(path), payload, indent=None)
+                    written += 1
+                except OSError as e:
+                    self.last_error = e
+                    with self._lock:
+                        self._unsaved.add(path)
+        return written
+
+    # -- queries ------------------------------------------------------------------
+    def _word_range(self, prefix):
+        vocab = self._vocab
+        return bisect.bisect_left(vocab, prefix), bisect.bisect_left(vocab, prefix + _PREFIX_END)
+
+    def search(self, query, limit=50):
+        """Entries whose text has a word starting with each word of query.
+
+        The query word matching the fewest entries drives the scan and the
+        others are checked per candidate, so the cost follows the number of
+        hits wanted rather than the size of the index.
+        """
+        prefixes = sorted(tokenize(query))
+        if not prefixes:
+            return []
+        with self._lock:
+            ranges = [(self._word_range(prefix), prefix) for prefix in prefixes]
+            if len(ranges) > 1:
+                # "entry 99": the one word "entry" may be in every entry, the
+                # eleven words 99, 990-999 in a handful.
+                ranges.sort(key=lambda item: sum(len(self._postings[word])
+                                                 for word in self._vocab[item[0][0]:item[0][1]]))
+            (lo, hi), _ = ranges[0]
+            others = [prefix for _, prefix in ranges[1:]]
+            vocab, postings = self._vocab, self._postings
+            paths, keys, texts = self._doc_paths, self._doc_keys, self._doc_texts
+            seen = set()
+            hits = []
+            for at in range(lo, hi):
+                for doc in postings[vocab[at]]:
+                    if doc in seen:
+                        continue
+                    seen.add(doc)
+                    text = texts[doc]
+                    if others:
+                        words = tokenize(text)
+                        if not all(any(word.startswith(prefix) for word in words) for prefix in others):
+                            continue
+                    hits.append(SearchHit(paths[doc], keys[doc], text))
+                    if len(hits) >= limit:
+                        return hits
+            return hits
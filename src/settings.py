@@ -0,0 +1,70 @@
+# Tunables shared by the list tabs and their persistence layer.
+
+# Quiet period after the last edit before a list is written to disk.
+WRITE_DELAY_MS = 500
+# Upper bound on how long a burst of edits can hold a write back.
+WRITE_MAX_DELAY_MS = 3000
+# A write that fails is retried this long after, twice as long after each
+# failure in a row, up to WRITE_RETRY_MAX_MS.
+WRITE_RETRY_MS = 1000
+WRITE_RETRY_MAX_MS = 60000
+# fsync list files (and their directory) after each write.
+FSYNC_WRITES = False
+
+# Append edits to <list>.json.journal instead of rewriting the whole file.
+JOURNAL_MODE = False
+# Fold the journal into the JSON snapshot once it grows past this size.
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+# Hidden lists kept built (widgets, model, timers) for quick re-display.
+TAB_CACHE_SIZE = 3
+
+# Worker threads used to read and parse list files at startup.
+LOADER_WORKERS = 4
+# Files at least this large are parsed in a process pool instead (None: never).
+LOADER_PROCESS_MIN_BYTES = None
+# "json" or "orjson"; "auto" uses orjson when it is installed.
+JSON_BACKEND = "auto"
+
+# Lists at least this large are memory-mapped and shown while they stream in,
+# instead of being parsed whole before display (None: never).
+STREAM_LOAD_MIN_BYTES = 32 * 1024 * 1024
+# Bytes of a streamed file decoded at a time; bounds the loader's own memory.
+STREAM_CHUNK_BYTES = 1024 * 1024
+# Entries handed from the streaming thread to the list view per batch.
+STREAM_BATCH_ENTRIES = 5000
+
+# Changes to a list file (or to data/) made by other programs are picked up
+# once they have been quiet this long; a burst of them costs one reload.
+WATCH_DELAY_MS = 100
+
+# Most search hits shown under the search box.
+SEARCH_RESULT_LIMIT = 50
+
+# Rows a filtered list view fetches at a time as it is scrolled.
+FILTER_PAGE_ROWS = 256
+# Entries a filtered view examines per event-loop turn while filling a page.
+FILTER_SCAN_ROWS = 10000
+
+# Record per-call timings, counters and event loop stalls for the hot paths
+# (see src/instrumentation.py); ZEN_LISTS_INSTRUMENT=1 or the diagnostics
+# panel turn it on as well. Off, it costs a flag check per call.
+INSTRUMENT = False
+# A GUI callback running longer than this is logged as a stall, with its stack.
+STALL_THRESHOLD_MS = 100
+# Most recent timed calls kept for the trace export.
+TRACE_EVENTS = 100000
+
+# The sync daemon (python -m src.sync_server) owns the list files in data/
+# and serves them over a Unix socket of this name in data/. Windows started
+# with --sync, or with SYNC set, use it when it is running: they load lists
+# from it, send it their edits and follow everyone else's as they happen.
+SYNC = False
+SYNC_SOCKET_NAME = ".zen-lists.sock"
+# How often the daemon looks for changes other programs made to its files.
+SYNC_POLL_MS = 250
+# Largest request or reply line; a snapshot of a big list is one line.
+SYNC_MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+# A subscriber this far behind on deltas is dropped; it reconnects and
+# starts again from a snapshot.
+SYNC_MAX_BACKLOG_BYTES = 64 * 1024 * 1024
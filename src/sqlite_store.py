@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from src import settings
+from src.instrumentation import instruments, timed
+from src.persistence import _worker, replacement_mode
+
+FIELDS = ("text", "priority", "completed")
+SCHEMA_VERSION = 1
+
+# seq keeps insertion order (the order a JSON object would have); the index
+# serves rows highest priority first without sorting the table.
+_SCHEMA = """
+CREATE TABLE entries (
+    seq INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    extra TEXT
+);
+"""
+_ORDER_INDEX = "CREATE INDEX entries_by_priority ON entries (priority DESC, seq)"
+_INSERT = "INSERT INTO entries (key, text, priority, completed, extra) VALUES (?, ?, ?, ?, ?)"
+_UPSERT = _INSERT + (" ON CONFLICT(key) DO UPDATE SET text = excluded.text, priority = excluded.priority,"
+                     " completed = excluded.completed, extra = excluded.extra")
+_DELETE = "DELETE FROM entries WHERE key = ?"
+
+
+def _row(key, entry):
+    extra = None
+    if len(entry) != len(FIELDS) or 'text' not in entry or 'completed' not in entry:
+        extra = {k: v for k, v in entry.items() if k not in FIELDS}
+    return (key, entry.get('text', ""), int(entry.get('priority', 1)), int(bool(entry.get('completed'))),
+            json.dumps(extra) if extra else None)
+
+
+def _entry(text, priority, completed, extra):
+    entry = {"text": text, "priority": priority, "completed": bool(completed)}
+    if extra:
+        entry.update(json.loads(extra))
+    return entry
+
+
+def _connect(path, fsync):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute(f"PRAGMA synchronous = {'FULL' if fsync else 'OFF'}")
+    return conn
+
+
+def _open_read_only(path):
+    # sqlite3.connect would create a missing file; report it like open() does.
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def read_entries(path):
+    """Entries of a .sqlite list as a dict in insertion order.
+
+    Raises FileNotFoundError if there is no file and ValueError if it is not
+    a list database.
+    """
+    try:
+        conn = _open_read_only(path)
+        try:
+            rows = conn.execute("SELECT key, text, priority, completed, extra FROM entries ORDER BY seq").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"not a list database: {e}") from e
+    data = {}
+    for key, text, priority, completed, extra in rows:
+        entry = data[key] = {"text": text, "priority": priority, "completed": completed == 1}
+        if extra:
+            entry.update(json.loads(extra))
+    return data
+
+
+def top_entries(path, limit):
+    """The first limit (key, entry) pairs in row order, read through the priority index."""
+    conn = _open_read_only(path)
+    try:
+        rows = conn.execute("SELECT key, text, priority, completed, extra FROM entries"
+                            " ORDER BY priority DESC, seq LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    return [(key, _entry(text, priority, completed, extra)) for key, text, priority, completed, extra in rows]
+
+
+def count_entries(path):
+    try:
+        conn = _open_read_only(path)
+        try:
+            return conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+        finally:
+            conn.close()
+    except (OSError, sqlite3.DatabaseError):
+        return 0
+
+
+def write_entries(path, data, fsync=False):
+    """Write a whole list as a new database, then swap it in with os.replace.
+
+    As with write_json_atomic, a crash mid-write leaves the previous file
+    untouched. Returns the size of the new file.
+    """
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    os.close(fd)
+    try:
+        # An empty file is a valid empty database. The temporary copy needs
+        # no rollback journal; it only becomes the list once complete.
+        conn = _connect(tmp_path, fsync)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.executescript(_SCHEMA)
+            with conn:
+                conn.executemany(_INSERT, (_row(key, entry) for key, entry in data.items()))
+                conn.execute(_ORDER_INDEX)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        finally:
+            conn.close()
+        os.chmod(tmp_path, replacement_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return os.path.getsize(path)
+
+
+class SqliteEditLog:
+    """Per-entry updates to a .sqlite list, committed in batches.
+
+    Offers the methods ListTab calls on a ListJournal. Each edit queues one
+    statement; the shared write-behind worker commits everything queued in a
+    single transaction, so a burst of edits costs one commit and no edit
+    rewrites the rest of the list.
+
+    Row updates never overwrite another program's edits, so a DiskGuard is
+    only told about them: a file changed before a commit is reported through
+    on_conflict, one changed only by the commit is recorded as ours.
+    """
+
+    def __init__(self, path, delay_ms=None, max_delay_ms=None, fsync=None, guard=None, on_error=None):
+        self.path = path
+        self.delay = (settings.WRITE_DELAY_MS if delay_ms is None else delay_ms) / 1000
+        self.max_delay = (settings.WRITE_MAX_DELAY_MS if max_delay_ms is None else max_delay_ms) / 1000
+        self.fsync = settings.FSYNC_WRITES if fsync is None else fsync
+        self.guard = guard
+        self.statements_applied = 0
+        self.commits = 0
+        self.seconds_writing = 0.0
+        self.last_error = None
+        self.failures = 0  # failed commits in a row; see persistence._WriteBehindWorker
+        self.on_error = on_error
+        self._pending = []  # (sql, parameter rows), in edit order
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._conn = None
+        self._conn_inode = None
+
+    def _queue(self, sql, rows):
+        with self._lock:
+            self._pending.append((sql, rows))
+        _worker.schedule(self, self.delay, self.max_delay)
+
+    def create(self, key, entry):
+        self._queue(_UPSERT, [_row(key, entry)])
+
+    def create_many(self, entries):
+        self._queue(_UPSERT, [_row(key, entry) for key, entry in entries])
+
+    def set_field(self, key, field, value):
+        self.set_fields((key,), field, value)
+
+    def set_fields(self, keys, field, value):
+        if field not in FIELDS:
+            raise KeyError(f"{field!r} is not an entry field")
+        if field != 'text':
+            value = int(value)
+        self._queue(f"UPDATE entries SET {field} = ? WHERE key = ?", [(value, key) for key in keys])
+
+    def delete(self, keys):
+        self._queue(_DELETE, [(key,) for key in keys])
+
+    def clear_completed(self, keys):
+        self.delete(keys)
+
+    @timed("SqliteEditLog.write_now")
+    def write_now(self):
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            start = time.perf_counter()
+            external = self.guard is not None and not self.guard.unchanged()
+            try:
+                self._commit(pending)
+            except Exception:
+                # Kept, ahead of edits queued since, for the retry.
+                with self._lock:
+                    self._pending[:0] = pending
+                raise
+            if external:
+                self.guard.conflict()
+            elif self.guard is not None:
+                self.guard.seen()
+            self.statements_applied += sum(len(rows) for _, rows in pending)
+            self.commits += 1
+            instruments.count("sqlite commits")
+            instruments.count("sqlite rows written", sum(len(rows) for _, rows in pending))
+            self.seconds_writing += time.perf_counter() - start
+
+    def _connection(self):
+        # Another program may have swapped in a new file with os.replace, as
+        # write_entries does. A connection to the old one would fail as read
+        # only or write where nobody reads, so a new inode means a new one.
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            # Never connect here: that would create an empty database.
+            self._disconnect()
+            raise
+        if self._conn is not None and inode != self._conn_inode:
+            self._disconnect()
+        if self._conn is None:
+            self._conn = _connect(self.path, self.fsync)
+            self._conn_inode = inode
+        return self._conn
+
+    def _disconnect(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _commit(self, pending):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                with conn:
+                    for sql, rows in pending:
+                        conn.executemany(sql, rows)
+                return
+            except sqlite3.OperationalError as e:
+                # Replaced between the inode check and the commit.
+                if attempt or "readonly" not in str(e):
+                    raise
+                self._disconnect()
+
+    def flush(self):
+        """Commit queued edits now; blocks until they are on disk."""
+        if _worker.cancel(self):
+            _worker.write(self)
+        else:
+            with self._write_lock:
+                pass
+
+    def close(self):
+        self.flush()
+        with self._write_lock:
+            self._disconnect()
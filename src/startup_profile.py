@@ -0,0 +1,61 @@
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Per-phase timings from process start to first interaction.
+
+    Recording is always on until startup is complete, that is until every
+    milestone in until has been reached (a perf_counter call per phase);
+    phases after that, such as lists opened later in the session, are not
+    kept. The report is only printed when main.py is run with
+    --profile-startup.
+    """
+
+    def __init__(self, until=("first paint", "all lists loaded")):
+        self.origin = time.perf_counter()
+        self.until = until
+        self.complete = False
+        self.phases = []     # (name, seconds)
+        self.milestones = {}  # name -> seconds since origin
+        self._open = {}
+
+    def begin(self, name):
+        if not self.complete:
+            self._open[name] = time.perf_counter()
+
+    def end(self, name):
+        start = self._open.pop(name, None)
+        if start is not None:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        if not self.complete:
+            self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def milestone(self, name):
+        # Only the first occurrence counts (e.g. the first paint).
+        if name not in self.milestones:
+            self.milestones[name] = time.perf_counter() - self.origin
+            self.complete = all(milestone in self.milestones for milestone in self.until)
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        width = max([len(name) for name, _ in self.phases] + [len(name) for name in self.milestones] + [10])
+        print("startup profile", file=stream)
+        for name, seconds in self.phases:
+            print(f"  {name:<{width}}  {seconds * 1000:9.1f} ms", file=stream)
+        for name, seconds in sorted(self.milestones.items(), key=lambda item: item[1]):
+            print(f"  {name:<{width}}  {seconds * 1000:9.1f} ms since start", file=stream)
+
+
+profile = StartupProfile()
@@ -0,0 +1,177 @@
+import os
+import json
+
+from src import journal, settings
+from src.persistence import write_json_atomic
+
+_loads = None
+
+
+def json_loads():
+    """The configured JSON parser; orjson is used when available and allowed."""
+    global _loads
+    if _loads is None:
+        _loads = json.loads
+        if settings.JSON_BACKEND in ("auto", "orjson"):
+            try:
+                import orjson
+            except ImportError:
+                if settings.JSON_BACKEND == "orjson":
+                    raise
+            else:
+                _loads = orjson.loads
+    return _loads
+
+
+###############################################################################
+# Storage engines: how a list file is read, written, edited and counted. The
+# engine is picked by file extension, so .json and .sqlite lists can sit side
+# by side in data/.
+###############################################################################
+class JsonEngine:
+    """One JSON object of entries per file; the original format."""
+
+    name = "json"
+    suffix = ".json"
+    # Large files are streamed from a memory map (see stream_loader).
+    streams = True
+
+    def read(self, path):
+        """The list's entries as a dict. Raises FileNotFoundError for a missing
+        file and ValueError for one that is not a list."""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json_loads()(raw) if raw.strip() else {}
+        if not isinstance(data, dict):
+            raise ValueError("a list file must hold a JSON object")
+        return data
+
+    def write(self, path, data, fsync=False):
+        return write_json_atomic(path, data, fsync)
+
+    def edit_log(self, path, get_data, guard=None, on_error=None):
+        """Where ListTab sends per-entry edits; None means rewrite the file."""
+        if settings.JOURNAL_MODE:
+            return journal.ListJournal(path, guard=guard, on_error=on_error)
+        return None
+
+    def count(self, path, chunk_bytes=1024 * 1024):
+        # Quotes inside entry text are escaped in JSON, so a quoted "completed"
+        # only ever appears as the key each entry carries once. Read in chunks
+        # so a very large list is never held in memory whole.
+        key = b'"completed"'
+        overlap = len(key) - 1
+        count = 0
+        tail = b""
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(chunk_bytes)
+                    if not chunk:
+                        return count
+                    window = tail + chunk
+                    count += window.count(key)
+                    # A tail shorter than the key cannot hold a match already counted.
+                    tail = window[-overlap:]
+        except OSError:
+            return 0
+
+    def remove(self, path):
+        journal.remove_journal_files(path)
+        os.remove(path)
+
+
+class SqliteEngine:
+    """A SQLite database per list: edits update single rows, and an index
+    keeps rows in priority order. See sqlite_store."""
+
+    name = "sqlite"
+    suffix = ".sqlite"
+    streams = False
+
+    # Deferred: sqlite3 is only needed once a .sqlite list is opened.
+    def read(self, path):
+        from src import sqlite_store
+        return sqlite_store.read_entries(path)
+
+    def write(self, path, data, fsync=False):
+        from src import sqlite_store
+        return sqlite_store.write_entries(path, data, fsync)
+
+    def edit_log(self, path, get_data, guard=None, on_error=None):
+        from src import sqlite_store
+        return sqlite_store.SqliteEditLog(path, guard=guard, on_error=on_error)
+
+    def count(self, path):
+        from src import sqlite_store
+        return sqlite_store.count_entries(path)
+
+    def remove(self, path):
+        os.remove(path)
+        try:
+            os.remove(path + "-journal")  # SQLite's rollback journal, after a crash
+        except FileNotFoundError:
+            pass
+
+
+ENGINES = {engine.suffix: engine for engine in (JsonEngine(), SqliteEngine())}
+LIST_SUFFIXES = tuple(ENGINES)
+# For the Open/Save dialogs.
+FILE_FILTER = "Lists (*.json *.sqlite);;JSON Files (*.json);;SQLite Lists (*.sqlite)"
+
+
+def engine_for(path):
+    """The engine for path by its extension; anything unknown is JSON."""
+    return ENGINES.get(os.path.splitext(path)[1].lower(), ENGINES[".json"])
+
+
+def is_list_file(name):
+    return name.lower().endswith(LIST_SUFFIXES)
+
+
+def migrate(source, to="sqlite", target=None, keep=False):
+    """Convert the list at source to another engine; returns the new path.
+
+    Any journal is folded in first. Unless keep is set, the source file is
+    renamed to <source>.migrated so the list does not show up twice.
+    """
+    engine = next(e for e in ENGINES.values() if e.name == to)
+    target = target or os.path.splitext(source)[0] + engine.suffix
+    if os.path.abspath(target) == os.path.abspath(source):
+        raise ValueError(f"{source} is already a {to} list")
+    if os.path.exists(target):
+        raise FileExistsError(target)
+    data = engine_for(source).read(source)
+    if journal.has_journal(source):
+        journal.replay(data, source)
+    engine.write(target, data, settings.FSYNC_WRITES)
+    if not keep:
+        os.replace(source, source + ".migrated")
+        journal.remove_journal_files(source)
+    return target
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m src.storage",
+                                     description="Convert list files between storage engines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("migrate", help="convert lists to another engine")
+    convert.add_argument("paths", nargs="+", help="list files to convert")
+    convert.add_argument("--to", choices=[e.name for e in ENGINES.values()], default="sqlite")
+    convert.add_argument("--keep", action="store_true", help="leave the source files in place")
+    args = parser.parse_args(argv)
+    failed = 0
+    for path in args.paths:
+        try:
+            target = migrate(path, args.to, keep=args.keep)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}")
+            failed += 1
+        else:
+            print(f"{path} -> {target} ({engine_for(target).count(target)} entries)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
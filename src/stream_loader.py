@@ -0,0 +1,125 @@
+import re
+import json
+import mmap
+import codecs
+from json.decoder import scanstring
+
+from src import journal, settings
+from src.entry_store import EntryStore
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decode = json.JSONDecoder().raw_decode
+# No entry is anywhere near this long; an unfinished step past it means the
+# file is malformed, and failing beats decoding the rest of it into memory.
+_MAX_STEP_CHARS = 16 * 1024 * 1024
+
+
+class _Window:
+    """Sliding decoded window over a memory-mapped file.
+
+    Only the unparsed tail of the text plus one chunk is held at a time, so
+    memory stays bounded by the chunk size and the largest single entry.
+    """
+
+    def __init__(self, mapped, chunk_bytes):
+        self.mapped = mapped
+        self.chunk_bytes = chunk_bytes
+        self.offset = 0  # bytes of the file decoded so far
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+
+    def more(self, keep_from):
+        """Drop text before keep_from and decode the next chunk; False at the end."""
+        if self.offset >= len(self.mapped):
+            return False
+        if len(self.text) - keep_from > _MAX_STEP_CHARS:
+            raise ValueError(f"malformed list file near byte {self.offset}")
+        data = self.mapped[self.offset:self.offset + self.chunk_bytes]
+        self.offset += len(data)
+        self.text = self.text[keep_from:] + self.decoder.decode(data, self.offset >= len(self.mapped))
+        return True
+
+
+def iter_entries(path, chunk_bytes=None):
+    """Yield (key, entry) pairs of a list file without loading it whole.
+
+    The file is memory-mapped and decoded a chunk at a time. Raises
+    ValueError if the file is not a JSON object of entry objects.
+    """
+    chunk_bytes = chunk_bytes or settings.STREAM_CHUNK_BYTES
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # An empty file cannot be mapped; it holds no entries.
+    with mapped:
+        window = _Window(mapped, chunk_bytes)
+        skip = _WHITESPACE.match
+        text, pos, first = "", 0, True
+        while True:
+            start = pos
+            try:
+                # One step: the opening brace or a separator, then key: value.
+                pos = skip(text, pos).end()
+                if first:
+                    if text[pos] != '{':
+                        raise ValueError("a list file must hold a JSON object")
+                    pos = skip(text, pos + 1).end()
+                    if text[pos] == '}':
+                        return
+                else:
+                    separator = text[pos]
+                    if separator == '}':
+                        return
+                    if separator != ',':
+                        raise ValueError(f"expected ',' or '}}' near byte {window.offset}")
+                    pos = skip(text, pos + 1).end()
+                if text[pos] != '"':
+                    raise ValueError(f"expected an entry key near byte {window.offset}")
+                key, pos = scanstring(text, pos + 1)
+                pos = skip(text, pos).end()
+                if text[pos] != ':':
+                    raise ValueError(f"expected ':' near byte {window.offset}")
+                entry, pos = _decode(text, skip(text, pos + 1).end())
+            except (IndexError, json.JSONDecodeError):
+                # The step ran off the end of the window: decode the next
+                # chunk and redo the step from where it began.
+                if not window.more(start):
+                    raise ValueError(f"unexpected end of list file at byte {window.offset}") from None
+                text, pos = window.text, 0
+                continue
+            if not isinstance(entry, dict):
+                raise ValueError(f"entry {key!r} is not an object")
+            first = False
+            yield key, entry
+
+
+def iter_batches(path, first=500, size=None, chunk_bytes=None):
+    """Lists of (key, entry) pairs; a small first batch so a screenful shows early."""
+    size = size or settings.STREAM_BATCH_ENTRIES
+    batch = []
+    limit = first
+    try:
+        for item in iter_entries(path, chunk_bytes):
+            batch.append(item)
+            if len(batch) >= limit:
+                yield batch
+                batch = []
+                limit = size
+    except ValueError:
+        # Hand over what was read before the error, then report it.
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
+
+
+def load_store(path, chunk_bytes=None):
+    """An EntryStore of the list at path, journal applied, built by streaming."""
+    store = EntryStore()
+    for batch in iter_batches(path, chunk_bytes=chunk_bytes):
+        store.append_batch(batch)
+    if journal.has_journal(path):
+        journal.replay(store, path)
+    return store
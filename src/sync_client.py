@@ -0,0 +1,242 @@
+"""Talking to the sync daemon (src/sync_server.py) without Qt.
+
+SyncClient is a blocking client for scripts and tests; ListReplica follows
+one list through a snapshot and the deltas after it; SyncLog is the edit
+log that hands a ListDocument's edits to the daemon instead of its file.
+The window's own connection is src/sync_link.py.
+"""
+import json
+import logging
+import os
+import socket
+from collections import Counter, deque
+
+from src import settings
+from src.entry_keys import new_key, new_keys
+from src.journal import RecordLog
+
+log = logging.getLogger(__name__)
+
+
+class SyncError(Exception):
+    """No daemon to talk to, or a request it refused."""
+
+
+def socket_path(data_dir):
+    """Where the sync daemon for data_dir listens."""
+    return os.path.join(data_dir, settings.SYNC_SOCKET_NAME)
+
+
+def encode(message):
+    return (json.dumps(message, separators=(',', ':')) + "\n").encode()
+
+
+def daemon_running(path):
+    """True if a sync daemon accepts connections on the socket at path."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+class SyncClient:
+    """A blocking connection to the sync daemon.
+
+    request() sends one request and returns its result, raising SyncError
+    for an error reply. Events the daemon pushes meanwhile (deltas, once
+    subscribed) queue up in events; next_event() waits for the next one.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self.events = deque()
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._next_id = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(path)
+        except OSError as e:
+            self._sock.close()
+            raise SyncError(f"no sync daemon at {path}: {e}") from e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._sock.close()
+
+    def _read_message(self, timeout):
+        while True:
+            end = self._buffer.find(b"\n", self._scanned)
+            if end != -1:
+                line = bytes(self._buffer[:end])
+                del self._buffer[:end + 1]
+                self._scanned = 0
+                return json.loads(line)
+            self._scanned = len(self._buffer)
+            self._sock.settimeout(timeout)
+            chunk = self._sock.recv(1024 * 1024)
+            if not chunk:
+                raise SyncError("the sync daemon closed the connection")
+            self._buffer += chunk
+
+    def request(self, op, **fields):
+        self._next_id += 1
+        request_id = self._next_id
+        self._sock.sendall(encode({"id": request_id, "op": op, **fields}))
+        while True:
+            message = self._read_message(self.timeout)
+            if "event" in message:
+                self.events.append(message)
+            elif message.get("id") == request_id:
+                if not message.get("ok"):
+                    raise SyncError(message.get("error", "request failed"))
+                return message.get("result")
+
+    def next_event(self, timeout=None):
+        """The next event the daemon pushed, or None after timeout seconds."""
+        if self.events:
+            return self.events.popleft()
+        try:
+            while True:
+                message = self._read_message(timeout)
+                if "event" in message:
+                    return message
+        except socket.timeout:
+            return None
+
+    # -- requests ---------------------------------------------------------------
+    def ping(self):
+        return self.request("ping")
+
+    def lists(self):
+        """[{"name", "entries", "version"}] for every list in the data folder."""
+        return self.request("lists")
+
+    def snapshot(self, name):
+        """{"version", "entries"} of one list."""
+        return self.request("snapshot", list=name)
+
+    def subscribe(self, names=None):
+        """Have deltas of the named lists (every list without names) pushed from now on."""
+        return self.request("subscribe", lists=None if names is None else list(names))
+
+    def unsubscribe(self):
+        return self.request("unsubscribe")
+
+    def edit(self, name, records):
+        """Apply journal records to a list; returns {"version", "keys"}."""
+        return self.request("edit", list=name, records=list(records))
+
+    def add(self, name, text, priority=1, completed=False):
+        """Add one entry; returns its key."""
+        key = new_key()
+        entry = {"text": text, "priority": priority, "completed": completed}
+        return self.edit(name, [{"op": "create", "key": key, "entry": entry}])["keys"][0]
+
+    def add_many(self, name, entries):
+        """Add entry dicts in one edit; returns their keys."""
+        entries = list(entries)
+        pairs = [[key, entry] for key, entry in zip(new_keys(len(entries)), entries)]
+        return self.edit(name, [{"op": "create_many", "entries": pairs}])["keys"]
+
+    def set_field(self, name, keys, field, value):
+        return self.edit(name, [{"op": "set_many", "keys": list(keys), "field": field, "value": value}])["keys"]
+
+    def delete(self, name, keys):
+        return self.edit(name, [{"op": "delete", "keys": list(keys)}])["keys"]
+
+    def flush(self, name=None):
+        """Return once every edit the daemon has taken (to one list, or to all) is on disk."""
+        return self.request("flush", list=name)
+
+
+class ListReplica:
+    """One list as a subscriber sees it: a snapshot, with the deltas that
+    came after it applied in order. Deltas it already has are skipped."""
+
+    def __init__(self, name, snapshot):
+        self.name = name
+        self.version = snapshot["version"]
+        self.entries = dict(snapshot["entries"])
+
+    def apply(self, event):
+        """Apply a delta event for this list; False if it was already in."""
+        if event.get("list") != self.name or event["version"] <= self.version:
+            return False
+        self.entries.update(event["put"])
+        for key in event["removed"]:
+            self.entries.pop(key, None)
+        self.version = event["version"]
+        return True
+
+
+def record_keys(record):
+    """Keys of the entries a journal record touches."""
+    if record.get("op") == "create_many":
+        return [key for key, _ in record["entries"]]
+    if "keys" in record:
+        return list(record["keys"])
+    return [record["key"]]
+
+
+class SyncLog(RecordLog):
+    """Edit log of a ListDocument whose file the sync daemon owns.
+
+    Each record goes to send(name, record, callback), which passes it on to
+    the daemon and hands its reply to callback; the file is never written
+    here. version is the daemon's version of the list this document has
+    caught up to, so a delta at or below it is one the document already has.
+
+    The daemon sends every edit back as a delta, ours too, and a delta
+    sent before it had our latest edit to an entry carries the entry as it
+    was: take_delta leaves such entries out, so an edit made here is never
+    undone by its own echo.
+    """
+
+    def __init__(self, name, send, version=0):
+        self.name = name
+        self.send = send
+        self.version = version
+        self._unanswered = Counter()  # key -> our edits to it still awaiting a reply
+        self._versions = {}           # key -> version our last edit to it brought the list to
+
+    def append(self, record):
+        keys = record_keys(record)
+        self._unanswered.update(keys)
+        self.send(self.name, record, lambda reply: self._answered(keys, reply))
+
+    def _answered(self, keys, reply):
+        self._unanswered.subtract(keys)
+        self._unanswered += Counter()  # drops the keys it was the last edit to
+        if not reply.get("ok"):
+            # The entries stay as edited here until the daemon changes them.
+            log.warning("sync daemon refused an edit to %s: %s", self.name, reply.get("error"))
+            return
+        version = reply["result"]["version"]
+        for key in keys:
+            self._versions[key] = max(version, self._versions.get(key, 0))
+
+    def take_delta(self, version, put, removed):
+        """The part of a delta the document should apply, as (put, removed),
+        or None if it has the delta already. Entries with an edit of ours
+        the daemon had not made when it sent the delta are left out; the
+        delta that follows that edit brings them."""
+        if version <= self.version:
+            return None
+        self.version = version
+        self._versions = {key: v for key, v in self._versions.items() if v > version}
+        if self._unanswered or self._versions:
+            ours = lambda key: key in self._unanswered or key in self._versions
+            put = {key: entry for key, entry in put.items() if not ours(key)}
+            removed = [key for key in removed if not ours(key)]
+        return put, removed
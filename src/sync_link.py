@@ -0,0 +1,130 @@
+import json
+import logging
+
+from PyQt5 import QtCore, QtNetwork
+
+from src.sync_client import SyncError, daemon_running, encode, socket_path
+
+log = logging.getLogger(__name__)
+
+
+###############################################################################
+# SyncLink: a window's connection to the sync daemon (src/sync_server.py),
+# over a QLocalSocket so it never blocks the event loop while waiting.
+###############################################################################
+class SyncLink(QtCore.QObject):
+    """Requests to the daemon, and the deltas it pushes, for one window.
+
+    request() sends and returns at once; the reply goes to its callback on
+    the GUI thread. call() waits for its reply, for the one place that
+    cannot go on without it (building a tab for a hidden list). Deltas
+    arrive as delta(list name, version, put, removed), and a list whose
+    file is gone as listRemoved(list name).
+    """
+
+    delta = QtCore.pyqtSignal(str, int, dict, list)
+    listRemoved = QtCore.pyqtSignal(str)
+    disconnected = QtCore.pyqtSignal()
+
+    def __init__(self, path, parent=None, timeout_ms=5000):
+        super().__init__(parent)
+        self.path = path
+        self.timeout_ms = timeout_ms
+        self.edits_sent = 0
+        self.deltas_received = 0
+        self._callbacks = {}   # request id -> callback(reply), or None
+        self._next_id = 0
+        self._buffer = bytearray()
+        self._closing = False
+        self.socket = QtNetwork.QLocalSocket(self)
+        self.socket.setReadBufferSize(0)
+        self.socket.readyRead.connect(self._read)
+        self.socket.disconnected.connect(self._lost)
+        self.socket.connectToServer(path)
+        if not self.socket.waitForConnected(timeout_ms):
+            raise SyncError(f"no sync daemon at {path}: {self.socket.errorString()}")
+
+    @classmethod
+    def connect_to(cls, data_dir, parent=None):
+        """A link to the daemon serving data_dir, or None if none is running."""
+        path = socket_path(data_dir)
+        if not daemon_running(path):
+            return None
+        try:
+            return cls(path, parent)
+        except SyncError as e:
+            log.warning("%s", e)
+            return None
+
+    @property
+    def connected(self):
+        return self.socket.state() == QtNetwork.QLocalSocket.ConnectedState
+
+    def close(self):
+        """Send what is still buffered, then disconnect."""
+        self._closing = True
+        if self.connected:
+            self.socket.flush()
+            self.socket.waitForBytesWritten(self.timeout_ms)
+            self.socket.disconnectFromServer()
+
+    def _lost(self):
+        if not self._closing:
+            log.warning("lost the sync daemon at %s", self.path)
+            self.disconnected.emit()
+
+    def _send(self, op, callback, fields):
+        self._next_id += 1
+        self._callbacks[self._next_id] = callback
+        self.socket.write(encode({"id": self._next_id, "op": op, **fields}))
+        return self._next_id
+
+    def request(self, op, callback=None, **fields):
+        """Send a request; callback(reply) gets the reply dict ("ok", and
+        "result" or "error"). Without a callback an error is logged."""
+        self._send(op, callback, fields)
+
+    def call(self, op, **fields):
+        """Send a request and wait for its result; raises SyncError."""
+        replies = []
+        request_id = self._send(op, replies.append, fields)
+        self.socket.flush()
+        while not replies:
+            if not self.connected or not self.socket.waitForReadyRead(self.timeout_ms):
+                self._callbacks.pop(request_id, None)
+                raise SyncError(f"no reply from the sync daemon to {op}")
+            self._read()
+        reply = replies[0]
+        if not reply.get("ok"):
+            raise SyncError(reply.get("error", "request failed"))
+        return reply.get("result")
+
+    def send_edit(self, name, record, callback=None):
+        """Hand one edit record of a list to the daemon (see SyncLog)."""
+        self.edits_sent += 1
+        self.request("edit", callback, list=name, records=[record])
+
+    def _read(self):
+        self._buffer += bytes(self.socket.readAll())
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", start)
+            if end == -1:
+                break
+            self._dispatch(json.loads(self._buffer[start:end]))
+            start = end + 1
+        del self._buffer[:start]
+
+    def _dispatch(self, message):
+        event = message.get("event")
+        if event == "delta":
+            self.deltas_received += 1
+            self.delta.emit(message["list"], message["version"], message["put"], message["removed"])
+        elif event == "removed":
+            self.listRemoved.emit(message["list"])
+        elif event is None:
+            callback = self._callbacks.pop(message.get("id"), None)
+            if callback is not None:
+                callback(message)
+            elif not message.get("ok"):
+                log.warning("sync daemon refused a request: %s", message.get("error"))
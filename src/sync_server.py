@@ -0,0 +1,387 @@
+"""zen-lists sync daemon: one process owning the list files in data/.
+
+Windows and scripts that would each rewrite whole files, and overwrite one
+another's edits, send their edits here over a Unix socket instead. The
+daemon keeps one ListDocument per list, so edits reach the file the way
+the app writes them (coalesced writes, or the journal), and pushes
+per-entry deltas to every subscriber.
+
+    python -m src.sync_server [--data DIR] [--socket PATH]
+
+The protocol is one JSON object per line, each way:
+
+    request  {"id": 7, "op": "snapshot", "list": "groceries"}
+    reply    {"id": 7, "ok": true, "result": ...}  or  {"id": 7, "ok": false, "error": "..."}
+    event    {"event": "delta", "list": "groceries", "version": 42,
+              "put": {key: entry, ...}, "removed": [key, ...]}
+    event    {"event": "removed", "list": "groceries"}    (its file is gone)
+
+    op           fields          result
+    ping                         "pong"
+    lists                        [{"name", "entries", "version"}]
+    snapshot     list            {"version", "entries": {key: entry}}
+    subscribe    [lists]         deltas of those lists (all, without lists)
+                                 from now on; {"versions": {name: version}}
+    unsubscribe
+    edit         list, records   journal records (src/journal.py) applied in
+                                 order; {"version", "keys"}
+    flush        [list]          once every edit so far is on disk
+
+Every edit bumps its list's version. A delta carries the version it brings
+the list to and a snapshot the version it shows, so a client drops deltas
+it already has. Deltas go out once per event loop turn: a burst of edits
+to a list costs each subscriber one message. Changes other programs make
+to the files are picked up every SYNC_POLL_MS and sent out the same way.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+
+from src import settings
+from src.instrumentation import instruments
+from src.list_catalog import scan_lists
+from src.list_document import ListDocument
+from src.persistence import snapshot
+from src.storage import LIST_SUFFIXES
+from src.sync_client import SyncError, daemon_running, encode, socket_path
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+# Entry fields an edit may set, with the type each is stored as.
+FIELDS = {"text": str, "priority": int, "completed": bool}
+
+
+class RequestError(Exception):
+    """A request the daemon cannot carry out; sent back as its error."""
+
+
+def clean_entry(entry):
+    if not isinstance(entry, dict):
+        raise RequestError("an entry must be an object")
+    cleaned = dict(entry)
+    cleaned.update(text=str(entry.get("text", "")), priority=int(entry.get("priority", 1)),
+                   completed=bool(entry.get("completed", False)))
+    return cleaned
+
+
+def prepare(record):
+    """A journal record as a function applying it to a ListDocument, which
+    returns the keys it touched. Checked up front, so a request with a bad
+    record changes nothing."""
+    op = record.get("op") if isinstance(record, dict) else None
+    if op in ("create", "create_many"):
+        if op == "create":
+            entries = [(record.get("key"), clean_entry(record["entry"]))]
+        else:
+            entries = [(key, clean_entry(entry)) for key, entry in record["entries"]]
+        # An entry the list has already, key and all, is one sent twice (two
+        # windows putting the example entry into the same empty list, say).
+        return lambda document: document.add_entries(
+            [(key, entry) for key, entry in entries if document.list_data.get(key) != entry])
+    if op in FIELDS or op == "set_many":
+        field = record["field"] if op == "set_many" else op
+        if field not in FIELDS:
+            raise RequestError(f"no entry field {field!r}")
+        keys = [str(key) for key in record["keys"]] if op == "set_many" else [str(record["key"])]
+        value = FIELDS[field](record["value"])
+        return lambda document: document.set_field(keys, field, value)
+    if op in ("delete", "clear_completed"):
+        keys = [str(key) for key in record["keys"]]
+        return lambda document: document.delete_entries(keys)
+    raise RequestError(f"unknown record {op!r}")
+
+
+class SyncedList:
+    """A list the daemon has open, and what its subscribers have not heard yet."""
+
+    __slots__ = ("name", "document", "version", "dirty")
+
+    def __init__(self, name, document):
+        self.name = name
+        self.document = document
+        self.version = 0
+        self.dirty = set()  # keys changed since the last delta
+
+
+class Connection:
+    """One client; subscribed to every list when lists is None."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.subscribed = False
+        self.lists = None
+
+    def wants(self, name):
+        return self.subscribed and (self.lists is None or name in self.lists)
+
+    def send(self, data):
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > settings.SYNC_MAX_BACKLOG_BYTES:
+            # Not reading its deltas; it starts over from a snapshot when it reconnects.
+            log.warning("dropping a subscriber %d bytes behind", self.writer.transport.get_write_buffer_size())
+            self.writer.close()
+            return
+        self.writer.write(data)
+
+
+###############################################################################
+# SyncServer: the daemon. Everything runs on its event loop thread; only
+# the documents' file writes happen on their writer threads.
+###############################################################################
+class SyncServer:
+    def __init__(self, data_dir, path=None):
+        self.data_dir = os.path.abspath(data_dir)
+        self.path = path or socket_path(self.data_dir)
+        self.lists = {}          # name -> SyncedList
+        self.connections = set()
+        self.requests = 0
+        self.edits = 0
+        self.deltas_sent = 0
+        self._opening = {}       # name -> future of a list being read
+        self._server = None
+        self._poller = None
+        self._loop = None
+        self._broadcast_scheduled = False
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if os.path.exists(self.path):
+            if daemon_running(self.path):
+                raise SyncError(f"a sync daemon is already serving {self.path}")
+            os.remove(self.path)  # Left by one that did not shut down.
+        self._server = await asyncio.start_unix_server(self._serve, self.path,
+                                                       limit=settings.SYNC_MAX_MESSAGE_BYTES)
+        self._poller = asyncio.ensure_future(self._poll())
+        log.info("serving %s on %s", self.data_dir, self.path)
+
+    async def close(self):
+        """Stop serving and write every pending edit out."""
+        self._server.close()
+        self._poller.cancel()
+        for connection in list(self.connections):
+            connection.writer.close()
+        await self._server.wait_closed()
+        for synced in self.lists.values():
+            await self._loop.run_in_executor(None, synced.document.close)
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        log.info("stopped after %d requests, %d edits", self.requests, self.edits)
+
+    # -- lists ------------------------------------------------------------------
+    def list_path(self, name):
+        if not isinstance(name, str) or not name or os.sep in name or name.startswith("."):
+            raise RequestError(f"bad list name {name!r}")
+        for suffix in LIST_SUFFIXES:
+            path = os.path.join(self.data_dir, name + suffix)
+            if os.path.isfile(path):
+                return path
+        raise RequestError(f"no list named {name!r}")
+
+    async def open_list(self, name):
+        synced = self.lists.get(name)
+        if synced is not None:
+            return synced
+        opening = self._opening.get(name)
+        if opening is None:
+            # Read off the loop, so a big list does not hold up everyone else.
+            path = self.list_path(name)
+            on_conflict = lambda: self._loop.call_soon_threadsafe(self.check_list, name)
+            opening = self._opening[name] = self._loop.run_in_executor(
+                None, lambda: ListDocument(path, on_conflict=on_conflict))
+        try:
+            document = await asyncio.shield(opening)
+        finally:
+            self._opening.pop(name, None)
+        synced = self.lists.get(name)
+        if synced is None:
+            synced = self.lists[name] = SyncedList(name, document)
+        return synced
+
+    def check_list(self, name):
+        """Merge in changes another program made to a list's file."""
+        synced = self.lists.get(name)
+        if synced is None:
+            return
+        if not os.path.exists(synced.document.path):
+            self.drop_list(name)
+            return
+        merge = synced.document.check_disk()
+        if merge:
+            self.changed(synced, merge.removed + merge.added + merge.changed + merge.moved)
+
+    def drop_list(self, name):
+        synced = self.lists.pop(name)
+        synced.document.close(discard=True)
+        data = encode({"event": "removed", "list": name})
+        for connection in self.connections:
+            if connection.wants(name):
+                connection.send(data)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(settings.SYNC_POLL_MS / 1000)
+            for name in list(self.lists):
+                try:
+                    self.check_list(name)
+                except Exception:
+                    log.exception("checking %s", name)
+
+    # -- deltas -----------------------------------------------------------------
+    def changed(self, synced, keys):
+        if not keys:
+            return
+        synced.version += 1
+        synced.dirty.update(keys)
+        if not self._broadcast_scheduled:
+            self._broadcast_scheduled = True
+            self._loop.call_soon(self._broadcast)
+
+    def _broadcast(self):
+        self._broadcast_scheduled = False
+        for synced in self.lists.values():
+            if not synced.dirty:
+                continue
+            store = synced.document.list_data
+            put = {key: dict(store[key]) for key in synced.dirty if key in store}
+            removed = [key for key in synced.dirty if key not in store]
+            synced.dirty = set()
+            data = encode({"event": "delta", "list": synced.name, "version": synced.version,
+                           "put": put, "removed": removed})
+            for connection in self.connections:
+                if connection.wants(synced.name):
+                    connection.send(data)
+                    self.deltas_sent += 1
+            instruments.count("sync deltas")
+
+    # -- requests ---------------------------------------------------------------
+    async def _serve(self, reader, writer):
+        connection = Connection(writer)
+        self.connections.add(connection)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    connection.send(encode({"ok": False, "error": "request too large"}))
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                connection.send(encode(await self.handle(connection, line)))
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    break
+        finally:
+            self.connections.discard(connection)
+            writer.close()
+
+    async def handle(self, connection, line):
+        """The reply to one request line."""
+        self.requests += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("a request must be an object")
+            request_id = request.get("id")
+            handler = getattr(self, "op_" + str(request.get("op")), None)
+            if handler is None:
+                raise RequestError(f"unknown op {request.get('op')!r}")
+            result = await handler(connection, request)
+        except RequestError as e:
+            return {"id": request_id, "ok": False, "error": str(e)}
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            return {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        return {"id": request_id, "ok": True, "result": result}
+
+    async def op_ping(self, connection, request):
+        return "pong"
+
+    async def op_lists(self, connection, request):
+        result = []
+        for descriptor in scan_lists(self.data_dir):
+            synced = self.lists.get(descriptor.name)
+            result.append({"name": descriptor.name,
+                           "entries": len(synced.document.list_data) if synced else descriptor.entry_count,
+                           "version": synced.version if synced else 0})
+        return result
+
+    async def op_snapshot(self, connection, request):
+        synced = await self.open_list(request["list"])
+        return {"version": synced.version, "entries": snapshot(synced.document.list_data)}
+
+    async def op_subscribe(self, connection, request):
+        names = request.get("lists")
+        connection.subscribed = True
+        connection.lists = None if names is None else set(names)
+        return {"versions": {name: synced.version for name, synced in self.lists.items()
+                             if connection.wants(name)}}
+
+    async def op_unsubscribe(self, connection, request):
+        connection.subscribed = False
+        return None
+
+    async def op_edit(self, connection, request):
+        synced = await self.open_list(request["list"])
+        document = synced.document
+        if not document.writable:
+            raise RequestError(f"{synced.name} could not be read whole; it is read-only")
+        steps = [prepare(record) for record in request["records"]]
+        keys = []
+        for step in steps:
+            keys += step(document)
+        self.edits += 1
+        instruments.count("sync edits")
+        self.changed(synced, keys)
+        return {"version": synced.version, "keys": keys}
+
+    async def op_flush(self, connection, request):
+        name = request.get("list")
+        lists = [await self.open_list(name)] if name is not None else list(self.lists.values())
+        for synced in lists:
+            await self._loop.run_in_executor(None, synced.document.flush)
+        return {"versions": {synced.name: synced.version for synced in lists}}
+
+
+async def serve(data_dir, path=None):
+    """Run a daemon for data_dir until SIGINT or SIGTERM."""
+    server = SyncServer(data_dir, path)
+    await server.start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+    await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.sync_server",
+                                     description="Own the lists in a data folder and serve them to windows and scripts.")
+    parser.add_argument("--data", default=DATA_DIR, help="data folder (default: the app's data/)")
+    parser.add_argument("--socket", help=f"socket path (default: DATA/{settings.SYNC_SOCKET_NAME})")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if not os.path.isdir(args.data):
+        print(f"python -m src.sync_server: no folder {args.data}", file=sys.stderr)
+        return 1
+    try:
+        asyncio.run(serve(args.data, args.socket))
+    except SyncError as e:
+        print(f"python -m src.sync_server: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,9 @@
-import os
-import json
 from PyQt5 import QtWidgets, QtGui, QtCore
 
 class CustomTitleBar(QtWidgets.QWidget):
+    # Double-clicking the title opens the (otherwise hidden) diagnostics panel.
+    diagnosticsRequested = QtCore.pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setAutoFillBackground(True)
@@ -41,6 +42,11 @@ class CustomTitleBar(QtWidgets.QWidget):
 
         self.setLayout(layout)
 
+    def mouseDoubleClickEvent(self, event):
+        if self.title.geometry().contains(event.pos()):
+            self.diagnosticsRequested.emit()
+        super().mouseDoubleClickEvent(event)
+
     def mousePressEvent(self, event):
         self.old_pos = event.globalPos()
     